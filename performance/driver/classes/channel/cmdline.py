@@ -21,6 +21,8 @@ class CmdlineExitEvent(Event):
   has completed. The exit code is tracked.
   """
 
+  __slots__ = ('exitcode',)
+
   def __init__(self, exitcode, **kwargs):
     super().__init__(**kwargs)
 
@@ -34,6 +36,8 @@ class CmdlineExitZeroEvent(CmdlineExitEvent):
   is zero
   """
 
+  __slots__ = ()
+
 
 class CmdlineExitNonzeroEvent(CmdlineExitEvent):
   """
@@ -41,6 +45,8 @@ class CmdlineExitNonzeroEvent(CmdlineExitEvent):
   is non-zero
   """
 
+  __slots__ = ()
+
 
 class CmdlineStartedEvent(Event):
   """
@@ -48,6 +54,8 @@ class CmdlineStartedEvent(Event):
   ID so the observers can attach to the process and extract useful data.
   """
 
+  __slots__ = ('pid',)
+
   def __init__(self, pid, *args, **kwargs):
     super().__init__(*args, **kwargs)
     self.pid = pid
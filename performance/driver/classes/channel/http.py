@@ -1,12 +1,29 @@
+import asyncio
+import itertools
 import requests
 import time
 
-from performance.driver.core.events import Event, TickEvent, ParameterUpdateEvent, TeardownEvent
+from performance.driver.core.events import Event, ParameterUpdateEvent, TeardownEvent
 from performance.driver.core.template import TemplateString, TemplateDict
 from performance.driver.core.classes import Channel
 from performance.driver.core.reflection import subscribesToHint, publishesHint
+from performance.driver.core.utils import HTTPTimings, mountTimingAdapter, \
+  timingTraceConfig
 from threading import Thread, Lock
 
+from .utils.arrivals import ARRIVAL_PROCESSES, arrivalSchedule
+from .utils.body import RESPONSE_CHUNK_SIZE, ResponseBody
+
+# NOTE: The following block is needed only when sphinx is parsing this file
+#       in order to generate the documentation. It's not really useful for
+#       the logic of the file itself.
+try:
+  import aiohttp
+except ImportError:
+  import logging
+  logging.error('One or more libraries required by HTTPChannel were not'
+                'installed. The asyncio engine will not work.')
+
 ###############################
 # Events
 ###############################
@@ -17,9 +34,15 @@ class HTTPRequestStartEvent(Event):
   Published before every HTTP request
   """
 
-  def __init__(self, verb, url, body, headers, *args, **kwargs):
+  __slots__ = ('verb', 'url', 'body', 'headers', 'intendedTs')
+
+  def __init__(self, verb, url, body, headers, *args, intendedTs=None,
+               **kwargs):
     super().__init__(*args, **kwargs)
 
+    #: When the request was scheduled to be placed, on open-loop arrivals
+    self.intendedTs = intendedTs
+
     #: The HTTP verb that was used (in lower-case). Ex: ``get``
     self.verb = verb.lower()
 
@@ -39,6 +62,8 @@ class HTTPFirstRequestStartEvent(HTTPRequestStartEvent):
   This is valid when a ``repeat`` parameter has a value > 1.
   """
 
+  __slots__ = ()
+
 
 class HTTPLastRequestStartEvent(HTTPRequestStartEvent):
   """
@@ -46,12 +71,16 @@ class HTTPLastRequestStartEvent(HTTPRequestStartEvent):
   This is valid when a ``repeat`` parameter has a value > 1.
   """
 
+  __slots__ = ()
+
 
 class HTTPRequestEndEvent(Event):
   """
   Published when the HTTP request has completed and the response is starting
   """
 
+  __slots__ = ('verb', 'url', 'body', 'headers')
+
   def __init__(self, verb, url, body, headers, *args, **kwargs):
     super().__init__(*args, **kwargs)
 
@@ -74,6 +103,8 @@ class HTTPFirstRequestEndEvent(HTTPRequestEndEvent):
   This is valid when a ``repeat`` parameter has a value > 1.
   """
 
+  __slots__ = ()
+
 
 class HTTPLastRequestEndEvent(HTTPRequestEndEvent):
   """
@@ -81,12 +112,16 @@ class HTTPLastRequestEndEvent(HTTPRequestEndEvent):
   This is valid when a ``repeat`` parameter has a value > 1.
   """
 
+  __slots__ = ()
+
 
 class HTTPResponseStartEvent(Event):
   """
   Published when the HTTP response is starting.
   """
 
+  __slots__ = ('url',)
+
   def __init__(self, url, *args, **kwargs):
     super().__init__(*args, **kwargs)
 
@@ -100,6 +135,8 @@ class HTTPFirstResponseStartEvent(HTTPResponseStartEvent):
   This is valid when a ``repeat`` parameter has a value > 1.
   """
 
+  __slots__ = ()
+
 
 class HTTPLastResponseStartEvent(HTTPResponseStartEvent):
   """
@@ -107,24 +144,66 @@ class HTTPLastResponseStartEvent(HTTPResponseStartEvent):
   This is valid when a ``repeat`` parameter has a value > 1.
   """
 
+  __slots__ = ()
+
 
 class HTTPResponseEndEvent(Event):
   """
   Published when the HTTP response has completed
   """
 
-  def __init__(self, url, body, headers, *args, **kwargs):
+  __slots__ = ('url', 'headers', 'intendedTs', 'size', 'digest', 'timings',
+               '_body', '_encoding')
+
+  def __init__(self, url, body, headers, *args, encoding=None, intendedTs=None,
+               size=None, digest=None, timings=None, **kwargs):
     Event.__init__(self, *args, **kwargs)
 
     #: The URL requested
     self.url = url
 
-    #: The response body (as string)
-    self.body = body
+    #: When the request was scheduled to be placed, on open-loop arrivals
+    self.intendedTs = intendedTs
 
     #: The response headers
     self.headers = headers
 
+    #: The size of the response body (in bytes), even if it was not kept
+    self.size = len(body) if size is None else size
+
+    #: The hex digest of the response body, when using the `hash` response
+    #: mode
+    self.digest = digest
+
+    #: The durations of the phases of the request (`HTTPTimings`), like the
+    #: time to first byte (``timings.ttfb``)
+    self.timings = timings
+
+    # The response body is decoded only if it's accessed
+    self._body = body
+    self._encoding = encoding
+
+  @property
+  def body(self):
+    """
+    The response body (as string). If the body was given as bytes, it's
+    decoded with the response `encoding` on the first access.
+    """
+    body = self._body
+    if type(body) is bytes:
+      body = self._body = body.decode(self._encoding or 'utf-8', 'replace')
+    return body
+
+  def toDict(self):
+    """
+    Return dict representation of the event, including the decoded body
+    """
+    inst = super().toDict()
+    inst['body'] = self.body
+    if self.timings is not None:
+      inst['timings'] = self.timings.toDict()
+    return inst
+
 
 class HTTPFirstResponseEndEvent(HTTPResponseEndEvent):
   """
@@ -132,6 +211,8 @@ class HTTPFirstResponseEndEvent(HTTPResponseEndEvent):
   This is valid when a ``repeat`` parameter has a value > 1.
   """
 
+  __slots__ = ()
+
 
 class HTTPLastResponseEndEvent(HTTPResponseEndEvent):
   """
@@ -139,12 +220,17 @@ class HTTPLastResponseEndEvent(HTTPResponseEndEvent):
   This is valid when a ``repeat`` parameter has a value > 1.
   """
 
+  __slots__ = ()
+
 
 class HTTPErrorEvent(Event):
   """
   Published when an exception is raised during an HTTP operation (ex. connection error)
   """
 
+  # (Note: The error events are not using `__slots__`, since they are
+  # combined with the response events, and they are rare anyway)
+
   def __init__(self, exception, *args, **kwargs):
     Event.__init__(self, *args, **kwargs)
 
@@ -160,7 +246,9 @@ class HTTPResponseErrorEvent(HTTPResponseEndEvent, HTTPErrorEvent):
 
   def __init__(self, url, body, headers, exception, *args, **kwargs):
     HTTPResponseEndEvent.__init__(self, url, body, headers, *args, **kwargs)
-    HTTPErrorEvent.__init__(self, exception)
+
+    #: The exception that was raised
+    self.exception = exception
 
 
 class HTTPFirstResponseErrorEvent(HTTPFirstResponseEndEvent, HTTPErrorEvent):
@@ -171,7 +259,9 @@ class HTTPFirstResponseErrorEvent(HTTPFirstResponseEndEvent, HTTPErrorEvent):
 
   def __init__(self, url, body, headers, exception, *args, **kwargs):
     HTTPFirstResponseEndEvent.__init__(self, url, body, headers, *args, **kwargs)
-    HTTPErrorEvent.__init__(self, exception)
+
+    #: The exception that was raised
+    self.exception = exception
 
 
 class HTTPLastResponseErrorEvent(HTTPLastResponseEndEvent, HTTPErrorEvent):
@@ -182,7 +272,9 @@ class HTTPLastResponseErrorEvent(HTTPLastResponseEndEvent, HTTPErrorEvent):
 
   def __init__(self, url, body, headers, exception, *args, **kwargs):
     HTTPLastResponseEndEvent.__init__(self, url, body, headers, *args, **kwargs)
-    HTTPErrorEvent.__init__(self, exception)
+
+    #: The exception that was raised
+    self.exception = exception
 
 
 ###############################
@@ -248,54 +340,90 @@ class HTTPRequestState:
     if not self.repeatInterval is None:
       self.repeatInterval = float(self.repeatInterval)
 
-    # Expose 'i' parameter that should be equal to the current
-    # run in scase of a repeatable one
+    # Extract open-loop arrival config
+    self.arrival = config.get('arrival', None)
+    self.rate = config.get('rate', None)
+    if self.arrival and not self.rate:
+      raise ValueError('Please specify the `rate` of the `{}` arrivals'.format(
+        self.arrival))
+
+    # Compile the templates of the url and the body, so only the macros that
+    # refer to the current run (`i`) are rendered on every repetition
+    self.urlTemplate = channel.getCompiledConfig('url', eventParameters,
+                                                 ('i', ))
+    self.bodyTemplate = channel.getCompiledConfig('body', eventParameters,
+                                                  ('i', ))
+    self.renderedBody = None
+    self.bodyVarying = not self.bodyTemplate.static
+    body = self.bodyTemplate.apply()
+    if not self.bodyVarying and type(body) is list:
+      self.bodyVarying = any(
+          map(lambda case: 'if' in case and 'i' in conditionNames(
+              channel.getCondition(case['if'])), body))
 
     # State information
     self.activeRequest = None
+    self.activeTask = None
+    self.repeatCall = None
     self.completedCounter = 0
+    self.respondedCounter = 0
+    self.finishedCounter = 0
     self.lastRequestTs = 0
     self.active = True
 
-  def getUrl(self):
+  def getUrl(self, index=None):
     """
     Dynamically compose URL, by appending some template variables (if any)
     """
+    return self.urlTemplate.apply({
+        'i': self.completedCounter if index is None else index
+    })
 
-    # Compile the parameters to request
-    parameters = {'i': self.completedCounter}
-    parameters.update(self.eventParameters)
-
-    # Render url
-    return self.channel.getRenderedConfig(parameters).get('url')
-
-  def getBody(self):
+  def getBody(self, index=None):
     """
     Dynamically compose body, by applying some template variables (if any)
     """
 
-    # Compile the parameters to request
-    parameters = {'i': self.completedCounter}
-    parameters.update(self.eventParameters)
+    # Re-use the body rendered before if it does not refer to `i`
+    if self.renderedBody is not None:
+      return self.renderedBody
 
-    # Render body
-    body = self.channel.getRenderedConfig(parameters).get('body')
+    # Compile the parameters to request and render body
+    parameters = {'i': self.completedCounter if index is None else index}
+    body = self.bodyTemplate.apply(parameters)
 
     # Apply conditionals on body
     if type(body) is list:
+      parameters.update(self.eventParameters)
       for case in body:
-        if not 'if' in case or not eval(case['if'], parameters):
+        if not 'if' in case or not eval(
+            self.channel.getCondition(case['if']), parameters):
           continue
-        return case['value']
-
-      raise ValueError(
-          'Could not find a matching body case for parameters: {0!r}'.format(
-              body))
+        body = case['value']
+        break
+      else:
+        raise ValueError(
+            'Could not find a matching body case for parameters: {0!r}'.format(
+                body))
 
-    # Render config and get body
+    if not self.bodyVarying:
+      self.renderedBody = body
     return body
 
 
+def conditionNames(code):
+  """
+  Return the names referred by the given compiled expression, including the
+  ones referred by the nested functions (ex. lambdas and comprehensions)
+  """
+  names = set(code.co_names)
+  for const in code.co_consts:
+    if hasattr(const, 'co_names'):
+      names |= conditionNames(const)
+
+  return names
+
+
 ###############################
 # Entry Point
 ###############################
@@ -345,6 +473,41 @@ class HTTPChannel(Channel):
         # [Optional] For which event to wait before re-sending the request.
         repeatAfter: event
 
+        # [Optional] How the requests are performed. Can be `thread`
+        # (default) or `asyncio`
+        engine: asyncio
+
+        # [Optional] When using the `asyncio` engine, how many of the
+        # repeated requests to keep in flight at the same time (default 1)
+        concurrency: 100
+
+        # [Optional] When using the `asyncio` engine, the maximum number of
+        # open connections of the channel (default 1000, 0 for no limit)
+        connections: 1000
+
+        # [Optional] How to handle the response bodies. Can be `raw`
+        # (default) to keep the entire body, `truncate` to keep only the
+        # first `responseLimit` bytes, `hash` to keep only the size and the
+        # `responseHash` digest of the body or `discard` to keep only the
+        # size of the body
+        response: truncate
+
+        # [Optional] The number of bytes to keep in `truncate` mode
+        # (default 1024)
+        responseLimit: 1024
+
+        # [Optional] The hash algorithm to use in `hash` mode (default sha1)
+        responseHash: sha1
+
+        # [Optional] When using the `asyncio` engine, place the repeated
+        # requests in an open loop, with the given arrival process. Can be
+        # `constant` or `poisson`
+        arrival: constant
+
+        # [Optional] The number of requests per second to place in an open
+        # loop (can be a macro value)
+        rate: 100
+
   When a parameter is changed, a new HTTP request is made. If a ``repeat``
   parameter is specified, the same HTTP request will be sent again, that many
   times.
@@ -383,6 +546,46 @@ class HTTPChannel(Channel):
   Therefore it's possble to track the progress of the entire repeat batch, aswell
   as the progress of an individual HTTP event.
 
+  The ``url`` and the ``body`` are rendered once for every parameter update.
+  Only the macros that refer to the index of the repeated request (``{{i}}``)
+  or that produce a new value on every call (like ``{{uuid()}}``) are rendered
+  again on every repetition, and the ``if`` expressions of the body cases are
+  compiled only once.
+
+  By default the entire body of every response is kept in the
+  ``HTTPResponseEndEvent`` and it's decoded only if it's accessed. When the
+  responses are large, the ``response`` parameter can be used in order to
+  keep only the first bytes of the body (``truncate``), only it's size and
+  digest (``hash``) or only it's size (``discard``). The filters on the
+  ``body`` of the events still work on the part of the body that was kept.
+
+  By default every parameter update starts a new thread that sends the
+  requests one after the other. In order to generate more load, you can use
+  the ``asyncio`` engine, that performs the requests of all the parameter
+  updates from a single asyncio event loop, keeping up to ``concurrency`` of
+  the repeated requests of every update in flight. The same events are
+  published, with the first and last ones referring to the first and last
+  request placed. The ``{{i}}`` macro is the index of every request. When
+  ``repeatAfter`` is used the requests are always sent one after the other.
+
+  The requests above are placed in a closed loop: When the server slows down,
+  fewer requests are placed and the measured latencies hide the time the
+  requests would have waited. With the ``arrival`` parameter the requests are
+  instead placed in an open loop, at a constant ``rate`` or with exponentially
+  distributed intervals (``poisson``), regardless of how many responses are
+  pending. The ``HTTPRequestStartEvent`` and ``HTTPResponseEndEvent`` events
+  then carry the ``intendedTs`` time the request was scheduled at, that can be
+  used for measuring the corrected latency (see the ``corrected`` parameter
+  of the ``DurationTracker``).
+
+  The ``HTTPResponseEndEvent`` events also carry the ``timings`` of the
+  request: The durations of the name resolution (``dns``), the TCP connection
+  (``connect``), the TLS handshake (``tls``), the time to first byte
+  (``ttfb``) and the transfer of the body (``transfer``), measured with a
+  monotonic clock. They can be extracted as metrics with the
+  ``EventAttributeTracker`` (ex. ``attrib: timings.ttfb``), in order to
+  separate the network effects from the processing time of the server.
+
   .. note::
      This channel will automatically inject an ``Authorization`` header if
      a ``dcos_auth_token`` definition exists, so you don't have to specify
@@ -399,17 +602,304 @@ class HTTPChannel(Channel):
     self.requestStateMutex = Lock()
     self.session = requests.Session()
 
-    # Increase pool sizes
-    self.session.mount('https://',
-                       requests.adapters.HTTPAdapter(
-                           pool_connections=100, pool_maxsize=100))
-    self.session.mount('http://',
-                       requests.adapters.HTTPAdapter(
-                           pool_connections=100, pool_maxsize=100))
+    # Increase pool sizes and time the phases of the requests
+    mountTimingAdapter(self.session, pool_connections=100, pool_maxsize=100)
+
+    # Configure the engine used for placing the requests
+    config = self.getRenderedConfig()
+    self.engine = config.get('engine', 'thread')
+    self.concurrency = int(config.get('concurrency', 1))
+    self.connections = int(config.get('connections', 1000))
+    if not self.engine in ('thread', 'asyncio'):
+      raise ValueError('Unknown HTTP engine `{}`'.format(self.engine))
+    arrival = config.get('arrival', None)
+    if arrival and not arrival in ARRIVAL_PROCESSES:
+      raise ValueError('Unknown arrival process `{}`'.format(arrival))
+    if arrival and self.engine != 'asyncio':
+      raise ValueError('Open-loop arrivals require the `asyncio` engine')
+    self.loop = None
+    self.asyncSession = None
+
+    # The compiled `if` expressions of the body cases
+    self.conditions = {}
+
+    # Configure how the response bodies are handled
+    self.responseMode = config.get('response', 'raw')
+    self.responseLimit = int(config.get('responseLimit', 1024))
+    self.responseHash = config.get('responseHash', 'sha1')
+    self.createResponseBody()  # (Validates the configuration)
 
     # Receive parameter updates and clean-up on teardown
     self.eventbus.subscribe(self.handleTeardown, events=(TeardownEvent, ))
 
+  def createResponseBody(self):
+    """
+    Create a new collector for the body of a response
+    """
+    return ResponseBody(self.responseMode, self.responseLimit,
+                        self.responseHash)
+
+  def getCondition(self, expr):
+    """
+    Return the compiled code of the given `if` expression of a body case,
+    compiling it only the first time it's used
+    """
+    code = self.conditions.get(expr)
+    if code is None:
+      code = compile(expr, '<if>', 'eval')
+      self.conditions[expr] = code
+
+    return code
+
+  def getLoop(self):
+    """
+    Return the event loop of the asyncio engine, starting it on the first call
+    """
+    with self.requestStateMutex:
+      if self.loop is None:
+        self.loop = asyncio.new_event_loop()
+        Thread(
+            target=self.loop.run_forever,
+            daemon=True,
+            name='http-channel-loop').start()
+
+      return self.loop
+
+  async def handleRequestAsync(self, req):
+    """
+    Perform all the requests of the given state with the asyncio engine
+    """
+    if self.asyncSession is None:
+      self.asyncSession = aiohttp.ClientSession(
+          connector=aiohttp.TCPConnector(limit=self.connections, ssl=False),
+          timeout=aiohttp.ClientTimeout(total=None),
+          trace_configs=[timingTraceConfig()])
+
+    self.logger.info('Performing {} {} request(s) to {}'.format(
+      req.repeat, req.verb, req.getUrl()))
+
+    # Start the workers that are placing the requests, sharing the counter
+    # of the requests to place, or the scheduler of the open-loop requests
+    if req.arrival:
+      workers = [asyncio.ensure_future(self.scheduleRequests(req))]
+    else:
+      concurrency = max(1, min(self.concurrency, req.repeat))
+      if not req.repeatAfter is None:
+        concurrency = 1
+      counter = itertools.count()
+      workers = list(
+          map(lambda _: asyncio.ensure_future(self.requestWorker(req, counter)),
+              range(concurrency)))
+
+    try:
+      await asyncio.gather(*workers)
+      if req.active:
+        self.logger.info('Completed {} {} request(s) to {}'.format(
+          req.repeat, req.verb, req.getUrl()))
+
+    except Exception as e:
+      self.logger.error('Unable to perform {} request(s) to {}'.format(
+        req.verb, req.url))
+      self.logger.exception(e)
+
+    finally:
+      for worker in workers:
+        worker.cancel()
+
+      # Remove the active request when we are done
+      with self.requestStateMutex:
+        try:
+          self.requestStates.remove(req)
+        except ValueError:
+          pass
+
+  async def requestWorker(self, req, counter):
+    """
+    Place the next request of the given state, until all of them are placed
+    """
+    index = next(counter)
+    while req.active and index < req.repeat:
+      await self.placeRequestAsync(req, index)
+
+      req.completedCounter += 1
+      index = next(counter)
+      if index >= req.repeat:
+        break
+
+      self.logger.debug("Completed {} out of {} requests".format(
+        req.completedCounter, req.repeat))
+
+      # Wait for the `repeatAfter` event or the `repeatInterval` time
+      if not req.repeatAfter is None:
+        await self.waitForEvent(req.repeatAfter)
+      elif not req.repeatInterval is None:
+        req.lastRequestTs = time.time()
+        await asyncio.sleep(req.repeatInterval)
+
+  async def scheduleRequests(self, req):
+    """
+    Place the requests of the given state in an open loop, each one at it's
+    scheduled time, without waiting for the responses of the previous ones
+    """
+    pending = set()
+
+    def handleCompleted(task):
+      req.completedCounter += 1
+      pending.discard(task)
+
+    try:
+      arrivals = arrivalSchedule(req.arrival, req.rate, time.time())
+      for index in range(0, req.repeat):
+        intendedTs = next(arrivals)
+        delay = intendedTs - time.time()
+        if delay > 0:
+          await asyncio.sleep(delay)
+        if not req.active:
+          break
+
+        task = asyncio.ensure_future(
+            self.placeRequestAsync(req, index, intendedTs))
+        task.add_done_callback(handleCompleted)
+        pending.add(task)
+
+      # Wait for the pending responses
+      if pending:
+        await asyncio.gather(*pending)
+
+    finally:
+      for task in list(pending):
+        task.cancel()
+
+  async def stopLoopAsync(self, session):
+    """
+    Close the given session and stop the event loop of the asyncio engine
+    """
+    try:
+      if session:
+        await session.close()
+    finally:
+      asyncio.get_event_loop().stop()
+
+  async def waitForEvent(self, eventName):
+    """
+    Wait until an event with the given name is published
+    """
+    loop = asyncio.get_event_loop()
+    future = loop.create_future()
+
+    def handleEvent(event):
+      self.eventbus.unsubscribe(handleEvent)
+      loop.call_soon_threadsafe(
+          lambda: future.done() or future.set_result(event))
+
+    self.eventbus.subscribe(handleEvent, events=(eventName, ))
+    try:
+      return await future
+    finally:
+      self.eventbus.unsubscribe(handleEvent)
+
+  @publishesHint(HTTPFirstRequestEndEvent, HTTPLastRequestEndEvent,
+                 HTTPRequestEndEvent, HTTPFirstResponseStartEvent,
+                 HTTPLastResponseStartEvent, HTTPResponseStartEvent,
+                 HTTPFirstRequestStartEvent, HTTPLastRequestStartEvent,
+                 HTTPRequestStartEvent, HTTPFirstResponseEndEvent,
+                 HTTPLastResponseEndEvent, HTTPResponseEndEvent)
+  async def placeRequestAsync(self, req, index, intendedTs=None):
+    """
+    Place the request with the given index and publish it's events
+
+    Since the requests can be placed concurrently, the First/Last events of
+    the responses are picked by the order the responses arrive, and not by
+    the index of the request.
+    """
+    renderedBody = req.getBody(index)
+    reqUrl = req.getUrl(index)
+
+    # Place request
+    self.eventbus.publish(
+        pickFirstLast(index, req.repeat,
+                      HTTPFirstRequestStartEvent, HTTPLastRequestStartEvent,
+                      HTTPRequestStartEvent)(
+                          req.verb,
+                          reqUrl,
+                          renderedBody,
+                          req.headers,
+                          traceid=req.traceids,
+                          intendedTs=intendedTs))
+    self.logger.debug('Placing a {} request to {}'.format(req.verb, reqUrl))
+    try:
+
+      # Send request (and trap errors)
+      timings = HTTPTimings()
+      async with self.asyncSession.request(
+          req.verb, reqUrl, data=renderedBody, headers=req.headers,
+          trace_request_ctx=timings) as response:
+
+        # Notify the message bus that the response has started
+        responded = req.respondedCounter
+        req.respondedCounter += 1
+        self.eventbus.publish(
+            pickFirstLast(responded, req.repeat,
+                          HTTPFirstRequestEndEvent, HTTPLastRequestEndEvent,
+                          HTTPRequestEndEvent)(
+                              req.verb,
+                              reqUrl,
+                              renderedBody,
+                              req.headers,
+                              traceid=req.traceids))
+        self.eventbus.publish(
+            pickFirstLast(responded, req.repeat,
+                          HTTPFirstResponseStartEvent,
+                          HTTPLastResponseStartEvent, HTTPResponseStartEvent)(
+                              reqUrl, traceid=req.traceids))
+
+        # Warn errors
+        if (response.status < 200) or (response.status >= 300):
+          self.logger.warn(
+              'HTTP {} Request to {} returned status code of {}'.format(
+                  req.verb, reqUrl, response.status))
+
+        # Read the body, or stream it if only parts of it are kept
+        body = self.createResponseBody()
+        if body.mode == 'raw':
+          body.feed(await response.read())
+        else:
+          async for chunk in response.content.iter_chunked(
+              RESPONSE_CHUNK_SIZE):
+            body.feed(chunk)
+        timings.finish()
+
+      # Process response
+      finished = req.finishedCounter
+      req.finishedCounter += 1
+      self.eventbus.publish(
+          pickFirstLast(finished, req.repeat,
+                        HTTPFirstResponseEndEvent, HTTPLastResponseEndEvent,
+                        HTTPResponseEndEvent)(
+                            reqUrl,
+                            body.content,
+                            response.headers,
+                            encoding=response.charset,
+                            size=body.size,
+                            digest=body.digest,
+                            timings=timings,
+                            traceid=req.traceids,
+                            intendedTs=intendedTs))
+
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+      self.logger.error('{} request to {} failed: {}'.format(
+          req.verb, reqUrl, e))
+
+      # Dispatch error
+      finished = req.finishedCounter
+      req.finishedCounter += 1
+      self.eventbus.publish(
+          pickFirstLast(finished, req.repeat,
+                        HTTPFirstResponseErrorEvent,
+                        HTTPLastResponseErrorEvent, HTTPResponseErrorEvent)(
+                            reqUrl, "", {}, e, traceid=req.traceids,
+                            intendedTs=intendedTs))
+
   @publishesHint(HTTPFirstRequestEndEvent, HTTPLastRequestEndEvent,
                  HTTPRequestEndEvent, HTTPFirstResponseStartEvent,
                  HTTPLastResponseStartEvent, HTTPResponseStartEvent,
@@ -438,13 +928,11 @@ class HTTPChannel(Channel):
         self.eventbus.unsubscribe(handle_repeatAfter)
         self.handleRequest(req)
 
-      # Helper function that handles TickEvents until the designated time
-      # in the `repeatInterval` parameter has passed
-      def handle_repeatInterval(event):
-        deltaMs = event.ts - req.lastRequestTs
-        if deltaMs >= req.repeatInterval:
-          self.eventbus.unsubscribe(handle_repeatInterval)
-          self.handleRequest(req)
+      # Helper function that is called by the scheduler when the time in the
+      # `repeatInterval` parameter has passed
+      def handle_repeatInterval():
+        req.repeatCall = None
+        Thread(target=self.handleRequest, daemon=True, args=(req, )).start()
 
       # Helper function to notify the message bus when an HTTP response starts
       def ack_response(request, *args, **kwargs):
@@ -477,12 +965,15 @@ class HTTPChannel(Channel):
       try:
 
         # Send request (and trap errors)
+        # (Note: The body is streamed if only parts of it are kept)
+        body = self.createResponseBody()
         req.activeRequest = self.session.request(
             req.verb,
             reqUrl,
             verify=False,
             data=renderedBody,
             headers=req.headers,
+            stream=body.mode != 'raw',
             hooks=dict(response=ack_response))
 
         # Warn errors
@@ -492,14 +983,26 @@ class HTTPChannel(Channel):
               'HTTP {} Request to {} returned status code of {}'.format(
                   req.verb, reqUrl, req.activeRequest.status_code))
 
+        # Read the body
+        if body.mode == 'raw':
+          body.feed(req.activeRequest.content)
+        else:
+          for chunk in req.activeRequest.iter_content(RESPONSE_CHUNK_SIZE):
+            body.feed(chunk)
+        req.activeRequest.timings.finish()
+
         # Process response
         self.eventbus.publish(
             pickFirstLast(req.completedCounter, req.repeat,
                           HTTPFirstResponseEndEvent, HTTPLastResponseEndEvent,
                           HTTPResponseEndEvent)(
                               reqUrl,
-                              req.activeRequest.text,
+                              body.content,
                               req.activeRequest.headers,
+                              encoding=req.activeRequest.encoding,
+                              size=body.size,
+                              digest=body.digest,
+                              timings=req.activeRequest.timings,
                               traceid=req.traceids))
 
       except requests.exceptions.ConnectionError as e:
@@ -527,7 +1030,8 @@ class HTTPChannel(Channel):
         # Register a timeout if we have a `repeatInterval` parameter
         if not req.repeatInterval is None:
           req.lastRequestTs = time.time()
-          self.eventbus.subscribe(handle_repeatInterval, events=(TickEvent, ))
+          req.repeatCall = self.eventbus.callLater(req.repeatInterval,
+                                                   handle_repeatInterval)
           break
 
         # Otherwise let the loop continue in order to re-schedule request
@@ -553,10 +1057,21 @@ class HTTPChannel(Channel):
     with self.requestStateMutex:
       for req in self.requestStates:
         req.active = False
+        if req.repeatCall:
+          req.repeatCall.cancel()
+        if req.activeTask:
+          req.activeTask.cancel()
         if req.activeRequest:
           req.activeRequest.raw._fp.close()
       self.requestStates = []
 
+      # Close the connections and stop the loop of the asyncio engine
+      if self.loop:
+        asyncio.run_coroutine_threadsafe(
+            self.stopLoopAsync(self.asyncSession), self.loop)
+        self.asyncSession = None
+        self.loop = None
+
   def handleParameterUpdate(self, event):
     """
     Handle a property update
@@ -570,4 +1085,8 @@ class HTTPChannel(Channel):
       self.requestStates.append(state)
 
     # Start request chain
-    Thread(target=self.handleRequest, daemon=True, args=(state, )).start()
+    if self.engine == 'asyncio':
+      state.activeTask = asyncio.run_coroutine_threadsafe(
+          self.handleRequestAsync(state), self.getLoop())
+    else:
+      Thread(target=self.handleRequest, daemon=True, args=(state, )).start()
@@ -18,18 +18,27 @@ from .utils.bulk import Request, BulkRequestManager
 
 
 class MarathonDeploymentRequestedEvent(Event):
-  def __init__(self, instance, *args, **kwargs):
+  __slots__ = ('instance', 'intendedTs')
+
+  def __init__(self, instance, *args, intendedTs=None, **kwargs):
     super().__init__(*args, **kwargs)
     self.instance = instance
 
+    #: When the request was scheduled to be placed, on open-loop arrivals
+    self.intendedTs = intendedTs
+
 
 class MarathonDeploymentStartedEvent(Event):
+  __slots__ = ('instance',)
+
   def __init__(self, instance, *args, **kwargs):
     super().__init__(*args, **kwargs)
     self.instance = instance
 
 
 class MarathonDeploymentRequestFailedEvent(Event):
+  __slots__ = ('instance', 'respose', 'status_code')
+
   def __init__(self, instance, status_code, respose, *args, **kwargs):
     super().__init__(*args, **kwargs)
     self.instance = instance
@@ -62,6 +71,17 @@ class MarathonDeployChannel(Channel):
           # [Optional] How long to wait between retries
           interval: 1s
 
+          # [Optional] Multiply the interval by this factor on every
+          # subsequent retry (exponential backoff, defaults to 1)
+          backoff: 2
+
+          # [Optional] The longest interval to wait between retries
+          maxInterval: 30s
+
+          # [Optional] Randomly shorten every interval by up to the given
+          # fraction (0 to 1), to avoid re-trying in lockstep
+          jitter: 0.5
+
         # One or more deployments to perform
         deploy:
 
@@ -93,6 +113,17 @@ class MarathonDeployChannel(Channel):
             # [Optional] Throttle the rate of deployments at a given RPS
             rate: 100
 
+            # [Optional] How many deployments can be placed in a single burst
+            # when throttling the rate (the size of the token bucket,
+            # defaults to 1)
+            bucket: 10
+
+            # [Optional] Place the deployments in an open loop, at the given
+            # `rate`, regardless of how many of them are pending. Can be
+            # `constant` or `poisson`. The `parallel` parameter is then only
+            # defining how many requests can be sent at the same time.
+            arrival: poisson
+
             # [Optional] Stall the deployment for the given time before placing
             # the first HTTP request
             delay: 10s
@@ -153,10 +184,17 @@ class MarathonDeployChannel(Channel):
     # Get retry configuration
     retry_tries = 10
     retry_interval = 1
+    retry_backoff = 1
+    retry_max_interval = None
+    retry_jitter = 0
     retry = self.getConfig('retry', True)
     if type(retry) is dict:
       retry_tries = retry.get('tries', 10)
       retry_interval = parseTimeExpr(retry.get('interval', '1'))
+      retry_backoff = float(retry.get('backoff', 1))
+      if 'maxInterval' in retry:
+        retry_max_interval = parseTimeExpr(retry['maxInterval'])
+      retry_jitter = float(retry.get('jitter', 0))
       retry = True
 
     # Evaluate parameters
@@ -168,6 +206,8 @@ class MarathonDeployChannel(Channel):
     burst = evalDeployment.get('burst', '')
     parallel = evalDeployment.get('parallel', '')
     rate = evalDeployment.get('rate', '')
+    arrival = evalDeployment.get('arrival', None)
+    bucket = evalDeployment.get('bucket', None)
     delay = evalDeployment.get('delay', '')
 
     # Create template with the body
@@ -182,7 +222,8 @@ class MarathonDeployChannel(Channel):
 
       # Assign the request-event trace ID on the request, so we can use
       # it on the success and error callbacks
-      event = MarathonDeploymentRequestedEvent(inst_id, traceid=traceids)
+      event = MarathonDeploymentRequestedEvent(
+          inst_id, traceid=traceids, intendedTs=request.intendedTs)
       request.traceids = event.traceids
 
       self.logger.info('Deploying {} "{}"'.format(deploymentType, inst_id))
@@ -227,8 +268,13 @@ class MarathonDeployChannel(Channel):
         rate=rate,
         burst=burst,
         parallel=parallel,
+        arrival=arrival,
+        bucketSize=bucket,
         retry=retry_tries if retry else None,
         retryInterval=retry_interval if retry else None,
+        retryBackoff=retry_backoff,
+        retryMaxInterval=retry_max_interval,
+        retryJitter=retry_jitter,
         requestFn=cbRequest,
         successFn=cbSuccess,
         errorFn=cbError
@@ -273,6 +319,14 @@ class MarathonDeployChannel(Channel):
     except InterruptedError:
       pass
 
+    # Warn if the deployments were not placed at the configured rate
+    # (Note: The poisson arrivals are expected to deviate from it)
+    if rate and arrival != 'poisson' and manager.achievedRate is not None and \
+       manager.achievedRate < float(rate) * 0.95:
+      self.logger.warn(
+          'Deployments were placed at {:.2f} req/s instead of {} req/s'.format(
+              manager.achievedRate, rate))
+
     # Pop manager from the active managers
     try:
       i = self.activeManagers.index(manager)
@@ -0,0 +1,33 @@
+import random
+
+# The open-loop arrival processes that can be used for placing requests
+ARRIVAL_PROCESSES = ('constant', 'poisson')
+
+
+def arrivalSchedule(arrival, rate, started):
+  """
+  Generate the intended start times of the requests of an open-loop schedule,
+  starting at the `started` timestamp and placing `rate` requests per second
+  on average.
+
+  With the `constant` arrival process the requests are evenly spaced, while
+  with the `poisson` process the intervals between them are exponentially
+  distributed, simulating independent clients.
+  """
+  if not arrival in ARRIVAL_PROCESSES:
+    raise ValueError('Unknown arrival process `{}`'.format(arrival))
+  rate = float(rate)
+  if rate <= 0:
+    raise ValueError('The open-loop arrival rate must be positive')
+
+  # (Note: The constant schedule is calculated from the index of the request,
+  # so the rounding errors do not accumulate)
+  ts = started
+  index = 0
+  while True:
+    yield ts
+    index += 1
+    if arrival == 'poisson':
+      ts += random.expovariate(rate)
+    else:
+      ts = started + index / rate
@@ -0,0 +1,67 @@
+import hashlib
+
+# The ways the body of an HTTP response can be handled
+RESPONSE_MODES = ('raw', 'truncate', 'hash', 'discard')
+
+# The size of the chunks the response bodies are streamed in
+RESPONSE_CHUNK_SIZE = 65536
+
+
+class ResponseBody:
+  """
+  Collects the body of an HTTP response, as it's streamed in chunks, keeping
+  only the data required by the response `mode`:
+
+  * ``raw`` : Keep all the raw bytes of the body
+  * ``truncate`` : Keep only the first `limit` bytes of the body
+  * ``hash`` : Keep only the size and the `hash` digest of the body
+  * ``discard`` : Keep only the size of the body
+
+  The size of the body is always counted, regardless of the mode.
+  """
+
+  def __init__(self, mode='raw', limit=1024, hash='sha1'):
+    if not mode in RESPONSE_MODES:
+      raise ValueError('Unknown response mode `{}`'.format(mode))
+
+    self.mode = mode
+    self.limit = int(limit)
+    self.size = 0
+    self.chunks = []
+    self.kept = 0
+    self.hash = None
+    if mode == 'hash':
+      self.hash = hashlib.new(hash)
+
+  def feed(self, chunk):
+    """
+    Process the next chunk of the body
+    """
+    self.size += len(chunk)
+    if self.mode == 'raw':
+      self.chunks.append(chunk)
+
+    elif self.mode == 'truncate':
+      if self.kept < self.limit:
+        chunk = chunk[:self.limit - self.kept]
+        self.chunks.append(chunk)
+        self.kept += len(chunk)
+
+    elif self.mode == 'hash':
+      self.hash.update(chunk)
+
+  @property
+  def content(self):
+    """
+    The bytes of the body that were kept
+    """
+    return b''.join(self.chunks)
+
+  @property
+  def digest(self):
+    """
+    The hex digest of the body, or `None` if it was not hashed
+    """
+    if self.hash is None:
+      return None
+    return self.hash.hexdigest()
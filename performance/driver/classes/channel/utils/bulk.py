@@ -2,14 +2,21 @@ import json
 import logging
 import time
 
-from threading import Event, Thread
-from queue import Queue
-from concurrent.futures import Future, wait, FIRST_COMPLETED, ALL_COMPLETED
+from threading import Event, Lock, Thread
+from queue import Queue, Empty
+from concurrent.futures import Future
+
+from performance.driver.core.scheduler import getDefaultScheduler
+from performance.driver.core.utils import mountTimingAdapter
+from .arrivals import ARRIVAL_PROCESSES, arrivalSchedule
+from .ratelimit import RateMeter, TokenBucket
+from .retry import RetryPolicy
 
 # NOTE: The following block is needed only when sphinx is parsing this file
 #       in order to generate the documentation. It's not really useful for
 #       the logic of the file itself.
 try:
+  from requests.adapters import DEFAULT_POOLSIZE
   from requests_futures.sessions import FuturesSession
 except ImportError:
   import logging
@@ -53,6 +60,8 @@ class Request:
 
     # Response state
     self.lastRequest = None
+    self.intendedTs = None
+    self.timings = None
     self.requestCount = 0
     self.future = None
 
@@ -72,20 +81,45 @@ class Request:
     return self
 
 
-class RequestPool(list):
+class RequestPool:
   """
   Multiple requests pool
+
+  The requests are kept in an (insertion-ordered) dict, so they are removed
+  in constant time, and the completed ones are pushed to a completion queue
+  by the done-callbacks of their futures, so waiting for a request does not
+  need to scan the pool.
   """
   def __init__(self):
-    super().__init__()
-    self.interruptFuture = Future()
+    self.requests = {}
+    self.completed = Queue()
+    self.interrupted = False
+
+  def append(self, request):
+    """
+    Add a placed request to the pool
+    """
+    self.requests[request] = True
+    future = request.future
+    future.add_done_callback(
+      lambda result: self.completed.put((request, future)))
 
   def interrupt(self):
     """
-    Complete the interrupt future, that is going to interrupt
-    all possible wait operations.
+    Interrupt all the current and the future wait operations
+    """
+    self.interrupted = True
+    self.completed.put(None)
+
+  def _pop(self, item):
+    """
+    Remove the request of a completion queue item from the pool, returning
+    it, or `None` if it was already removed
     """
-    self.interruptFuture.set_exception(InterruptedError())
+    request, future = item
+    if request.future is not future or self.requests.pop(request, None) is None:
+      return None
+    return request
 
   def waitAll(self, timeout=None):
     """
@@ -95,8 +129,8 @@ class RequestPool(list):
       return []
 
     # Since it's not possible to wait for all, while at the same time
-    # waiting just for the `interruptFuture` to complete, we are going to
-    # wait for every single future in a loop, until all of them are resolved
+    # waiting just for the interruption, we are going to wait for every
+    # single future in a loop, until all of them are resolved
     requests = []
     while self:
       future = self.waitOne(timeout=timeout)
@@ -114,47 +148,55 @@ class RequestPool(list):
     """
     Wait until one future is completed
     """
-    if not self:
-      return None
+    while self and not self.interrupted:
+      try:
+        item = self.completed.get(timeout=timeout)
+      except Empty:
+        return None
+
+      # If we were interrupted, keep the poison pill in the queue for the
+      # next wait operations
+      if item is None:
+        self.completed.put(None)
+        return None
+
+      # (Note: The requests that were already collected are skipped)
+      request = self._pop(item)
+      if request is not None:
+        return request
 
-    # Extract futures
-    futures = list(map(lambda r: r.future, self))
-    futures.append(self.interruptFuture)
-    (done, undone) = wait(futures, return_when=FIRST_COMPLETED, timeout=timeout)
-
-    # Find the completed future
-    result = done.pop()
-    for i in range(0, len(self)):
-      if self[i].future == result:
-        req = self[i]
-        del self[i]
-        return req
-
-    # If we reached this point, the completed future was the
-    # interrupted future. So return `None`.
     return None
 
   def onlyCompleted(self):
     """
     Return all the completed futures without waiting
     """
-    if not self:
-      return []
-
-    # Find all completed futures
     result = []
-    for request in self:
-      if request.future.done():
+    while self and not self.interrupted:
+      try:
+        item = self.completed.get_nowait()
+      except Empty:
+        break
+
+      if item is None:
+        self.completed.put(None)
+        break
+
+      request = self._pop(item)
+      if request is not None:
         result.append(request)
 
-    # Remove found futures from the pool
-    for request in result:
-      i = self.index(request)
-      if i >= 0:
-        del self[i]
-
     return result
 
+  def __iter__(self):
+    return iter(list(self.requests))
+
+  def __contains__(self, request):
+    return request in self.requests
+
+  def __len__(self):
+    return len(self.requests)
+
 
 class BulkRequestManager:
   """
@@ -164,16 +206,56 @@ class BulkRequestManager:
 
   def __init__(self, rate=None, burst=None, parallel=None, retry=1,
       retryInterval=None, successCodes=[], failureCodes=[], requestFn=None,
-      successFn=None, errorFn=None):
+      successFn=None, errorFn=None, arrival=None, bucketSize=None,
+      retryBackoff=1, retryMaxInterval=None, retryJitter=0,
+      clock=time.monotonic, sleep=time.sleep):
     """
     Create and configure the bulk request manager
+
+    A failed request is re-tried up to `retry` times. If a `retryInterval` is
+    given, every retry is scheduled that many seconds after the failed request
+    was placed, growing by `retryBackoff` times on every subsequent failure,
+    up to `retryMaxInterval`, and randomly shortened by up to the
+    `retryJitter` fraction (see `RetryPolicy`). Otherwise the failed requests
+    are re-tried right away.
+
+    If a `rate` is given, the requests are paced by a token bucket, that
+    allows bursts of up to `bucketSize` requests (default 1). A bigger bucket
+    also compensates for longer stalls of the request thread. The rate that
+    was actually achieved is available in the `achievedRate` property. The
+    token bucket uses the given `clock` and `sleep` functions.
+
+    If an `arrival` process is given (`constant` or `poisson`), the requests
+    are placed in an open loop: They are sent at their scheduled time, at the
+    given `rate`, regardless of how many responses are pending. The intended
+    start time of every request is kept in it's `intendedTs` field.
+
+    The durations of the phases of every completed request (ex. the time to
+    first byte) are kept in it's `timings` field.
     """
     self.logger = logging.getLogger('BulkRequestManager')
     self.running = False
 
+    # Validate the open-loop configuration
+    if arrival:
+      if not arrival in ARRIVAL_PROCESSES:
+        raise ValueError('Unknown arrival process `{}`'.format(arrival))
+      if not rate:
+        raise ValueError('Please specify the `rate` of the `{}` arrivals'.format(
+          arrival))
+      if burst:
+        raise ValueError('The `burst` parameter cannot be used with ' +
+          'open-loop arrivals')
+      if bucketSize:
+        raise ValueError('The `bucketSize` parameter cannot be used with ' +
+          'open-loop arrivals')
+    if bucketSize and not rate:
+      raise ValueError('Please specify the `rate` of the token bucket')
+
     # Compute value of max_workers to equal the number
-    # of parallel requests.
-    max_workers = 2
+    # of parallel requests. (Note: On open-loop arrivals the requests are
+    # not waiting for each other, so more workers are needed by default)
+    max_workers = 100 if arrival else 2
     if parallel:
       max_workers = int(float(parallel))
     elif burst:
@@ -182,8 +264,13 @@ class BulkRequestManager:
     # Prepare local variables
     self.activePool = RequestPool()
     self.egressQueue = Queue()
-    self.retryQueue = Queue()
+    self.pendingRetries = {}
+    self.pendingRetriesLock = Lock()
     self.session = FuturesSession(max_workers=max_workers)
+    mountTimingAdapter(
+        self.session,
+        pool_connections=max(max_workers, DEFAULT_POOLSIZE),
+        pool_maxsize=max(max_workers, DEFAULT_POOLSIZE))
     self.timerEvent = Event()
 
     # Keep the arguments
@@ -193,6 +280,10 @@ class BulkRequestManager:
     self.successFn = successFn
     self.retryCount = retry
     self.retryInterval = retryInterval
+    self.retryPolicy = None
+    if retryInterval is not None:
+      self.retryPolicy = RetryPolicy(retryInterval, retryBackoff,
+                                     retryMaxInterval, retryJitter)
     self.successCodes = successCodes
 
     # Handle errors
@@ -211,10 +302,28 @@ class BulkRequestManager:
       self.parallel = None
       self.burst = None
 
-    # Compute parallel
-    self.interval = None
-    if rate:
-      self.interval = 1.0 / float(rate)
+    # Configure the token bucket that paces the requests
+    self.bucketSize = int(float(bucketSize or 1))
+    self.limiter = None
+    self.clock = clock
+    self.sleep = sleep
+    self.sendMeter = RateMeter()
+
+    # On open-loop arrivals the `parallel` parameter is only sizing the
+    # workers, since the requests are not waiting for the responses
+    self.arrival = arrival or None
+    self.rate = rate
+    self.arrivals = None
+    if self.arrival:
+      self.parallel = None
+
+  @property
+  def achievedRate(self):
+    """
+    The rate (requests per second) the requests were actually sent at, or
+    `None` if fewer than two requests were sent
+    """
+    return self.sendMeter.rate
 
   def enqueue(self, request):
     """
@@ -231,16 +340,12 @@ class BulkRequestManager:
     self.running = True
     future = injectResultTimestampFn(Future())
 
-    # If we are not using retry timeouts there is no need to start the
-    # timer thread
-    if self.retryInterval is None:
-      timerThread = None
-    else:
-      timerThread = Thread(
-        name='bulkrequest.timer',
-        target=self._timerThread,
-        daemon=True)
-      timerThread.start()
+    # Start the open-loop schedule or the token bucket now
+    if self.arrival:
+      self.arrivals = arrivalSchedule(self.arrival, self.rate, time.time())
+    elif self.rate:
+      self.limiter = TokenBucket(self.rate, self.bucketSize, self.clock,
+                                 self.sleep)
 
     # Start the request thread, passing the future that will be resolved
     # when the requests are completed.
@@ -260,50 +365,45 @@ class BulkRequestManager:
     """
     self.running = False
 
-    # Insert poison pill and unblock all possible blocking points
-    self.retryQueue.put(None)
+    # Cancel the pending retries and unblock all possible blocking points
+    with self.pendingRetriesLock:
+      for call in self.pendingRetries.values():
+        call.cancel()
+      self.pendingRetries = {}
     self.timerEvent.set()
     self.activePool.interrupt()
 
-  def _timerThread(self):
+  def _scheduleRetry(self, request):
     """
-    A thread handler that manages the re-try requests
+    Schedule the given failed request to be re-tried when it's retry delay
+    has passed, counting from the time the request was placed
     """
-    self.logger.debug('Timer thread started')
-    while True:
-
-      # Get the next item to process
-      request = self.retryQueue.get()
-
-      # Check if we received a poison pill
-      if request is None:
-        self.logger.debug('Timer thread received poison pill')
-        return
-
-      # If we are interrupted, drain the queue
-      if not self.running:
-        self.logger.debug('Timer thread interrupted')
-
-        # Drain the queue and exit
-        while not self.retryQueue.empty():
-          self.retryQueue.get()
-        return
-
-      # Check the timeout has reached, and if yes, move this item on egress
-      if (time.time() - request.lastRequest) > self.retryInterval:
-        self.logger.debug('Retrying {} request to {}'.format(
-          request.verb.upper(), request.url))
-        self.egressQueue.put(request)
-        self.timerEvent.set()
-        continue
-
-      # If the item was not processed, put it back in queue
-      self.retryQueue.put(request)
-
-      # Keep polling every 100ms
-      time.sleep(0.1)
+    delay = self.retryPolicy.delay(request.requestCount)
+    self.logger.debug('Re-trying {} request to {} in {:.3f}s'.format(
+      request.verb.upper(), request.url,
+      max(0, request.lastRequest + delay - time.time())))
+
+    # (Note: The lock is held while scheduling, so the handle is registered
+    # before the scheduler thread can call `_retryDue`)
+    with self.pendingRetriesLock:
+      self.pendingRetries[request] = getDefaultScheduler().callAt(
+        request.lastRequest + delay, self._retryDue, request)
+
+  def _retryDue(self, request):
+    """
+    Called by the scheduler when the retry delay of a request has passed
+    """
+    if not self.running:
+      return
+    self.logger.debug('Retrying {} request to {}'.format(
+      request.verb.upper(), request.url))
 
-    self.logger.debug('Timer thread exited')
+    # (Note: The request is moved on egress before it's removed from the
+    # pending retries, so the request thread always finds it in one of them)
+    self.egressQueue.put(request)
+    with self.pendingRetriesLock:
+      self.pendingRetries.pop(request, None)
+    self.timerEvent.set()
 
   def _requestThread(self, completeFuture):
     """
@@ -313,8 +413,8 @@ class BulkRequestManager:
     failures = []
 
     self.logger.debug('Request thread started')
-    while not self.egressQueue.empty() or not self.retryQueue.empty() or self.activePool:
-      opStartTime = time.time()
+    while self.pendingRetries or not self.egressQueue.empty() or self.activePool:
+      check = []
 
       # Pop the first request from head
       if not self.egressQueue.empty():
@@ -322,6 +422,21 @@ class BulkRequestManager:
         self.logger.debug('Handling {} request to {}'.format(
           request.verb.upper(), request.url))
 
+        # On open-loop arrivals wait for the scheduled time of the request,
+        # or send it right away if we are already late. The retries are sent
+        # right away, without taking the slot of a new arrival, and keep the
+        # time the request was originally intended to start at.
+        if self.arrivals is not None:
+          if request.requestCount == 0:
+            request.intendedTs = next(self.arrivals)
+            waitTime = request.intendedTs - time.time()
+            if waitTime > 0:
+              time.sleep(waitTime)
+
+        # Otherwise wait for a token, if the rate is limited
+        elif self.limiter is not None:
+          self.limiter.acquire()
+
         # Call pre-request function
         if self.requestFn is not None:
           self.requestFn(request)
@@ -329,6 +444,7 @@ class BulkRequestManager:
         # Place the request and track it's response
         self.logger.debug('Sending request')
         self.activePool.append(request.send(self.session))
+        self.sendMeter.mark()
 
         # If we have reached a burst checkpoint, wait for all
         if self.burst is not None and len(self.activePool) >= self.burst:
@@ -380,6 +496,9 @@ class BulkRequestManager:
 
         else:
           response = completedRequest.future.result()
+          completedRequest.timings = getattr(response, 'timings', None)
+          if completedRequest.timings is not None:
+            completedRequest.timings.finish()
 
           # Check for errors
           if (response.status_code in self.failureCodes) or \
@@ -417,12 +536,12 @@ class BulkRequestManager:
               completedRequest.verb.upper(), completedRequest.url,
               self.retryCount - completedRequest.requestCount))
 
-            # If we should retry ASAP, don't use the retry queue, otherwise
-            # handle the retry timeout in the timer thread
-            if self.retryInterval is None:
+            # If we should retry ASAP, put it right back on egress, otherwise
+            # schedule it for when it's retry delay has passed
+            if self.retryPolicy is None:
               self.egressQueue.put(completedRequest)
             else:
-              self.retryQueue.put(completedRequest)
+              self._scheduleRetry(completedRequest)
 
           # Otherwise this is a permanent failure
           else:
@@ -435,33 +554,31 @@ class BulkRequestManager:
             failures.append(completedRequest)
 
 
-      # If the egress queue is not empty, apply throttling on the next request
-      if not self.egressQueue.empty():
-        if self.interval is not None:
-
-          # Exclude the time we wasted processing in this function
-          waitTime = self.interval - (time.time() - opStartTime)
-          if waitTime > 0:
-            self.logger.debug('Waiting for {} sec (throttling)'.format(waitTime))
-            time.sleep(waitTime)
-
-      # Otherwise if the egress queue is empty, and there are no pending
-      # requests we would normally enter an spin-loop, waiting for a
-      # retry request to be re-scheduled. To avoid this, we are waiting for
-      # a retry event to occur first.
-      elif not self.activePool and not self.retryQueue.empty():
+      # If the egress queue is empty, and there are no pending requests we
+      # would normally enter an spin-loop, waiting for a retry request to be
+      # re-scheduled. To avoid this, we are waiting for a retry event to
+      # occur first. (Note: The throttling is applied by the token bucket
+      # before sending the next request)
+      if self.egressQueue.empty() and not self.activePool and \
+         self.pendingRetries:
         self.logger.debug('No requests to send, nor active. ' +
           'Waiting for a retry event')
         self.timerEvent.wait()
         self.timerEvent.clear()
 
+    # If we were interrupted while waiting for a retry, fail future and exit
+    if not self.running:
+      self.logger.debug('Request thread interrupted')
+      completeFuture.set_exception(InterruptedError('Requests were interrupted'))
+      return
+
     self.logger.debug('Request thread completed')
+    if self.rate and self.achievedRate is not None:
+      self.logger.info('Placed {} requests at {:.2f} req/s (target {} req/s)'.format(
+        self.sendMeter.count, self.achievedRate, self.rate))
 
     # We reached this point when all the queues are empty, meaning that there
-    # is nothing else to do. So put a poison pill on the timer.
-    self.retryQueue.put(None)
-
-    # Complete the operation future
+    # is nothing else to do. So complete the operation future.
     completeFuture.set_result((responses, failures))
 
     self.logger.debug('Request thread exited')
@@ -0,0 +1,86 @@
+import time
+
+from threading import Lock
+
+
+class TokenBucket:
+  """
+  A token-bucket rate limiter that paces the callers at the given `rate`
+  (tokens per second), allowing bursts of up to `size` tokens.
+
+  The tokens are handed out as time slots on a monotonic timeline: Every slot
+  is one interval after the previous one, regardless of when the caller
+  actually woke up, so the time spent sending a request (or over-sleeping) is
+  compensated on the next call, instead of accumulating as a drift. When the
+  callers fall behind by more than `size` tokens, the missed tokens are
+  dropped.
+  """
+
+  def __init__(self, rate, size=1, clock=time.monotonic, sleep=time.sleep):
+    rate = float(rate)
+    size = int(size)
+    if rate <= 0:
+      raise ValueError('The rate of the token bucket must be positive')
+    if size < 1:
+      raise ValueError('The size of the token bucket must be at least 1')
+
+    self.rate = rate
+    self.size = size
+    self.interval = 1.0 / rate
+    self.clock = clock
+    self.sleep = sleep
+    self.nextTs = None
+    self.mutex = Lock()
+
+  def acquire(self):
+    """
+    Wait until a token is available and consume it, returning the (monotonic)
+    time of the slot that was given to the caller
+    """
+    with self.mutex:
+      now = self.clock()
+      if self.nextTs is None:
+        self.nextTs = now
+
+      # (Note: While idle, at most `size` tokens are accumulated)
+      slot = max(self.nextTs, now - (self.size - 1) * self.interval)
+      self.nextTs = slot + self.interval
+
+    # (Note: The slot is reserved before sleeping, so concurrent callers are
+    # given consecutive slots)
+    if slot > now:
+      self.sleep(slot - now)
+
+    return slot
+
+
+class RateMeter:
+  """
+  Measures the rate at which some operation is performed, using the
+  monotonic clock
+  """
+
+  def __init__(self, clock=time.monotonic):
+    self.clock = clock
+    self.count = 0
+    self.firstTs = None
+    self.lastTs = None
+
+  def mark(self):
+    """
+    Count an operation that was just performed
+    """
+    self.lastTs = self.clock()
+    if self.firstTs is None:
+      self.firstTs = self.lastTs
+    self.count += 1
+
+  @property
+  def rate(self):
+    """
+    The average rate of the operations (per second) between the first and
+    the last one, or `None` if not enough operations were performed
+    """
+    if self.count < 2 or self.lastTs == self.firstTs:
+      return None
+    return (self.count - 1) / (self.lastTs - self.firstTs)
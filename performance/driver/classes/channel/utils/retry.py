@@ -0,0 +1,56 @@
+import random
+
+
+class RetryPolicy:
+  """
+  Calculates how long to wait before re-trying a failed request.
+
+  The first retry is placed `interval` seconds after the failed request, and
+  every subsequent one waits `backoff` times longer than the previous, up to
+  `maxInterval` seconds. With the default `backoff` of 1 the interval is
+  constant.
+
+  The `jitter` (between 0 and 1) randomly shortens every delay by up to the
+  given fraction, so the requests that failed together are not re-tried in
+  lockstep. A `jitter` of 1 picks any delay between zero and the backoff
+  interval ("full jitter").
+  """
+
+  def __init__(self, interval, backoff=1, maxInterval=None, jitter=0,
+               random=random.random):
+    interval = float(interval)
+    backoff = float(backoff)
+    jitter = float(jitter)
+    if interval < 0:
+      raise ValueError('The retry interval cannot be negative')
+    if backoff < 1:
+      raise ValueError('The retry backoff factor must be at least 1')
+    if not 0 <= jitter <= 1:
+      raise ValueError('The retry jitter must be between 0 and 1')
+    if maxInterval is not None:
+      maxInterval = float(maxInterval)
+      if maxInterval < interval:
+        raise ValueError('The maximum retry interval cannot be shorter ' +
+                         'than the retry interval')
+
+    self.interval = interval
+    self.backoff = backoff
+    self.maxInterval = maxInterval
+    self.jitter = jitter
+    self.random = random
+
+  def delay(self, attempt):
+    """
+    Return the delay (in seconds) before re-trying a request that has failed
+    `attempt` times
+    """
+    try:
+      delay = self.interval * self.backoff**max(0, attempt - 1)
+    except OverflowError:
+      delay = float('inf')
+    if self.maxInterval is not None:
+      delay = min(delay, self.maxInterval)
+
+    if self.jitter:
+      delay *= 1 - self.jitter * self.random()
+    return delay
@@ -6,24 +6,32 @@ class MarathonEvent(Event):
   Base class for all marathon-related events
   """
 
+  __slots__ = ()
+
 
 class MarathonStartedEvent(MarathonEvent):
   """
   Marathon is up and accepting HTTP requests
   """
 
+  __slots__ = ()
+
 
 class MarathonUnavailableEvent(MarathonEvent):
   """
   Marathon is up and accepting HTTP requests
   """
 
+  __slots__ = ()
+
 
 class MarathonSSEEvent(MarathonEvent):
   """
   Raw SSE event
   """
 
+  __slots__ = ('eventName', 'eventData')
+
   def __init__(self, eventName, eventData, *args, **kwargs):
     super().__init__(*args, **kwargs)
     self.eventName = eventName
@@ -35,18 +43,24 @@ class MarathonSSEDisconnectedEvent(MarathonEvent):
   Raw SSE endpoint was disconnected
   """
 
+  __slots__ = ()
+
 
 class MarathonSSEConnectedEvent(MarathonEvent):
   """
   Raw SSE endpoint was connected
   """
 
+  __slots__ = ()
+
 
 class MarathonUpdateEvent(MarathonEvent):
   """
   Base class for update events
   """
 
+  __slots__ = ('deployment', 'instances')
+
   def __init__(self, deployment, instances, *args, **kwargs):
     super().__init__(*args, **kwargs)
     self.deployment = deployment
@@ -54,41 +68,57 @@ class MarathonUpdateEvent(MarathonEvent):
 
 
 class MarathonGroupChangeSuccessEvent(MarathonUpdateEvent):
+  __slots__ = ()
+
   def __init__(self, deployment, groupid, *args, **kwargs):
     super().__init__(deployment, [groupid], *args, **kwargs)
 
 
 class MarathonGroupChangeFailedEvent(MarathonUpdateEvent):
+  __slots__ = ('reason',)
+
   def __init__(self, deployment, groupid, reason, *args, **kwargs):
     super().__init__(deployment, [groupid], *args, **kwargs)
     self.reason = reason
 
 
 class MarathonDeploymentSuccessEvent(MarathonUpdateEvent):
+  __slots__ = ()
+
   def __init__(self, deployment, affectedInstances, *args, **kwargs):
     super().__init__(deployment, affectedInstances, *args, **kwargs)
 
 
 class MarathonDeploymentFailedEvent(MarathonUpdateEvent):
+  __slots__ = ()
+
   def __init__(self, deployment, affectedInstances, *args, **kwargs):
     super().__init__(deployment, affectedInstances, *args, **kwargs)
 
 
 class MarathonDeploymentStatusEvent(MarathonUpdateEvent):
+  __slots__ = ()
+
   def __init__(self, deployment, affectedInstances, *args, **kwargs):
     super().__init__(deployment, affectedInstances, *args, **kwargs)
 
 
 class MarathonDeploymentStepSuccessEvent(MarathonUpdateEvent):
+  __slots__ = ()
+
   def __init__(self, deployment, affectedInstances, *args, **kwargs):
     super().__init__(deployment, affectedInstances, *args, **kwargs)
 
 
 class MarathonDeploymentStepFailureEvent(MarathonUpdateEvent):
+  __slots__ = ()
+
   def __init__(self, deployment, affectedInstances, *args, **kwargs):
     super().__init__(deployment, affectedInstances, *args, **kwargs)
 
 class MarathonMetricUpdateEvent(Event):
+  __slots__ = ('name', 'value')
+
   def __init__(self, name, value, *args, **kwargs):
     super().__init__(*args, **kwargs)
     self.name = name
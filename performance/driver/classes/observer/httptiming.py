@@ -4,6 +4,7 @@ import requests
 from performance.driver.core.classes import Observer
 from performance.driver.core.events import Event, TeardownEvent, StartEvent, ParameterUpdateEvent
 from performance.driver.core.reflection import subscribesToHint, publishesHint
+from performance.driver.core.utils import mountTimingAdapter
 from threading import Thread
 
 
@@ -12,8 +13,10 @@ class HTTPTimingResultEvent(Event):
   The results of a timing event, initiated by a ``HTTPTimingObserver``
   """
 
+  __slots__ = ('url', 'verb', 'statusCode', 'requestTime', 'responseTime', 'totalTime', 'contentLength', 'timings')
+
   def __init__(self, url, verb, statusCode, requestTime, responseTime,
-               totalTime, contentLength, *args, **kwargs):
+               totalTime, contentLength, *args, timings=None, **kwargs):
     super().__init__(*args, **kwargs)
 
     #: The URL requested
@@ -38,6 +41,19 @@ class HTTPTimingResultEvent(Event):
     #: The length of the response body
     self.contentLength = contentLength
 
+    #: The durations of the phases of the request (`HTTPTimings`): ``dns``,
+    #: ``connect``, ``tls``, ``ttfb`` and ``transfer``
+    self.timings = timings
+
+  def toDict(self):
+    """
+    Return dict representation of the event, including the timings
+    """
+    inst = super().toDict()
+    if self.timings is not None:
+      inst['timings'] = self.timings.toDict()
+    return inst
+
 
 class HTTPTimingObserver(Observer):
   """
@@ -78,6 +94,12 @@ class HTTPTimingObserver(Observer):
   This observer is publishing a ``HTTPTimingResultEvent`` every time a sample
   is taken. Refer to the event documentation for more details.
 
+  In addition to the request and response times, the event carries the
+  ``timings`` of the individual phases of the request (name resolution, TCP
+  connection, TLS handshake, time to first byte and body transfer), measured
+  with a monotonic clock. Since a new connection is established for every
+  sample, they include the connection overhead.
+
   """
 
   @subscribesToHint(TeardownEvent, StartEvent, ParameterUpdateEvent)
@@ -159,14 +181,18 @@ class HTTPTimingObserver(Observer):
         # Send request (and catch errors)
         times[0] = time.time()
         self.logger.debug('Performing HTTP {} to {}'.format(verb, url))
-        res = requests.request(
-            verb,
-            url,
-            verify=False,
-            data=body,
-            headers=headers,
-            hooks=dict(response=ack_response))
+        # (Note: Like `requests.request`, a new session is used for every
+        # sample, so the connections are not re-used between the samples)
+        with mountTimingAdapter(requests.Session()) as session:
+          res = session.request(
+              verb,
+              url,
+              verify=False,
+              data=body,
+              headers=headers,
+              hooks=dict(response=ack_response))
         times[2] = time.time()
+        res.timings.finish()
 
         # Log error status codes
         self.logger.debug('Completed with HTTP {}'.format(res.status_code))
@@ -187,6 +213,7 @@ class HTTPTimingObserver(Observer):
                 times[2] - times[1],
                 times[2] - times[0],
                 len(res.text),
+                timings=res.timings,
                 traceid=self.traceids))
 
       except requests.exceptions.ConnectionError as e:
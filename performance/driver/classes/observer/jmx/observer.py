@@ -20,6 +20,8 @@ RUNTIME_JAR_NAME = "jmx-reader-1.0-SNAPSHOT.jar"
 
 
 class JMXMeasurement(Event):
+  __slots__ = ('fields',)
+
   def __init__(self, fields, *args, **kwargs):
     super().__init__(*args, **kwargs)
     self.fields = fields
@@ -110,7 +112,6 @@ class JMXObserver(Observer):
     self.exitPipe = os.pipe()
 
     # Register to the Start / Teardown events
-    self.eventbus.subscribe(self.handleEvent)
     self.eventbus.subscribe(
         self.handleDeactivateEvent, events=(TeardownEvent, ))
     self.eventbus.subscribe(
@@ -124,11 +125,12 @@ class JMXObserver(Observer):
     # Create filters
     startEvent = eventsConfig.get('activate', 'CmdlineStartedEvent')
     activateFilter = EventFilter(startEvent)
-    self.activateFilter = activateFilter.start(None, self.handleActivateEvent)
+    self.activateFilter = self.eventbus.filterIndex.start(
+        activateFilter, None, self.handleActivateEvent)
     deactivateFilter = EventFilter(
         eventsConfig.get('deactivate', 'CmdlineExitEvent'))
-    self.deactivateFilter = deactivateFilter.start(None,
-                                                   self.handleDeactivateEvent)
+    self.deactivateFilter = self.eventbus.filterIndex.start(
+        deactivateFilter, None, self.handleDeactivateEvent)
 
     self.logger.info('Waiting for `{}` before starting'.format(startEvent))
 
@@ -142,13 +144,6 @@ class JMXObserver(Observer):
       self.logger.info('Measured {}'.format(self.lastValue))
       self.eventbus.publish(JMXMeasurement(self.lastValue))
 
-  def handleEvent(self, event):
-    """
-    Forward events to the filters
-    """
-    self.activateFilter.handle(event)
-    self.deactivateFilter.handle(event)
-
   def handleCmdlineStartedEvent(self, event):
     """
     Special event that extracts the PID
@@ -9,6 +9,8 @@ from .filters import FilterTypes
 
 
 class LogStaxMessageEvent(Event):
+  __slots__ = ('tags', 'fields')
+
   def __init__(self, message, **kwargs):
     super().__init__(**kwargs)
 
@@ -93,12 +93,12 @@ class MarathonPollerObserver(Observer):
     self.retries = config.get('retries', 3)
 
     eventsConfig = config.get('events', {})
-    self.startEventSession = EventFilter(
-        eventsConfig.get('start', 'StartEvent')).start(None,
-                                                       self.handleStartEvent)
-    self.stopEventSession = EventFilter(
-        eventsConfig.get('stop', 'TeardownEvent')).start(
-            None, self.handleStopEvent)
+    self.startEventSession = self.eventbus.filterIndex.start(
+        EventFilter(eventsConfig.get('start', 'StartEvent')), None,
+        self.handleStartEvent)
+    self.stopEventSession = self.eventbus.filterIndex.start(
+        EventFilter(eventsConfig.get('stop', 'TeardownEvent')), None,
+        self.handleStopEvent)
 
     self.retriesLeft = self.retries
     self.requestTraceIDs = {}
@@ -112,19 +112,11 @@ class MarathonPollerObserver(Observer):
     # Keep track of outgoing deployment requests
     self.eventbus.subscribe(
         self.handleRequest, events=(MarathonDeploymentStartedEvent, ))
-    self.eventbus.subscribe(self.handleEvent)
 
     # Start thread
     self.thread = None
     self.active = False
 
-  def handleEvent(self, event):
-    """
-    Pass down event to start/stop sessions
-    """
-    self.startEventSession.handle(event)
-    self.stopEventSession.handle(event)
-
   def handleStartEvent(self, event):
     """
     Handle request to start polling
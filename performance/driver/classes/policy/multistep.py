@@ -18,6 +18,8 @@ from performance.driver.core.utils.strutil import parseTimeExpr
 
 
 class CompleteStepImmediatelyEvent(Event):
+  __slots__ = ()
+
   pass
 
 
@@ -390,7 +392,8 @@ class MultiStepPolicy(PolicyFSM):
       # 2) For the advance event to arrive or for a timeout to occur
       self.postValueCompleted = True
       self.advanceEventsRemaining = 0
-      self.timeRemains = None
+      self.timedOut = False
+      self.timeoutCall = None
 
       # If we have a post-value task, mark it's flag as incompleted
       if self.step.postValueTask:
@@ -405,7 +408,8 @@ class MultiStepPolicy(PolicyFSM):
 
       # If we have a timeout, start timer
       if not self.step.advanceTimeout is None:
-        self.timeRemains = self.step.advanceTimeout
+        self.timeoutCall = self.callLater(
+            self.step.advanceTimeout, self.handleAdvanceTimeout, self.traceid)
 
       # If we did not have an advance event, advance immediately
       if self.step.advanceEvent is None:
@@ -431,13 +435,16 @@ class MultiStepPolicy(PolicyFSM):
       """
 
       # Bail if all flags are not set
-      if (self.timeRemains is None) or (self.timeRemains > 0):
+      if not self.timedOut:
         if not self.postValueCompleted:
           return
         if self.advanceEventsRemaining > 0:
           return
 
       # If everything is done, advance to next value
+      if self.timeoutCall:
+        self.timeoutCall.cancel()
+        self.timeoutCall = None
       self.goto(MultiStepPolicy.NextStepValue)
 
     def onCompleteStepImmediatelyEvent(self, event):
@@ -447,20 +454,19 @@ class MultiStepPolicy(PolicyFSM):
       """
       self.checkCompletion()
 
-    def onTickEvent(self, event):
+    def handleAdvanceTimeout(self, traceid):
       """
-      Every tick, check if the timeout has expired
+      Called when the advance timeout has expired
       """
-      if self.timeRemains is None:
+      # Ignore timeouts of the previous values
+      if self.state != 'SendStepParameters' or traceid != self.traceid:
         return
 
-      if self.timeRemains > 0:
-        self.timeRemains -= event.delta
-        if self.timeRemains <= 0:
-          self.timeRemains = None
-          self.logger.warn('Step timed out after {} seconds'.format(self.step.advanceTimeout))
-          self.setStatus(self.step.advanceTimeoutStatus)
-          self.handleCompletion()
+      self.timedOut = True
+      self.timeoutCall = None
+      self.logger.warn('Step timed out after {} seconds'.format(self.step.advanceTimeout))
+      self.setStatus(self.step.advanceTimeoutStatus)
+      self.handleCompletion()
 
     def onRunTaskCompletedEvent(self, event):
       """
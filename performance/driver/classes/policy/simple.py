@@ -125,6 +125,10 @@ class SimplePolicy(PolicyFSM):
       # Start by submitting the initial values of all parameters
       self.setParameters(self.parametersConfig)
 
+      # If we have a timeout defined, schedule it
+      if not self.timeout is None:
+        self.callAt(self.timeout, self.handleTimeout, self.timeout)
+
     def onEvent(self, event):
       """
       If we have a `endEvent` defined, wait until the event is received
@@ -133,17 +137,16 @@ class SimplePolicy(PolicyFSM):
       if self.endSession:
         self.endSession.handle(event)
 
-    def onTickEvent(self, event):
+    def handleTimeout(self, timeout):
       """
-      If we have a timeout defined, check if we have reached it
+      Called when the timeout has expired
       """
-      if self.timeout is None:
+      # Ignore timeouts of the previous runs
+      if self.state != 'Run' or timeout != self.timeout:
         return
 
-      # Check for timeout
-      if time.time() > self.timeout:
-        self.logger.warn('Policy timed out after {}'.format(self.timeoutExpr))
-        self.goto(SimplePolicy.End)
+      self.logger.warn('Policy timed out after {}'.format(self.timeoutExpr))
+      self.goto(SimplePolicy.End)
 
     def handleEndEvent(self, event):
       """
@@ -101,7 +101,7 @@ class TimeEvolutionPolicy(PolicyFSM):
 
   class Run(State):
     """
-    Deploy a service on every tick
+    Evolve the parameters as their intervals pass
     """
 
     def onEnter(self):
@@ -110,7 +110,6 @@ class TimeEvolutionPolicy(PolicyFSM):
       """
       self.logger.info('Starting the evolution of {} parameter(s)'.format(
           len(self.evolveConfig)))
-      self.tickDelta = 0
 
       # Initialize counters
       self.records = []
@@ -121,33 +120,34 @@ class TimeEvolutionPolicy(PolicyFSM):
       for record in self.records:
         self.setParameter(record.parameter, record.value)
 
-    def onTickEvent(self, event):
+      # Schedule the evolution of every parameter
+      ts = time.time()
+      for record in self.records:
+        record.nextTs = ts + record.interval
+        self.callAt(record.nextTs, self.handleEvolution, record)
+
+    def handleEvolution(self, record):
       """
-      Wait for some time to pass
+      Evolve the parameter of the given record when it's interval has passed
       """
 
-      # If all records are inactive, quit
-      isActive = False
-      for record in self.records:
-        if record._active:
-          isActive = True
-          break
+      # Ignore calls scheduled by a previous run
+      if self.state != 'Run' or not record in self.records:
+        return
+
+      # Update the parameter and schedule the next evolution
+      value = record.evolve()
+      if not value is None:
+        self.setParameter(record.parameter, value)
+        record.nextTs += record.interval
+        self.callAt(record.nextTs, self.handleEvolution, record)
+        return
 
-      if not isActive:
+      # If all records are inactive, quit
+      if not any(map(lambda record: record._active, self.records)):
         self.logger.info('All evolutions completed')
         self.goto(TimeEvolutionPolicy.End)
 
-      # Process records
-      for record in self.records:
-        value = record.handleTick(event.delta)
-
-        # Update parameters if changed
-        if not value is None:
-          self.setParameter(record.parameter, value)
-
-      # (If the tests are completed, wait for the next clock tick
-      # to stop the tests)
-
     def onEvent(self, event):
       """
       If we have a `endEvent` defined, wait until the event is received
@@ -179,21 +179,16 @@ class TimeEvolutionRecord:
     self.max = config.get('max', None)
 
     self._active = True
-    self._intervalRemaining = self.interval
+    self.nextTs = 0
 
-  def handleTick(self, delta):
+  def evolve(self):
     """
-    Handle parameter evolution on clock ticks and return the new value or
-    None if nothing changed
+    Handle parameter evolution when the interval has passed and return the new
+    value or None if the evolution is completed
     """
     if not self._active:
       return None
 
-    # Apply interval
-    self._intervalRemaining -= delta
-    if self._intervalRemaining > 0:
-      return None
-
     # Check if we are completed first
     self._active = (self.value < self.max)
     if not self._active:
@@ -205,8 +200,5 @@ class TimeEvolutionRecord:
     # (We are going to detect overflows when the next interval has passed
     #  in order to allow the test to run while having the last value)
 
-    # Reset interval
-    self._intervalRemaining = self.interval
-
     # Return the new value
     return self.value
@@ -2,9 +2,127 @@ import os
 import json
 import datetime
 
+from array import array
+from threading import Lock
 from performance.driver.core.classes import Reporter
-from performance.driver.core.eventfilters import EventFilter
+from performance.driver.core.eventfilters import EventFilter, EventFilterIndex, filterEvents
 from performance.driver.core.events import StartEvent, ParameterUpdateEvent
+from performance.driver.core.traces import TraceIndex
+from .rawevents import JSONNormalizerEncoder
+
+
+def encodeJSON(value, indent=None, level=0):
+  """
+  Serialize the given value with the encoder that is used for the events,
+  indenting it's lines at the given `level` if `indent` is given
+  """
+  text = json.dumps(
+      value, cls=JSONNormalizerEncoder, sort_keys=True, indent=indent)
+  if indent:
+    text = text.replace('\n', '\n' + ' ' * (indent * level))
+  return text
+
+
+def writeTraces(f, traces, indent=2, level=1):
+  """
+  Write the given `(parameters, events)` traces as a JSON array in the file,
+  where the `events` are the already serialized JSON lines of the events of
+  every trace. The events are written one at a time, without collecting them
+  in memory.
+  """
+  pad = ' ' * (indent * level)
+  step = ' ' * indent
+  separator = '\n'
+  f.write('[')
+  for (parameters, events) in traces:
+    f.write('{}{}{}{{\n{}{}{}"events": ['.format(separator, pad, step, pad,
+                                                step, step))
+    eventSeparator = '\n'
+    for line in events:
+      f.write('{}{}{}{}{}{}'.format(eventSeparator, pad, step, step, step,
+                                    line))
+      eventSeparator = ',\n'
+    if eventSeparator != '\n':
+      f.write('\n{}{}{}'.format(pad, step, step))
+    f.write('],\n{}{}{}"parameters": {}\n{}{}}}'.format(
+        pad, step, step, encodeJSON(parameters, indent, level + 2), pad,
+        step))
+    separator = ',\n'
+  if separator != '\n':
+    f.write('\n' + pad)
+  f.write(']')
+
+
+class EventSpillFile:
+  """
+  A file where the traced events are spilled as JSON lines, instead of being
+  kept in memory until the results are dumped.
+
+  Only the offsets of the lines of every trace are kept in memory (8 bytes
+  per event), so the events of a trace can be read back one at a time.
+  """
+
+  def __init__(self, filename):
+    self.filename = filename
+    self.file = open(filename, 'wb')
+    self.reader = None
+    self.offset = 0
+    self.offsets = {}
+    self.mutex = Lock()
+
+  def write(self, trace, event):
+    """
+    Serialize the given event of the given trace in the file
+    """
+    line = (encodeJSON(event.toDict()) + '\n').encode('utf-8')
+    with self.mutex:
+      if self.file is None:
+        return
+      self.file.write(line)
+      self.offsets.setdefault(trace, array('q')).append(self.offset)
+      self.offset += len(line)
+
+  def close(self):
+    """
+    Stop spilling events and close the file
+    """
+    with self.mutex:
+      if not self.file is None:
+        self.file.close()
+        self.file = None
+      if not self.reader is None:
+        self.reader.close()
+        self.reader = None
+
+  def events(self, trace):
+    """
+    Return the JSON lines of the events of the given trace, as they are read
+    back from the file (Note: This is only possible after the file is closed)
+    """
+    if self.reader is None:
+      self.reader = open(self.filename, 'rb')
+    for offset in self.offsets.get(trace, ()):
+      self.reader.seek(offset)
+      yield self.reader.readline().decode('utf-8').rstrip('\n')
+
+
+class SpilledTraceEvents:
+  """
+  The events of a trace, spilled in an `EventSpillFile`
+  """
+
+  def __init__(self, spillFile, trace, root):
+    self.spillFile = spillFile
+    self.trace = trace
+    self.root = root
+    self.spillFile.write(trace, root)
+
+  def add(self, event):
+    """
+    Spill the given event, unless it's the root of the trace
+    """
+    if not event is self.root:
+      self.spillFile.write(self.trace, event)
 
 
 class RawReporter(Reporter):
@@ -32,6 +150,10 @@ class RawReporter(Reporter):
           # [Optional] Group the events to their traces
           traces: yes
 
+  If the values of the metrics are spilled to disk (see the ``storage``
+  global configuration), the traced events are spilled in the same place,
+  and are only read back one at a time while the results are dumped.
+
   The JSON structure of the data included is the following:
 
   .. code-block:: js
@@ -61,6 +183,39 @@ class RawReporter(Reporter):
         ...
       },
 
+      // The performance statistics of the internal event bus
+      "eventbus": {
+        "duration": 123.4,
+        "events": {
+          "EventName": {
+            "count": 1234,
+            "latency": { "mean": 0.1, "p50": 0.1, "p90": 0.2, "p99": 1.2, "max": 4.5 }
+          },
+          ...
+        },
+        "subscribers": {
+          "SubscriberName": {
+            "EventName": {
+              "count": 1234,
+              "totalTime": 12.3,
+              "time": { "mean": 0.01, "p50": 0.01, ... },
+              "latency": { "mean": 0.1, "p50": 0.1, ... }
+            },
+            ...
+          },
+          ...
+        },
+        "queue": {
+          "samples": [ [1499696193.822527, 12], ... ],
+          "max": 12,
+          "mean": 1.2,
+          "dropped": {
+            "EventName": { "drop-oldest": 12 },
+            ...
+          }
+        }
+      },
+
       // Raw dump of the timeseries for every phase
       "raw": [
         {
@@ -137,7 +292,9 @@ class RawReporter(Reporter):
     # Event-tracing configuration
     self.includeFilter = None
     self.excludeFilter = None
-    self.eventTraces = {}
+    self.filterIndex = EventFilterIndex()
+    self.eventTraces = TraceIndex()
+    self.eventSpill = None
 
   def handleStartEvent(self, event):
     """
@@ -156,13 +313,26 @@ class RawReporter(Reporter):
       # Config include/exclude filter
       includeExpr = eventsConfig.get('include', '*')
       self.logger.info("Events collected: {}".format(includeExpr))
-      self.includeFilter = EventFilter(includeExpr).start(None, self.handleInclude)
+      includeFilter = EventFilter(includeExpr)
+      self.includeFilter = self.filterIndex.start(includeFilter, None,
+                                                  self.handleInclude)
       if 'exclude' in eventsConfig:
         # TODO: When we have negation on the EventFilter fix this
         raise ValueError('Exclude filter is currently not supported')
 
-      # Start subscription to all events
-      self.eventbus.subscribe(self.handleEvent, order=10)
+      # If the values are spilled in a column store, spill the events there
+      # too, instead of keeping them in memory
+      store = self.generalConfig.instanceStorage()
+      if not store is None:
+        self.eventSpill = EventSpillFile(store.filename('raw-events.jsonl'))
+
+      # Start the traces on every parameter update and route the included
+      # events through our own filter index, so they are always placed in the
+      # trace that was started before them
+      self.eventbus.subscribe(
+          self.handleEvent,
+          order=10,
+          events=filterEvents((includeFilter, ), (ParameterUpdateEvent, )))
 
   def handleInclude(self, event):
     """
@@ -172,11 +342,9 @@ class RawReporter(Reporter):
     # TODO: When we have negation on the EventFilter handle negative matches
 
     # Locate the tracing bin where to place this event
-    for i in event.traceids:
-      if i in self.eventTraces:
-        if not event in self.eventTraces[i]:
-          self.eventTraces[i].add(event)
-        return
+    traceEvents = self.eventTraces.find(event.traceids)
+    if not traceEvents is None:
+      traceEvents.add(event)
 
   def handleEvent(self, event):
     """
@@ -185,11 +353,14 @@ class RawReporter(Reporter):
 
     # A ParameterUpdate event starts a new trace
     if type(event) is ParameterUpdateEvent:
-      trace = min(filter(lambda x: type(x) is int, event.traceids))
-      self.eventTraces[trace] = set([event])
+      trace = min(event.traceids)
+      if self.eventSpill is None:
+        self.eventTraces[trace] = set([event])
+      else:
+        self.eventTraces[trace] = SpilledTraceEvents(self.eventSpill, trace,
+                                                     event)
 
-    # Every other event passes through the include filter
-    self.includeFilter.handle(event)
+    self.filterIndex.handleEvent(event)
 
   def dump(self, summarizer):
     """
@@ -216,28 +387,44 @@ class RawReporter(Reporter):
       'meta': self.getMeta()
     }
 
-    # Collect results
-    if self.eventTraces:
-      traces = []
-      for traceEvents in self.eventTraces.values():
-        root = next(filter(
-          lambda x: type(x) is ParameterUpdateEvent, traceEvents))
-        events = []
-
-        # Serialize events
-        for event in traceEvents:
-          events.append(event.toDict())
+    # Include the statistics of the event bus
+    if self.eventbus.stats:
+      results['eventbus'] = self.eventbus.stats.report()
 
-        # Compose trace record
-        traces.append({
-            'parameters': root.parameters,
-            'events': events
-          })
-
-      # Put traces on the result
-      results['events'] = traces
+    # Collect the traces, that are written in the results one event at a
+    # time (Note: The events are serialized in the same way, regardless if
+    # they were spilled or not)
+    traces = None
+    if self.eventTraces:
+      if not self.eventSpill is None:
+        self.eventSpill.close()
+        traces = list(
+            map(lambda traceEvents: (traceEvents.root.parameters,
+                                     self.eventSpill.events(traceEvents.trace)),
+                self.eventTraces.values()))
+      else:
+        traces = list(
+            map(lambda traceEvents: (
+                next(filter(lambda x: type(x) is ParameterUpdateEvent,
+                            traceEvents)).parameters,
+                map(lambda event: encodeJSON(event.toDict()), traceEvents)),
+                self.eventTraces.values()))
+
+      # (Note: The traces are written in the place of this placeholder)
+      results['events'] = None
 
     # Dump the results
     self.logger.info("Saving raw results on {}".format(filename))
+    text = encodeJSON(results, 2)
     with open(filename, 'w') as f:
-      f.write(json.dumps(results, sort_keys=True, indent=2))
+      if traces is None:
+        f.write(text)
+      else:
+        (head, tail) = text.split('\n  "events": null', 1)
+        f.write(head)
+        f.write('\n  "events": ')
+        writeTraces(f, traces)
+        f.write(tail)
+
+    if not self.eventSpill is None:
+      self.eventSpill.close()
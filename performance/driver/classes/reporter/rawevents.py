@@ -16,12 +16,13 @@ class JSONNormalizerEncoder(json.JSONEncoder):
   def default(self, obj):
 
     # CaseInsensitiveDict needs to become a dict
-    if type(obj) is set:
-      obj = list(obj)
+    if type(obj) in (set, frozenset):
+      return list(obj)
     elif type(obj) is CaseInsensitiveDict:
-      obj = dict(obj.items())
+      return dict(obj.items())
 
-    return json.JSONEncoder.encode(self, obj)
+    # Anything else is serialized with it's representation
+    return repr(obj)
 
 
 class RawEventsReporter(Reporter):
@@ -110,7 +111,7 @@ class RawEventsReporter(Reporter):
         file.write("{:f};{};{}\n".format(
             event.ts,
             type(event).__name__,
-            json.dumps(event.__dict__, cls=JSONNormalizerEncoder)))
+            json.dumps(event.toDict(), cls=JSONNormalizerEncoder)))
 
     self.logger.debug("Reporting thread exited")
 
@@ -10,7 +10,7 @@ except ImportError:
 
 from performance.driver.core.classes import Summarizer
 from performance.driver.core.summarizer import util
-from performance.driver.core.summarizer import SummarizerAxisTimeseries, SummarizerAxisParameters
+from performance.driver.core.summarizer import SummarizerAxisTimeseries, SummarizerAxisParameters, TimeseriesBatch
 
 class PercentileSummarizer(Summarizer):
   """
@@ -36,7 +36,8 @@ class PercentileSummarizer(Summarizer):
               outliers: no
 
   This summarizer calculates the percentile for the values collected for the
-  given metric.
+  given metric. If the metric does not keep it's raw values, the percentile is
+  estimated within 1% of the actual value.
   """
 
   def calculate(self,
@@ -51,14 +52,34 @@ class PercentileSummarizer(Summarizer):
       self.logger.info('Removing outliers')
       timeseries = util.reject_outliers(timeseries)
 
+    # If the raw values are not kept, estimate the percentile from the
+    # histogram of the values
+    q = self.getConfig('percentile')
+    if not timeseries.keepRaw:
+      return timeseries.histogram.percentile(q)
+
     # If the list is empty, a percentile has no meaning
-    if not timeseries.values:
+    if len(timeseries) == 0:
       return 0
 
-    # Compute the percentile
-    q = self.getConfig('percentile')
-    v = np.array(timeseries.values)
-
     # Compute the percentile of the data values
-    # (Note: `timeseries.values` is a list of (timestamp, value) tuples)
-    return np.percentile(np.array(v[:,1]), q)
+    return np.percentile(timeseries.data, q)
+
+  def supportsBatch(self):
+    """
+    The percentiles can be calculated for many axes at once
+    """
+    return True
+
+  def calculateBatch(self,
+                     batch: TimeseriesBatch,
+                     parameters: list):
+    """
+    Calculate the percentile of every axis in the batch
+    """
+
+    # Remove outliers
+    if not self.getConfig('outliers', True):
+      batch = batch.rejectOutliers()
+
+    return list(batch.percentile(self.getConfig('percentile')))
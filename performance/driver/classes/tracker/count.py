@@ -3,7 +3,7 @@ import time
 
 from performance.driver.core.classes import Tracker
 from performance.driver.core.events import ParameterUpdateEvent, RestartEvent, TeardownEvent, isEventMatching
-from performance.driver.core.eventfilters import EventFilter
+from performance.driver.core.eventfilters import EventFilter, EventFilterIndex, filterEvents
 from queue import Queue, Empty
 from threading import Lock
 
@@ -16,7 +16,8 @@ class CountTrackerSession:
   def __init__(self, tracker, event, stepExpression):
     self.queue = Queue()
     self.logger = logging.getLogger('CountTrackerSession')
-    self.eventFilter = tracker.eventFilter.start(event.traceids, self.handleEvent)
+    self.eventFilter = tracker.filterIndex.start(
+        tracker.eventFilter, event.traceids, self.handleEvent)
     self.tracker = tracker
     self.traceids = set(event.traceids)
     self.stepExpression = stepExpression
@@ -33,9 +34,6 @@ class CountTrackerSession:
     with self.mutex:
       self.counter += eval(self.stepExpression, env)
 
-  def handle(self, event):
-    self.eventFilter.handle(event)
-
   def finalize(self):
     self.eventFilter.finalize()
 
@@ -76,7 +74,6 @@ class CountTracker(Tracker):
   def __init__(self, *args, **kwargs):
     super().__init__(*args, **kwargs)
     self.traces = []
-    self.traceIndex = {}
     self.activeTrace = None
 
     config = self.getRenderedConfig()
@@ -84,12 +81,20 @@ class CountTracker(Tracker):
     self.metric = config['metric']
     self.stepExpression = config.get('step', '1')
 
-    self.eventbus.subscribe(self.handleEvent)
+    # The counted events are routed to the sessions by our own filter index,
+    # so they are handled in the same order as the events that start the
+    # sessions, regardless of the dispatch mode of the bus
+    self.filterIndex = EventFilterIndex()
+    self.eventbus.subscribe(
+        self.handleEvent,
+        events=filterEvents((self.eventFilter, ),
+                            (ParameterUpdateEvent, RestartEvent,
+                             TeardownEvent)))
 
   def handleEvent(self, event):
     """
-    Handle an event from the event bus and process tracked events by calculating
-    the time of the first event and the time of the lsat event
+    Handle the events from the event bus that start and terminate the tracking
+    sessions, and route them to the active sessions
     """
 
     # A terminal events terminates an active trace
@@ -99,7 +104,6 @@ class CountTracker(Tracker):
         trace.finalize()
 
       self.traces = []
-      self.traceIndex = {}
       self.activeTrace = None
       return
 
@@ -110,16 +114,4 @@ class CountTracker(Tracker):
       self.activeTrace = CountTrackerSession(self, event, self.stepExpression)
       self.traces.append(self.activeTrace)
 
-      for trace in event.traceids:
-        self.traceIndex[trace] = self.activeTrace
-
-    # Update relevant traces
-    handled = []
-    for id in event.traceids:
-      if not id in self.traceIndex:
-        continue
-      trace = self.traceIndex[id]
-      if trace in handled:
-        continue
-      trace.handle(event)
-      handled.append(trace)
+    self.filterIndex.handleEvent(event)
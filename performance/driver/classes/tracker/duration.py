@@ -4,7 +4,7 @@ import queue
 
 from performance.driver.core.classes import Tracker
 from performance.driver.core.events import ParameterUpdateEvent, RestartEvent, TeardownEvent, isEventMatching
-from performance.driver.core.eventfilters import EventFilter
+from performance.driver.core.eventfilters import EventFilter, EventFilterIndex, filterEvents
 
 class DurationTrackerSession:
   """
@@ -13,8 +13,11 @@ class DurationTrackerSession:
 
   def __init__(self, tracker, traceids):
     self.logger = logging.getLogger('DurationTrackerSession')
-    self.startFilter = tracker.startFilter.start(traceids, self.handleStart)
-    self.endFilter = tracker.endFilter.start(traceids, self.handleEnd)
+    filterIndex = tracker.filterIndex
+    self.startFilter = filterIndex.start(tracker.startFilter, traceids,
+                                         self.handleStart)
+    self.endFilter = filterIndex.start(tracker.endFilter, traceids,
+                                       self.handleEnd)
     self.tracker = tracker
     self.traceids = set(traceids)
     self.startLookup = {}
@@ -67,13 +70,29 @@ class DurationTrackerSession:
         continue
 
       # Track metric
-      self.tracker.trackMetric(self.tracker.metric, endEvent.ts - startEvent.ts,
-                               self.traceids)
+      self.trackDuration(startEvent, endEvent)
 
     # Put back all retry events in the queue
     for event in retryEvents:
       self.endQueue.put(event)
 
+  def trackDuration(self, startEvent, endEvent):
+    """
+    Track the duration between the given events. If the tracker is measuring
+    the corrected duration, it starts from the time the start event was
+    intended to happen on an open-loop schedule, if known.
+    """
+    startTs = startEvent.ts
+    if self.tracker.corrected:
+      intendedTs = getattr(startEvent, 'intendedTs', None)
+      if intendedTs is None:
+        intendedTs = getattr(endEvent, 'intendedTs', None)
+      if not intendedTs is None:
+        startTs = intendedTs
+
+    self.tracker.trackMetric(self.tracker.metric, endEvent.ts - startTs,
+                             self.traceids)
+
   def finalizeLingeringEvents(self):
     """
     This method is called when there were left-over events in the `endQueue`
@@ -110,8 +129,7 @@ class DurationTrackerSession:
       endEvent = endEvents.pop(0)
 
       # Track metric
-      self.tracker.trackMetric(self.tracker.metric, endEvent.ts - startEvent.ts,
-                               self.traceids)
+      self.trackDuration(startEvent, endEvent)
 
     # If there are still left-over traces, warn
     if startEvents:
@@ -121,10 +139,6 @@ class DurationTrackerSession:
       self.logger.warn('Incomplete duration traces for {} ({} without start)'.format(
           self.tracker.metric, len(endEvents)))
 
-  def handle(self, event):
-    self.startFilter.handle(event)
-    self.endFilter.handle(event)
-
   def finalize(self):
     self.startFilter.finalize()
     self.endFilter.finalize()
@@ -158,6 +172,10 @@ class DurationTracker(Tracker):
           # (This can be a filter expression)
           end: EndEventFilter
 
+        # [Optional] Measure the corrected duration, from the time the start
+        # event was scheduled to happen on an open-loop schedule
+        corrected: yes
+
   This tracker always operates within a tracking session, initiated by a
   ``ParameterUpdateEvent`` and terminated by the next ``ParameterUpdateEvent``,
   or the completion of the test.
@@ -167,25 +185,42 @@ class DurationTracker(Tracker):
     The ``start`` and ``end`` events must contain the trace IDs of the
     originating ``ParameterUpdateEvent``. Otherwise they won't be measured.
 
+  When the requests are placed in an open loop (ex. using the ``arrival``
+  parameter of the ``HTTPChannel``), the start and end events carry the
+  ``intendedTs`` time the request was scheduled at. If ``corrected`` is
+  enabled, the duration is measured from that time instead, including the time
+  the request was delayed because the driver or the server were overloaded.
+  This avoids the *coordinated omission* that hides these delays from the
+  higher percentiles.
+
   """
 
   def __init__(self, *args, **kwargs):
     super().__init__(*args, **kwargs)
     self.traces = []
-    self.traceIndex = {}
     self.activeTrace = None
 
     config = self.getRenderedConfig()
     self.startFilter = EventFilter(config['events']['start'])
     self.endFilter = EventFilter(config['events']['end'])
     self.metric = config['metric']
-
-    self.eventbus.subscribe(self.handleEvent, order=100)
+    self.corrected = config.get('corrected', False)
+
+    # The tracked events are routed to the sessions by our own filter index,
+    # so they are handled in the same order as the events that start the
+    # sessions, regardless of the dispatch mode of the bus
+    self.filterIndex = EventFilterIndex()
+    self.eventbus.subscribe(
+        self.handleEvent,
+        order=100,
+        events=filterEvents((self.startFilter, self.endFilter),
+                            (ParameterUpdateEvent, RestartEvent,
+                             TeardownEvent)))
 
   def handleEvent(self, event):
     """
-    Handle an event from the event bus and process tracked events by calculating
-    the time of the first event and the time of the lsat event
+    Handle the events from the event bus that start and terminate the tracking
+    sessions, and route them to the active sessions
     """
 
     # A terminal event terminates an active trace
@@ -195,7 +230,6 @@ class DurationTracker(Tracker):
         trace.finalize()
 
       self.traces = []
-      self.traceIndex = {}
       self.activeTrace = None
       return
 
@@ -206,16 +240,4 @@ class DurationTracker(Tracker):
       self.activeTrace = DurationTrackerSession(self, event.traceids)
       self.traces.append(self.activeTrace)
 
-      for trace in event.traceids:
-        self.traceIndex[trace] = self.activeTrace
-
-    # Update relevant traces
-    handled = []
-    for id in event.traceids:
-      if not id in self.traceIndex:
-        continue
-      trace = self.traceIndex[id]
-      if trace in handled:
-        continue
-      trace.handle(event)
-      handled.append(trace)
+    self.filterIndex.handleEvent(event)
@@ -86,14 +86,11 @@ class EventAttributeTracker(Tracker):
     self.traceIdFrom = EventFilter(
         config.get('traceIdFrom', 'ParameterUpdateEvent'))
 
-    # Start blank sessions
-    self.eventFilterSession = self.eventFilter.start(None,
-                                                     self.handleMatchedEvent)
-    self.traceIdFromSession = self.traceIdFrom.start(None,
-                                                     self.handleTraceidEvent)
-
-    # Handle all events
-    self.eventbus.subscribe(self.handleEvent)
+    # Start blank sessions, receiving the events from the filter index
+    self.eventFilterSession = self.eventbus.filterIndex.start(
+        self.eventFilter, None, self.handleMatchedEvent)
+    self.traceIdFromSession = self.eventbus.filterIndex.start(
+        self.traceIdFrom, None, self.handleTraceidEvent)
 
   def handleMatchedEvent(self, event):
     """
@@ -121,14 +118,5 @@ class EventAttributeTracker(Tracker):
       self.eventFilterSession.finalize()
 
     # Start a filter session
-    self.eventFilterSession = self.eventFilter.start(None,
-                                                     self.handleMatchedEvent)
-
-  def handleEvent(self, event):
-    """
-    Forward event to all filters
-    """
-    if self.eventFilterSession:
-      self.eventFilterSession.handle(event)
-
-    self.traceIdFromSession.handle(event)
+    self.eventFilterSession = self.eventbus.filterIndex.start(
+        self.eventFilter, None, self.handleMatchedEvent)
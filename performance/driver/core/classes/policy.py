@@ -77,8 +77,13 @@ class PolicyFSM(fsm.FSM, Configurable, EventBusSubscriber):
       if event is None:
         break
 
+      # Scheduled calls are (callback, args) tuples
+      if type(event) is tuple:
+        self.handleScheduledCall(*event)
+
       # Handle the event synchronously in the FSM
-      self.handleEvent(event)
+      else:
+        self.handleEvent(event)
 
       # Flush any parameter update(s) that occurred during the op handling
       self.parameterBatch.flush()
@@ -91,6 +96,32 @@ class PolicyFSM(fsm.FSM, Configurable, EventBusSubscriber):
     """
     self.eventQueue.put(event)
 
+  def handleScheduledCall(self, callback, args):
+    """
+    Perform a call scheduled with `callAt` or `callLater`
+    """
+    try:
+      callback(*args)
+    except Exception as e:
+      self.logger.error('Exception while handling a scheduled call')
+      self.logger.exception(e)
+
+  def callAt(self, ts, callback, *args):
+    """
+    Call the given function at the given `time.time()` timestamp, from the
+    same thread that handles the events of the policy. Returns a handle that
+    can be used to cancel the call.
+    """
+    return self.eventbus.callAt(ts, self.eventQueue.put, (callback, args))
+
+  def callLater(self, delay, callback, *args):
+    """
+    Call the given function after `delay` seconds, from the same thread that
+    handles the events of the policy. Returns a handle that can be used to
+    cancel the call.
+    """
+    return self.eventbus.callLater(delay, self.eventQueue.put, (callback, args))
+
   def setStatus(self, value):
     """
     Set status is a shorthand for setting the status flag
@@ -1,6 +1,6 @@
 import logging
 
-from performance.driver.core.summarizer import SummarizerAxisTimeseries, SummarizerAxisParameters
+from performance.driver.core.summarizer import SummarizerAxisTimeseries, SummarizerAxisParameters, TimeseriesBatch
 from performance.driver.core.summarizer import builtin, util
 from performance.driver.core.config import Configurable
 
@@ -27,6 +27,20 @@ class Summarizer(Configurable):
     """
     raise NotImplementedError('Summarizer sum() function was not implemented')
 
+  def supportsBatch(self):
+    """
+    Return True if the summarizer implements `calculateBatch`
+    """
+    return False
+
+  def calculateBatch(self, batch: TimeseriesBatch, parameters: list):
+    """
+    Calculate the summarized values of many axes at once, given the batch of
+    their timeseries and the list of their parameters
+    """
+    raise NotImplementedError(
+        'Summarizer calculateBatch() function was not implemented')
+
 
 class BuiltInSummarizer(Summarizer):
   """
@@ -65,6 +79,11 @@ class BuiltInSummarizer(Summarizer):
   * ``variance`` : Calculate the variance of the timeseries
   * ``sdeviation`` : Calculate the standard deviation of the timeseries
 
+  If the metric does not keep it's raw values (``raw: no``), the summarizers
+  are calculated from the running statistics of the values, and the
+  ``median`` and ``mode`` are estimated within 1% of their actual value.
+  Outliers cannot be removed in this case.
+
   """
 
   def __init__(self, config):
@@ -80,6 +99,7 @@ class BuiltInSummarizer(Summarizer):
 
     # Get a reference to the built-in summarizer
     self.ref = getattr(builtin, funcName)
+    self.batchRef = builtin.BATCH_SUMMARIZERS.get(funcName)
 
   def calculate(self,
                 timeseries: SummarizerAxisTimeseries,
@@ -94,3 +114,21 @@ class BuiltInSummarizer(Summarizer):
 
     # Apply the summarizer function
     return self.ref(timeseries, parameters)
+
+  def supportsBatch(self):
+    """
+    Check if the built-in summarizer has a batch implementation
+    """
+    return not self.batchRef is None
+
+  def calculateBatch(self, batch: TimeseriesBatch, parameters: list):
+    """
+    Call the batch implementation of the built-in summarizer
+    """
+
+    # Remove outliers
+    if not self.getConfig('outliers', True):
+      batch = batch.rejectOutliers()
+
+    # Apply the summarizer function
+    return list(self.batchRef(batch))
@@ -67,6 +67,14 @@ def parse_cmdline(args=None):
       help='Change the internal clock frequency in milliseconds between frames'
       + '(default 33.3)')
 
+  parser.add_argument(
+      '--eventbus',
+      default=None,
+      dest='eventbus',
+      choices=['thread', 'asyncio'],
+      help='Change the event bus implementation to use ' +
+      '(default from the configuration, or "thread")')
+
   # The remaining part is the configuration and it's arguments
   parser.add_argument(
       'config', nargs='*', help='The configuration script to use.')
@@ -120,7 +120,7 @@ def dcos_perf_test_driver(args=None):
       logger.info("Setting internal clock to {} fps".format(fps))
 
     # Start a test session
-    session = Session(config, cmdline.workers, fps)
+    session = Session(config, cmdline.workers, fps, cmdline.eventbus)
 
     # Before we start the tests we need to make sure that all the event
     # subscribers are listening for valid events. Otherwise we are going to
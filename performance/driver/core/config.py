@@ -4,9 +4,9 @@ import yaml
 import os
 
 from .eventbus import EventBus
-from .template import TemplateDict
+from .template import TemplateDict, compileTemplate
 
-from performance.driver.core.utils import parseTimeExpr
+from performance.driver.core.utils import parseTimeExpr, ColumnStore
 
 # TODO: Make @ expand to `performance.driver.core.classes`
 # TODO: Make MetricConfig use ComponentConfig
@@ -158,6 +158,21 @@ class Configurable:
         )
       )
 
+  def getCompiledConfig(self, key, macros={}, varying=()):
+    """
+    Compile the template of the given config key with the given macros, so it
+    can be rendered repeatedly with different values of the `varying` macros
+    """
+    meta = self.getMeta()
+    return compileTemplate(
+      self.config.get(key),
+      self.config.definitions.fork(
+        macros,
+        dict([('meta:' + kv[0], kv[1]) for kv in meta.items()])
+      ),
+      varying
+    )
+
   def getConfigMacros(self):
     return TemplateDict(self.config).macros()
 
@@ -200,6 +215,9 @@ class MetricConfig:
     self.summarizers = []
     self.summarizersInstanes = None
 
+    # Keep the raw values of the metric, unless instructed otherwise
+    self.raw = metricConfig.get('raw', True)
+
     # Extract summarizer configuration
     for summ in metricConfig.get('summarize', []):
       if type(summ) is str:
@@ -287,6 +305,19 @@ class GeneralConfig:
     if 'report' in generalConfig:
       self.reportConfig = generalConfig['report']
 
+    # Process event bus configuration
+    self.eventbus = generalConfig.get('eventbus', {})
+
+    # Process live summaries configuration
+    self.summaries = generalConfig.get('summaries', {})
+
+    # Process storage configuration
+    self.storage = generalConfig.get('storage', {})
+    self.storageInstance = None
+    if not self.storage.get('backend', 'memory') in ('memory', 'mmap'):
+      raise ValueError('Unknown storage backend `{}`'.format(
+          self.storage.get('backend')))
+
     # Populate field defaults
     self.repeat = generalConfig.get('repeat', 1)
     self.title = generalConfig.get('title', 'Scale Tests')
@@ -294,6 +325,19 @@ class GeneralConfig:
     # Populate timeouts
     self.staleTimeout = parseTimeExpr(generalConfig.get('staleTimeout', 600))
 
+  def instanceStorage(self):
+    """
+    Return the column store where the values are spilled, or None if the
+    values should be kept in memory
+    """
+    if self.storage.get('backend', 'memory') != 'mmap':
+      return None
+
+    # Create the store once and share it with every component
+    if self.storageInstance is None:
+      self.storageInstance = ColumnStore(self.storage.get('path', None))
+    return self.storageInstance
+
 
 class RootConfig:
   """
@@ -305,6 +349,7 @@ class RootConfig:
     self.config = config
     self.definitions = DefinitionsDict(config.get('define', {}))
     self.meta = config.get('meta', {})
+    self.generalConfig = None
 
   def compileDefinitions(self, cmdlineDefinitions={}):
     """
@@ -367,4 +412,8 @@ class RootConfig:
     """
     Return the general config section
     """
-    return GeneralConfig(self.config.get('config', {}), self)
+    # (Note: The general config is shared, so all the components are using the
+    # same metric summarizer instances)
+    if self.generalConfig is None:
+      self.generalConfig = GeneralConfig(self.config.get('config', {}), self)
+    return self.generalConfig
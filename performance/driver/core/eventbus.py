@@ -1,10 +1,16 @@
+import asyncio
 import logging
 import time
 
-from threading import Thread, Lock
-from queue import Queue
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from threading import Thread, Lock, Condition, local
+from queue import Queue, Full
 
-from .events import Event, TickEvent, isEventMatching
+from .events import Event, TickEvent, EventBusStatsEvent
+from .eventbusstats import EventBusStats
+from .eventfilters import EventFilterIndex
+from .scheduler import Scheduler
 from .reflection import publishesHint
 
 
@@ -13,6 +19,8 @@ class ExitEvent(Event):
   A local event that instructs the main event loop to exit
   """
 
+  __slots__ = ()
+
 
 class EventBusSubscriber:
   """
@@ -23,17 +31,227 @@ class EventBusSubscriber:
     self.eventbus = eventbus
 
 
+class EventQueue(Queue):
+  """
+  A queue of events that keeps track of the time every event was put in it.
+
+  If `maxsize` is greater than zero, the queue is bounded and the `policy`
+  defines what happens when an event is published to a full queue:
+
+  * ``block`` : The publisher waits until there is room in the queue
+  * ``drop-oldest`` : The oldest queued event of the same type is discarded
+  * ``drop-newest`` : The event being published is discarded
+  * ``coalesce`` : The event is merged into the most recently queued event of
+    the same type (see `Event.coalesce`). If this is not possible, the event
+    being published is discarded.
+
+  Different policies can be defined for different event types, using the
+  event class or it's name as the key in the `policies` dictionary. The
+  policies are inherited by the sub-classes of the events.
+
+  Every discarded or coalesced event is reported to the `onDrop` callback.
+  """
+
+  POLICIES = ('block', 'drop-oldest', 'drop-newest', 'coalesce')
+
+  def __init__(self, maxsize=0, policy='block', policies=None, onDrop=None):
+    super().__init__(maxsize)
+    self.policy = policy
+    self.policies = dict(policies or {})
+    self.policyTable = {}
+    self.onDrop = onDrop
+
+    for name in [policy] + list(self.policies.values()):
+      if not name in EventQueue.POLICIES:
+        raise ValueError('Unknown event queue policy `{}`'.format(name))
+
+  def policyFor(self, eventType):
+    """
+    Return the policy to apply on events of the given type when the queue is
+    full, looking for the closest parent class with a policy defined
+    """
+    policy = self.policyTable.get(eventType)
+    if policy is None:
+      policy = self.policy
+      for cls in eventType.__mro__:
+        if cls in self.policies:
+          policy = self.policies[cls]
+          break
+        if cls.__name__ in self.policies:
+          policy = self.policies[cls.__name__]
+          break
+      self.policyTable[eventType] = policy
+
+    return policy
+
+  def put(self, item, block=True, timeout=None, overflow=False):
+    """
+    Put an event in the queue, applying the policy of it's type if the queue
+    is full. If `overflow` is True, events with the ``block`` policy are put
+    in the queue beyond it's limit, instead of blocking the publisher.
+    """
+    with self.not_full:
+      if self.maxsize > 0 and self._qsize() >= self.maxsize and \
+        not type(item) is ExitEvent:
+
+        eventType = type(item)
+        policy = self.policyFor(eventType)
+        if policy == 'drop-newest':
+          self._drop(eventType, policy)
+          return
+
+        elif policy == 'coalesce':
+          if not self._coalesce(item):
+            policy = 'drop-newest'
+          self._drop(eventType, policy)
+          return
+
+        elif policy == 'drop-oldest':
+          # If there is no older event of the same type, the event being
+          # published is the oldest one
+          if not self._dropOldest(eventType):
+            self._drop(eventType, policy)
+            return
+          self._drop(eventType, policy)
+          self._put(item)
+          self.not_empty.notify()
+          return
+
+        elif not overflow:
+          if not block:
+            raise Full
+          elif timeout is None:
+            while self._qsize() >= self.maxsize:
+              self.not_full.wait()
+          else:
+            endtime = time.monotonic() + timeout
+            while self._qsize() >= self.maxsize:
+              remaining = endtime - time.monotonic()
+              if remaining <= 0.0:
+                raise Full
+              self.not_full.wait(remaining)
+
+      self._put(item)
+      self.unfinished_tasks += 1
+      self.not_empty.notify()
+
+  def get(self, block=True, timeout=None):
+    """
+    Remove and return an event from the queue
+    """
+    return super().get(block, timeout)[1]
+
+  def getStamped(self, block=True, timeout=None):
+    """
+    Remove and return a (timestamp, event) tuple from the queue, where the
+    timestamp is the `time.perf_counter()` value when the event was published
+    """
+    return super().get(block, timeout)
+
+  def _put(self, item):
+    super()._put((time.perf_counter(), item))
+
+  def _coalesce(self, item):
+    """
+    Merge the event in the most recently queued event of the same type
+    """
+    eventType = type(item)
+    for i in range(len(self.queue) - 1, -1, -1):
+      queued = self.queue[i][1]
+      if type(queued) is eventType:
+        return queued.coalesce(item)
+    return False
+
+  def _dropOldest(self, eventType):
+    """
+    Remove the oldest queued event of the given type
+    """
+    for i, (ts, queued) in enumerate(self.queue):
+      if type(queued) is eventType:
+        del self.queue[i]
+        return True
+    return False
+
+  def _drop(self, eventType, policy):
+    """
+    Report an event that was discarded or coalesced
+    """
+    if not self.onDrop is None:
+      self.onDrop(eventType, policy)
+
+
+class EventBusMailbox:
+  """
+  An ordered queue of the events pending delivery to a single subscriber.
+
+  A mailbox is drained by at most one worker thread at a time, therefore the
+  subscriber receives the events in the order they were published.
+  """
+
+  def __init__(self, subscriber):
+    self.subscriber = subscriber
+    self.events = deque()
+    self.scheduled = False
+
+
 class EventBus:
   """
   The event bus handles delivery of in-system messages
+
+  The bus supports two dispatch modes:
+
+  * ``pool`` : Every event is picked by one of the worker threads and is
+    delivered to all of it's subscribers, in their `order`. Consecutive events
+    can reach the same subscriber concurrently and out of order.
+
+  * ``mailbox`` : Every subscriber has it's own FIFO mailbox that is drained
+    by the worker threads. Each subscriber receives the events in order and one
+    at a time, while different subscribers run in parallel. The `order` of the
+    subscribers only defines the order the events are routed to the mailboxes.
+
+  If a `queueSize` is given, the bus keeps at most that many events pending
+  dispatch and applies the `queuePolicy` (or the per-type `queuePolicies`)
+  when the queue is full. Refer to `EventQueue` for the available policies.
+  Since the worker threads are the ones draining the queue, events published
+  from within a subscriber are never blocked.
   """
 
-  def __init__(self, clockFrequency=30, threadCount=8):
+  def __init__(self, clockFrequency=30, threadCount=8, dispatch='pool',
+               mailboxBatch=32, stats=False, statsInterval=None, queueSize=0,
+               queuePolicy='block', queuePolicies=None):
     self.logger = logging.getLogger('EventBus')
     self.subscribers = []
-    self.queue = Queue()
+    self.subscribersLock = Lock()
+    self.dispatchTable = {}
+    self.queue = EventQueue(
+        queueSize, queuePolicy, queuePolicies, onDrop=self._recordDrop)
+    self.droppedTypes = set()
     self.threadCount = threadCount
     self.threads = []
+    self.threadState = local()
+
+    if not dispatch in ('pool', 'mailbox'):
+      raise ValueError('Unknown event bus dispatch mode `{}`'.format(dispatch))
+    self.dispatch = dispatch
+
+    # Mailbox dispatch mode state
+    self.mailboxes = {}
+    self.mailboxBatch = mailboxBatch
+    self.mailboxLock = Lock()
+    self.readyQueue = Queue()
+    self.pendingDeliveries = 0
+    self.pendingDeliveriesCondition = Condition(self.mailboxLock)
+
+    # Self-instrumentation
+    self.stats = EventBusStats() if stats else None
+    self.statsInterval = statsInterval
+    self.lastStatsTs = 0
+
+    # The scheduler of the timed calls
+    self.scheduler = Scheduler(name='eventbus-scheduler')
+
+    # The index that routes the events to the event filter sessions
+    self.filterIndex = EventFilterIndex(self)
 
     self.activeBlockedSyncs = []
     self.activeBlockedSyncLock = Lock()
@@ -51,16 +269,82 @@ class EventBus:
     """
     Subscribe a callback to the bus
     """
-    self.subscribers.append((order, callback, events, args, kwargs))
-    self.subscribers = sorted(self.subscribers, key=lambda x: x[0])
+    with self.subscribersLock:
+      # (Note: Python's sort is stable, so subscribers with the same order
+      # keep the order they were subscribed in)
+      self.subscribers = sorted(
+          self.subscribers + [(order, callback, events, args, kwargs)],
+          key=lambda x: x[0])
+      self.dispatchTable = {}
 
   def unsubscribe(self, callback):
     """
     Remove a callback from the bus
     """
-    for subscriber in self.subscribers:
-      if subscriber[1] == callback:
-        self.subscribers.remove(subscriber)
+    with self.subscribersLock:
+      removed = list(
+          filter(lambda subscriber: subscriber[1] == callback,
+                 self.subscribers))
+      self.subscribers = list(
+          filter(lambda subscriber: subscriber[1] != callback,
+                 self.subscribers))
+      self.dispatchTable = {}
+
+    # Forget the mailboxes of the removed subscribers. Any events already
+    # routed to them are still going to be delivered.
+    with self.mailboxLock:
+      for subscriber in removed:
+        mailbox = self.mailboxes.get(id(subscriber))
+        if mailbox is not None and mailbox.subscriber is subscriber:
+          del self.mailboxes[id(subscriber)]
+
+  def resolveSubscribers(self, eventType):
+    """
+    Return the subscribers that are interested in events of the given type,
+    in the order they should be called.
+
+    The result is computed once per event type and kept in the dispatch table
+    until the next call to `subscribe` or `unsubscribe`.
+    """
+    # (Note: The table is read before the subscribers, since `subscribe` is
+    # replacing them in the opposite order. In the worst case we are going to
+    # populate a table that was just discarded.)
+    table = self.dispatchTable
+    subscribers = table.get(eventType)
+    if subscribers is None:
+      names = set(map(lambda cls: cls.__name__, eventType.__mro__))
+
+      def isMatching(eventCheck):
+        if type(eventCheck) is str:
+          return eventCheck in names
+        return issubclass(eventType, eventCheck)
+
+      subscribers = tuple(
+          filter(lambda subscriber: subscriber[2] is None or \
+                 any(map(isMatching, subscriber[2])), self.subscribers))
+      table[eventType] = subscribers
+
+    return subscribers
+
+  def callAt(self, ts, callback, *args, **kwargs):
+    """
+    Call the given function at the given `time.time()` timestamp and return
+    a handle that can be used to cancel it
+    """
+    return self.scheduler.callAt(ts, callback, *args, **kwargs)
+
+  def callLater(self, delay, callback, *args, **kwargs):
+    """
+    Call the given function after `delay` seconds and return a handle that
+    can be used to cancel it
+    """
+    return self.scheduler.callLater(delay, callback, *args, **kwargs)
+
+  def cancel(self, call):
+    """
+    Cancel a call scheduled with `callAt` or `callLater`
+    """
+    self.scheduler.cancel(call)
 
   def publish(self, event: Event):
     """
@@ -68,7 +352,11 @@ class EventBus:
     """
     if not type(event) is TickEvent:
       self.logger.debug('Publishing \'{}\''.format(str(event)))
-    self.queue.put(event)
+
+    # Publishing from a worker thread must not block, since the worker
+    # threads are the ones draining the queue
+    self.queue.put(
+        event, overflow=getattr(self.threadState, 'worker', False))
 
   def start(self):
     """
@@ -79,17 +367,25 @@ class EventBus:
     # Start thread pool
     self.logger.debug(
         'Starting thread pool of {} threads'.format(self.threadCount))
+    if self.dispatch == 'mailbox':
+      target = self._mailboxthread
+      t = Thread(target=self._routerthread, name='eventbus-router')
+      t.start()
+      self.threads.append(t)
+    else:
+      target = self._loopthread
     for i in range(0, self.threadCount):
-      t = Thread(target=self._loopthread, name='eventbus-{}'.format(i + 1))
+      t = Thread(target=target, name='eventbus-{}'.format(i + 1))
       t.start()
       self.threads.append(t)
 
-    # Start clock thread
+    # Start clock and scheduler threads
     self.active = True
     self.lastTickMs = time.time()
     if self.clockInterval:
       self.clockThread = Thread(target=self._clockthread, name="eventbus-clock")
       self.clockThread.start()
+    self.scheduler.start()
 
   def stop(self):
     """
@@ -102,12 +398,18 @@ class EventBus:
     if self.clockThread:
       self.clockThread.join()
 
+    self.logger.debug('Cancelling the scheduled calls')
+    self.scheduler.stop()
+
     self.logger.debug('Waiting for queue to drain')
-    self.queue.join()
+    self.flush()
 
     self.logger.debug('Posting the ExitEvent')
-    for i in range(0, self.threadCount):
+    if self.dispatch == 'mailbox':
       self.queue.put(ExitEvent())
+    else:
+      for i in range(0, self.threadCount):
+        self.queue.put(ExitEvent())
 
     self.logger.debug('Waiting for thread pool to exit')
     for thread in self.threads:
@@ -118,8 +420,20 @@ class EventBus:
     """
     Wait until the queue is drained
     """
-    if not self.queue.empty():
+    if self.dispatch == 'pool':
+      if not self.queue.empty():
+        self.queue.join()
+      return
+
+    # In mailbox mode the events are delivered after they are routed, and
+    # the subscribers might publish more events in the mean time
+    while True:
       self.queue.join()
+      with self.pendingDeliveriesCondition:
+        while self.pendingDeliveries:
+          self.pendingDeliveriesCondition.wait()
+      if self.queue.empty():
+        break
 
   @publishesHint(TickEvent)
   def _clockthread(self):
@@ -133,39 +447,388 @@ class EventBus:
       self.clockTicks += 1
       self.publish(TickEvent(self.clockTicks, ts - self.lastTickMs))
       self.lastTickMs = ts
+      self._publishStats(ts)
 
       # Sleep interval time
       time.sleep(self.clockInterval)
 
+  @publishesHint(EventBusStatsEvent)
+  def _publishStats(self, ts):
+    """
+    Publish the statistics of the bus, if the statistics interval has passed
+    """
+    if self.stats is None or not self.statsInterval:
+      return
+    if ts - self.lastStatsTs >= self.statsInterval:
+      self.lastStatsTs = ts
+      self.publish(EventBusStatsEvent(self.stats.report()))
+
   def _loopthread(self):
     """
     Main event bus thread that dispatches all events from a single thread
     """
     self.logger.debug('Event bus thread started')
+    self.threadState.worker = True
     while True:
-      event = self.queue.get()
+      publishTs, event = self.queue.getStamped()
       if type(event) is ExitEvent:
         self.queue.task_done()
         break
 
-      for order, sub, events, args, kwargs in self.subscribers:
-        try:
-          start_ts = time.time()
-          if events is None or any(
-              map(lambda cls: isEventMatching(event, cls), events)):
-            sub(event, *args, **kwargs)
+      self._recordEvent(event, publishTs)
+      for subscriber in self.resolveSubscribers(type(event)):
+        self._deliver(event, subscriber, publishTs)
 
-          delta = time.time() - start_ts
-          if delta > 0.1:
-            self.logger.warning('Slow consumer ({:.2f}s) {} for event {}'.
-                                format(delta, sub, type(event).__name__))
+      # Mark task as done
+      self.queue.task_done()
 
-        except Exception as e:
-          self.logger.error(
-              'Exception while dispatching event {}'.format(event.event))
-          self.logger.exception(e)
+    self.logger.debug('Event bus thread exited')
+
+  def _routerthread(self):
+    """
+    Mailbox dispatch mode thread that routes the events from the queue to
+    the mailboxes of the subscribers
+    """
+    self.logger.debug('Event bus router thread started')
+    while True:
+      publishTs, event = self.queue.getStamped()
+      if type(event) is ExitEvent:
+        for i in range(0, self.threadCount):
+          self.readyQueue.put(None)
+        self.queue.task_done()
+        break
+
+      self._recordEvent(event, publishTs)
+      subscribers = self.resolveSubscribers(type(event))
+      with self.mailboxLock:
+        self.pendingDeliveries += len(subscribers)
+        for subscriber in subscribers:
+          mailbox = self.mailboxes.get(id(subscriber))
+          if mailbox is None or mailbox.subscriber is not subscriber:
+            mailbox = EventBusMailbox(subscriber)
+            self.mailboxes[id(subscriber)] = mailbox
+
+          # Schedule the mailbox if it's not already waiting for a worker
+          mailbox.events.append((publishTs, event))
+          if not mailbox.scheduled:
+            mailbox.scheduled = True
+            self.readyQueue.put(mailbox)
 
       # Mark task as done
       self.queue.task_done()
 
+    self.logger.debug('Event bus router thread exited')
+
+  def _mailboxthread(self):
+    """
+    Mailbox dispatch mode thread that drains the mailboxes that are ready
+    """
+    self.logger.debug('Event bus thread started')
+    self.threadState.worker = True
+    while True:
+      mailbox = self.readyQueue.get()
+      if mailbox is None:
+        break
+
+      # Deliver up to `mailboxBatch` events before giving the other mailboxes
+      # a chance to be drained
+      for i in range(0, self.mailboxBatch):
+        with self.mailboxLock:
+          if not mailbox.events:
+            mailbox.scheduled = False
+            break
+          publishTs, event = mailbox.events.popleft()
+
+        self._deliver(event, mailbox.subscriber, publishTs)
+
+        with self.pendingDeliveriesCondition:
+          self.pendingDeliveries -= 1
+          if not self.pendingDeliveries:
+            self.pendingDeliveriesCondition.notify_all()
+
+      # If there are still events in the mailbox, re-schedule it
+      else:
+        with self.mailboxLock:
+          if mailbox.events:
+            self.readyQueue.put(mailbox)
+          else:
+            mailbox.scheduled = False
+
     self.logger.debug('Event bus thread exited')
+
+  def _recordEvent(self, event, publishTs):
+    """
+    Collect the statistics of an event that is about to be dispatched
+    """
+    if self.stats is None:
+      return
+    self.stats.recordEvent(type(event), time.perf_counter() - publishTs)
+    self.stats.sampleQueueDepth(self.queue.qsize)
+
+  def _recordDrop(self, eventType, policy):
+    """
+    Collect the statistics of an event that was discarded or coalesced
+    because the queue was full
+    """
+    if not eventType in self.droppedTypes:
+      self.droppedTypes.add(eventType)
+      self.logger.warning('Event queue is full, applying the `{}` policy on {}'.
+                          format(policy, eventType.__name__))
+    if not self.stats is None:
+      self.stats.recordDrop(eventType, policy)
+
+  def _deliver(self, event, subscriber, publishTs=None):
+    """
+    Deliver the event to the given subscriber and return the value returned
+    by the subscriber
+    """
+    order, sub, events, args, kwargs = subscriber
+    try:
+      start_ts = time.perf_counter()
+      result = sub(event, *args, **kwargs)
+
+      end_ts = time.perf_counter()
+      delta = end_ts - start_ts
+      if not self.stats is None and not publishTs is None:
+        self.stats.recordDispatch(
+            type(event), sub, start_ts - publishTs, delta)
+      if delta > 0.1:
+        self.logger.warning('Slow consumer ({:.2f}s) {} for event {}'.
+                            format(delta, sub, type(event).__name__))
+
+      return result
+
+    except Exception as e:
+      self.logger.error(
+          'Exception while dispatching event {}'.format(event.event))
+      self.logger.exception(e)
+
+
+class AsyncEventBus(EventBus):
+  """
+  An event bus implementation that dispatches all the events from a single
+  asyncio event loop, running in a dedicated thread.
+
+  Subscribers that are coroutine functions are scheduled as tasks on the loop,
+  allowing them to await on I/O without blocking the other events. Regular
+  subscribers are called from a pool of `threadCount` worker threads, where
+  every event is delivered to all of it's regular subscribers, in their
+  `order`, by one of the workers (like the ``pool`` dispatch mode of the
+  thread backend). This way a slow subscriber does not block the loop, but
+  consecutive events can reach the same subscriber concurrently and out of
+  order.
+
+  The `publish` method is thread-safe, so the existing thread-based components
+  (channels, observers etc.) can keep publishing events to this bus.
+
+  The ``mailbox`` dispatch mode and the bounded event queue are not supported
+  by this bus.
+  """
+
+  def __init__(self, clockFrequency=30, threadCount=8, dispatch='pool',
+               stats=False, statsInterval=None, queueSize=0):
+    if dispatch != 'pool':
+      raise ValueError(
+          'The `{}` dispatch mode is not supported by the asyncio event bus'.
+          format(dispatch))
+    if queueSize:
+      raise ValueError(
+          'The event queue of the asyncio event bus cannot be bounded')
+
+    super().__init__(
+        clockFrequency=clockFrequency,
+        threadCount=threadCount,
+        stats=stats,
+        statsInterval=statsInterval)
+    self.loop = asyncio.new_event_loop()
+    self.loopThread = None
+    self.clockTask = None
+    self.executor = None
+
+    # Pending events and tasks, used by `flush`
+    self.pending = 0
+    self.pendingCondition = Condition()
+    self.closed = False
+
+  def publish(self, event: Event):
+    """
+    Publish an event to all subscribers
+    """
+    if not type(event) is TickEvent:
+      self.logger.debug('Publishing \'{}\''.format(str(event)))
+    with self.pendingCondition:
+      # The events published after the bus is stopped have nobody to
+      # dispatch them (ex. from the threads of a late teardown task)
+      if self.closed:
+        self.logger.debug(
+            'Dropping \'{}\' published after the bus was stopped'.format(
+                str(event)))
+        return
+      self.pending += 1
+      self.loop.call_soon_threadsafe(self._dispatch, event,
+                                     time.perf_counter())
+
+  def runCoroutine(self, coro):
+    """
+    Schedule the given coroutine on the event loop of the bus and return a
+    `concurrent.futures.Future` that can be used from any other thread
+    """
+    return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+  def start(self):
+    """
+    Start the event loop thread
+    """
+    self.logger.debug('Starting asyncio event bus')
+    self.active = True
+    self.lastTickMs = time.time()
+
+    self.loopThread = Thread(target=self._loopthread, name='eventbus-loop')
+    self.loopThread.start()
+    self.threads.append(self.loopThread)
+    self.executor = ThreadPoolExecutor(
+        self.threadCount, thread_name_prefix='eventbus')
+
+    # Start the clock on the event loop
+    if self.clockInterval:
+      self.clockTask = self.runCoroutine(self._clock())
+    self.scheduler.start()
+
+  def stop(self):
+    """
+    Gracefully stop the event loop thread
+    """
+    self.logger.debug('Stopping asyncio event bus')
+
+    self.logger.debug('Cancelling next tick event')
+    self.active = False
+    if self.clockTask:
+      self.clockTask.result()
+      self.clockTask = None
+
+    self.logger.debug('Cancelling the scheduled calls')
+    self.scheduler.stop()
+
+    self.logger.debug('Waiting for pending events to complete')
+    self.flush()
+    with self.pendingCondition:
+      self.closed = True
+
+    self.logger.debug('Stopping the event loop')
+    self.loop.call_soon_threadsafe(self.loop.stop)
+    self.loopThread.join()
+    self.loop.close()
+    self.executor.shutdown()
+    self.threads = []
+
+  def flush(self):
+    """
+    Wait until all the published events and the tasks they started complete
+    """
+    with self.pendingCondition:
+      while self.pending:
+        self.pendingCondition.wait()
+
+  def _recordEvent(self, event, publishTs):
+    """
+    Collect the statistics of an event that is about to be dispatched
+    """
+    if self.stats is None:
+      return
+    self.stats.recordEvent(type(event), time.perf_counter() - publishTs)
+    self.stats.sampleQueueDepth(lambda: self.pending)
+
+  def _complete(self, *args):
+    """
+    Mark a pending event or task as completed
+    """
+    with self.pendingCondition:
+      self.pending -= 1
+      if not self.pending:
+        self.pendingCondition.notify_all()
+
+  @publishesHint(TickEvent)
+  async def _clock(self):
+    """
+    Coroutine that dispatches a clock tick in the configured interval
+    """
+    while self.active:
+
+      # Calculate actual time drift & publish event
+      ts = time.time()
+      self.clockTicks += 1
+      self.publish(TickEvent(self.clockTicks, ts - self.lastTickMs))
+      self.lastTickMs = ts
+      self._publishStats(ts)
+
+      # Sleep interval time
+      await asyncio.sleep(self.clockInterval)
+
+  def _loopthread(self):
+    """
+    The thread that runs the event loop
+    """
+    self.logger.debug('Event loop thread started')
+    asyncio.set_event_loop(self.loop)
+    self.loop.run_forever()
+    self.logger.debug('Event loop thread exited')
+
+  def _dispatch(self, event, publishTs):
+    """
+    Dispatch the event to all of it's subscribers, from within the event loop
+    """
+    self._recordEvent(event, publishTs)
+    subscribers = []
+    for subscriber in self.resolveSubscribers(type(event)):
+
+      # Coroutine subscribers are running as tasks on the loop
+      if asyncio.iscoroutinefunction(subscriber[1]):
+        with self.pendingCondition:
+          self.pending += 1
+        self._startTask(
+            self._deliver(event, subscriber, publishTs), event, subscriber)
+      else:
+        subscribers.append(subscriber)
+
+    # The regular subscribers are called from the worker threads
+    if subscribers:
+      with self.pendingCondition:
+        self.pending += 1
+      future = self.loop.run_in_executor(
+          self.executor, self._deliverAll, event, subscribers, publishTs)
+      future.add_done_callback(self._complete)
+
+    self._complete()
+
+  def _deliverAll(self, event, subscribers, publishTs):
+    """
+    Deliver the event to the given regular subscribers, from a worker thread
+    """
+    for subscriber in subscribers:
+      result = self._deliver(event, subscriber, publishTs)
+
+      # Subscribers can still return a coroutine to run on the loop
+      if asyncio.iscoroutine(result):
+        with self.pendingCondition:
+          self.pending += 1
+        self.loop.call_soon_threadsafe(self._startTask, result, event,
+                                       subscriber)
+
+  def _startTask(self, coro, event, subscriber):
+    """
+    Run the coroutine of a subscriber as a task on the loop, completing a
+    pending task when it's done
+    """
+    task = self.loop.create_task(self._await(coro, event, subscriber))
+    task.add_done_callback(self._complete)
+
+  async def _await(self, coro, event, subscriber):
+    """
+    Await the coroutine of a subscriber and handle it's exceptions
+    """
+    try:
+      await coro
+    except Exception as e:
+      self.logger.error(
+          'Exception while dispatching event {}'.format(event.event))
+      self.logger.exception(e)
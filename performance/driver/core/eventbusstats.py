@@ -0,0 +1,246 @@
+import time
+
+from threading import Lock, local
+
+from performance.driver.core.utils import LogHistogram
+
+
+def subscriberName(callback):
+  """
+  Return a human-readable name for the given subscriber callback
+  """
+  owner = getattr(callback, '__self__', None)
+  name = getattr(callback, '__qualname__', None)
+  if name is None:
+    return repr(callback)
+  if owner is not None:
+    return '{}.{}'.format(type(owner).__name__, callback.__name__)
+  return name
+
+
+def summarizeHistogram(histogram, scale=1000):
+  """
+  Summarize a histogram of durations (in seconds) into a dictionary of
+  milliseconds values
+  """
+  return {
+      'mean': histogram.mean() * scale,
+      'p50': histogram.percentile(50) * scale,
+      'p90': histogram.percentile(90) * scale,
+      'p99': histogram.percentile(99) * scale,
+      'max': (histogram.max or 0) * scale
+  }
+
+
+class EventBusDispatchStats:
+  """
+  Statistics of the dispatches of one event type to one subscriber
+  """
+
+  def __init__(self):
+    self.count = 0
+    self.totalTime = 0.0
+    self.time = LogHistogram()
+    self.latency = LogHistogram()
+
+  def merge(self, other):
+    """
+    Merge the statistics of another dispatch in this one
+    """
+    self.count += other.count
+    self.totalTime += other.totalTime
+    self.time.merge(other.time)
+    self.latency.merge(other.latency)
+
+  def toDict(self):
+    """
+    Return the dict representation of the statistics
+    """
+    return {
+        'count': self.count,
+        'totalTime': self.totalTime * 1000,
+        'time': summarizeHistogram(self.time),
+        'latency': summarizeHistogram(self.latency)
+    }
+
+
+class EventBusStatsShard:
+  """
+  The statistics collected by a single thread. The lock of the shard is
+  only contended when the statistics are reported.
+  """
+
+  def __init__(self):
+    self.lock = Lock()
+    self.dispatches = {}
+    self.events = {}
+    self.drops = {}
+
+
+class EventBusStats:
+  """
+  Keeps track of the health of the event bus: How many times every subscriber
+  was called for every event type, how long it took, how long the events waited
+  in the queue before being dispatched and the depth of the queue over time.
+
+  All the durations are collected in seconds and reported in milliseconds.
+
+  Every thread collects it's statistics in it's own shard, so the threads
+  dispatching the events are not serialized on the statistics. The shards are
+  merged when the statistics are reported.
+  """
+
+  def __init__(self, sampleInterval=1.0):
+    self.mutex = Lock()
+    self.started = time.time()
+    self.sampleInterval = sampleInterval
+    self.lastSampleTs = 0
+    self.queueDepth = []
+    self.shards = []
+    self.local = local()
+
+  def getShard(self):
+    """
+    Return the statistics shard of the current thread
+    """
+    shard = getattr(self.local, 'shard', None)
+    if shard is None:
+      shard = self.local.shard = EventBusStatsShard()
+      with self.mutex:
+        self.shards.append(shard)
+    return shard
+
+  def sampleQueueDepth(self, depthFn):
+    """
+    Collect a sample of the queue depth, if the sampling interval has passed
+    """
+    ts = time.time()
+    if ts - self.lastSampleTs < self.sampleInterval:
+      return
+    with self.mutex:
+      self.lastSampleTs = ts
+      self.queueDepth.append((ts, depthFn()))
+
+  def recordEvent(self, eventType, latency):
+    """
+    Collect the time an event waited in the queue before being dispatched
+    """
+    shard = self.getShard()
+    with shard.lock:
+      histogram = shard.events.get(eventType)
+      if histogram is None:
+        histogram = shard.events[eventType] = LogHistogram()
+      histogram.add(latency)
+
+  def recordDrop(self, eventType, policy):
+    """
+    Collect an event that was discarded or coalesced by the given queue policy
+    """
+    shard = self.getShard()
+    with shard.lock:
+      drops = shard.drops.get(eventType)
+      if drops is None:
+        drops = shard.drops[eventType] = {}
+      drops[policy] = drops.get(policy, 0) + 1
+
+  def recordDispatch(self, eventType, callback, latency, duration):
+    """
+    Collect the time it took for the given subscriber to handle an event
+    """
+    shard = self.getShard()
+    with shard.lock:
+      stats = shard.dispatches.get((callback, eventType))
+      if stats is None:
+        stats = shard.dispatches[(callback, eventType)] = \
+          EventBusDispatchStats()
+      stats.count += 1
+      stats.totalTime += duration
+      stats.time.add(duration)
+      stats.latency.add(latency)
+
+  def merged(self):
+    """
+    Return the `(dispatches, events, drops)` statistics of all the threads
+    """
+    dispatches = {}
+    events = {}
+    drops = {}
+    with self.mutex:
+      shards = list(self.shards)
+
+    for shard in shards:
+      with shard.lock:
+        for key, stats in shard.dispatches.items():
+          merged = dispatches.get(key)
+          if merged is None:
+            merged = dispatches[key] = EventBusDispatchStats()
+          merged.merge(stats)
+
+        for eventType, histogram in shard.events.items():
+          merged = events.get(eventType)
+          if merged is None:
+            merged = events[eventType] = LogHistogram()
+          merged.merge(histogram)
+
+        for eventType, policies in shard.drops.items():
+          merged = drops.setdefault(eventType, {})
+          for policy, count in policies.items():
+            merged[policy] = merged.get(policy, 0) + count
+
+    return (dispatches, events, drops)
+
+  def report(self):
+    """
+    Return a structured report of the statistics collected so far
+    """
+    (dispatches, eventStats, drops) = self.merged()
+
+    # (Note: Different subscribers can have the same name, for example when
+    # more than one instance of the same tracker is used)
+    subscribers = {}
+    names = {}
+    for (callback, eventType), stats in dispatches.items():
+      name = names.get(callback)
+      if name is None:
+        name = subscriberName(callback)
+        if name in subscribers:
+          name = '{} #{}'.format(name, len(names) + 1)
+        names[callback] = name
+        subscribers[name] = {}
+      subscribers[name][eventType.__name__] = stats.toDict()
+
+    events = {}
+    for eventType, histogram in eventStats.items():
+      events[eventType.__name__] = {
+          'count': histogram.count,
+          'latency': summarizeHistogram(histogram)
+      }
+
+    with self.mutex:
+      samples = list(self.queueDepth)
+    depths = list(map(lambda sample: sample[1], samples))
+    return {
+        'duration': time.time() - self.started,
+        'events': events,
+        'subscribers': subscribers,
+        'queue': {
+            'samples': list(map(list, samples)),
+            'max': max(depths) if depths else 0,
+            'mean': sum(depths) / len(depths) if depths else 0,
+            'dropped': dict(
+                map(lambda kv: (kv[0].__name__, dict(kv[1])), drops.items()))
+        }
+    }
+
+  def slowestSubscribers(self, count=5):
+    """
+    Return the (name, event, total time) of the subscribers that spent the
+    most time handling events
+    """
+    (dispatches, events, drops) = self.merged()
+    items = sorted(
+        dispatches.items(), key=lambda kv: kv[1].totalTime,
+        reverse=True)[:count]
+    return list(
+        map(lambda kv: (subscriberName(kv[0][0]), kv[0][1].__name__,
+                        kv[1].totalTime), items))
@@ -1,8 +1,11 @@
 import re
 import logging
-from threading import Timer
 
-from performance.driver.core.events import isEventMatching
+from threading import Lock
+
+from performance.driver.core.events import getEventTypeNames
+from performance.driver.core.scheduler import getDefaultScheduler
+from performance.driver.core.traces import internTraceId
 from performance.driver.core.utils import parseTimeExpr
 
 DSL_TOKENS = re.compile(r'(\*|\w+)(?:\[(.*?)\])?(\:(?:\w[\:\w\(\),]*))?')
@@ -11,6 +14,12 @@ DSL_FLAGS = re.compile(r'\:([^\:]+)')
 
 REPLACE_DICT = re.compile(r"\.\'(.*?)\'")
 
+# The order selectors, in the order of their precedence
+DSL_ORDER_FLAGS = ('first', 'last', 'single', 'after', 'nth')
+
+# The compiled expressions, cached by their expression string
+COMPILED_EXPRESSIONS = {}
+
 global_single_events = {}
 
 
@@ -61,7 +70,7 @@ def tokenizeExpression(expression):
         flags[i] = flag
         flagParameters[flag] = params[:-1]
 
-    # Compile attribute selectors
+    # Collect attribute selectors
     attrib = []
     if exprAttrib:
       for (left, op, right) in DSL_ATTRIB.findall(exprAttrib):
@@ -73,28 +82,7 @@ def tokenizeExpression(expression):
         if op == "=":
           op = "=="
 
-        # Handle loose regex match
-        if op == "~=":
-          attrib.append(
-              eval('lambda event: not regex.search(str(event.{})) is None'.
-                   format(left), {'regex': re.compile(right)}))
-
-        # Handle exact regex match
-        elif op == "~==":
-          attrib.append(
-              eval('lambda event: not regex.match(str(event.{})) is None'.
-                   format(left), {'regex': re.compile(right)}))
-
-        # Handle `in` operator
-        elif op == "<~":
-          attrib.append(lambda event: right in list(getattr(event, left)))
-
-        # Handle operator match
-        else:
-          if not right.isnumeric() and not right[0] in ('"', "'"):
-            right = '"{}"'.format(right.replace('"', '\\"'))
-          attrib.append(
-              eval('lambda event: event.{} {} {}'.format(left, op, right)))
+        attrib.append((left, op, right))
 
     # Collect flags
     events.append((event, attrib, flags, flagParameters, eid, testTrue))
@@ -103,6 +91,143 @@ def tokenizeExpression(expression):
   return events
 
 
+def compileOrder(flags, flagParameters):
+  """
+  Resolve the order selector of an event match to a `(order, parameter)`
+  tuple, validating it's parameters
+  """
+  order = next(filter(lambda flag: flag in flags, DSL_ORDER_FLAGS), None)
+
+  if order == 'after':
+    time = parseTimeExpr(flagParameters['after'])
+    if time is None:
+      raise ValueError(
+          'Event selector `:after({})` contains an invalid time expression'.
+          format(flagParameters['after']))
+    return (order, time)
+
+  if order == 'nth':
+    parts = flagParameters['nth'].split(',')
+    return (order, (int(parts[0]), parts[1] if len(parts) > 1 else None))
+
+  return (order, None)
+
+
+def compileExpression(expression):
+  """
+  Compile the given expression to a `(matchEvent, matchAttributes, traced,
+  events, eventNames, negated)` tuple, where `events` is the list of `(eid,
+  order, parameter)` tuples of it's event matches, `traced` tells which of
+  them are checking the trace IDs and `eventNames` is the set of the event
+  names it can match, or None if it can match any event.
+
+  The matching function is called with the event and the trace IDs of the
+  session, and returns the index of the first event match that accepts the
+  event, or -1 if none of them does.
+
+  The attribute matching function is called only with the event and returns
+  the indices of the event matches whose type and attribute checks accept the
+  event, leaving the trace ID checks to the caller. It's `None` for negated
+  expressions, where the trace ID check is also negated.
+  """
+  compiled = COMPILED_EXPRESSIONS.get(expression)
+  if not compiled is None:
+    return compiled
+
+  scope = {'getEventTypeNames': getEventTypeNames}
+  specs = []
+  traced = []
+  lines = ['def matchEvent(event, traceids):']
+  attribLines = ['def matchAttributes(event):', '  matches = []']
+
+  tokens = tokenizeExpression(expression)
+  negated = not tokens[0][5]
+  eventNames = frozenset(map(lambda token: token[0], tokens))
+  if '*' in eventNames or negated:
+    eventNames = None
+  if any(map(lambda token: token[0] != '*', tokens)):
+    lines.append('  names = getEventTypeNames(type(event))')
+    attribLines.append(lines[-1])
+
+  for (index, (event, attribs, flags, flagParameters, eid,
+               testTrue)) in enumerate(tokens):
+
+    # (NOTE: When the expression is negated using a :not(..) expression all
+    # the checks below must fail for the event to be accepted)
+    test = '' if testTrue else 'not '
+
+    # Handle all events or matching events
+    if event == '*':
+      lines.append('  if {}True:'.format(test))
+    else:
+      lines.append('  if {}({!r} in names):'.format(test, event))
+    attribLines.append(lines[-1])
+
+    # Handle attributes
+    checks = []
+    for (left, op, right) in attribs:
+      name = '_arg{}_{}'.format(index, len(checks))
+
+      # Handle loose regex match
+      if op == "~=":
+        scope[name] = re.compile(right)
+        checks.append('not {}.search(str(event.{})) is None'.format(name, left))
+
+      # Handle exact regex match
+      elif op == "~==":
+        scope[name] = re.compile(right)
+        checks.append('not {}.match(str(event.{})) is None'.format(name, left))
+
+      # Handle `in` operator
+      elif op == "<~":
+        scope[name] = right
+        checks.append('{} in list(event.{})'.format(name, left))
+
+      # Handle operator match
+      else:
+        if not right.isnumeric() and not right[0] in ('"', "'"):
+          right = '"{}"'.format(right.replace('"', '\\"'))
+        checks.append('event.{} {} {}'.format(left, op, right))
+
+    lines.append('    try:')
+    lines.append('      passed = {}'.format(' and '.join(checks) or 'True'))
+    lines.append('    except KeyError:')
+    lines.append('      passed = False')
+    attribLines.extend(lines[-4:])
+    attribLines.append('    if passed:')
+    attribLines.append('      matches.append({})'.format(index))
+
+    # Handle trace ID
+    traceCheck = 'True'
+    if not 'notrace' in flags:
+      traceCheck = ('(traceids is None or '
+                    'not traceids.isdisjoint(event.traceids))')
+    lines.append('    if {0}passed and {0}{1}:'.format(test, traceCheck))
+    lines.append('      return {}'.format(index))
+
+    specs.append((eid, ) + compileOrder(flags, flagParameters))
+    traced.append(not 'notrace' in flags)
+
+  lines.append('  return -1')
+  attribLines.append('  return matches')
+
+  try:
+    exec(compile('\n'.join(lines), '<EventFilter[{}]>'.format(expression),
+                 'exec'), scope)
+    if not negated:
+      exec(compile('\n'.join(attribLines),
+                   '<EventFilter[{}]>'.format(expression), 'exec'), scope)
+  except SyntaxError as e:
+    raise ValueError(
+        'Unable to compile the event filter expression "{}": {}'.format(
+            expression, e))
+
+  compiled = (scope['matchEvent'], scope.get('matchAttributes'),
+              tuple(traced), specs, eventNames, negated)
+  COMPILED_EXPRESSIONS[expression] = compiled
+  return compiled
+
+
 class EventFilterSession:
   """
   An event filter session
@@ -116,12 +241,12 @@ class EventFilterSession:
     self.callback = callback
     self.timer = None
     self.counterGroups = {}
+    self.index = None
     self.logger = logging.getLogger('EventFilter<{}>'.format(filter.expression))
 
     # Immediately call-back to matched filters
-    for (eventSpec, attribChecks, flags, flagParameters,
-         eid, testTrue) in self.filter.events:
-      if 'single' in flags:
+    for (eid, order, parameter) in self.filter.events:
+      if order == 'single':
         if eid in global_single_events:
           callback(global_single_events[eid])
 
@@ -132,98 +257,77 @@ class EventFilterSession:
     self.timer = None
     self.callback(self.foundEvent)
 
-  def handle(self, event):
+  def handle(self, event, matches=None):
     """
     Handle the incoming event
+
+    If the event `matches` of the filter that accept the type and the
+    attributes of the event are already known, only the trace IDs are checked
     """
-    for (eventSpec, attribChecks, flags, flagParameters,
-         eid, TRUE) in self.filter.events:
-
-      # (NOTE: `TRUE` is True when the filter is positive, or False if it's
-      # negated using a :not(..) expression)
-
-      # Handle all events or matching events
-      if TRUE == (eventSpec != "*" and not isEventMatching(event, eventSpec)):
-        continue
-
-      # Handle attributes
-      attribCheckFailed = False
-      for attribCheckFn in attribChecks:
-        try:
-          if not attribCheckFn(event):
-            attribCheckFailed = True
-            break
-        except KeyError:
-          attribCheckFailed = True
-          break
-      if TRUE == attribCheckFailed:
-        continue
-
-      # Handle trace ID
-      if TRUE == (not self.traceids is None and not 'notrace' in flags and not
-          event.hasTraces(self.traceids)):
-        continue
-
-      # Handle order
-      if 'first' in flags:
-        if self.foundEvent is None:
-          self.foundEvent = event
-          self.callback(event)
-        break
-      if 'last' in flags:
-        self.foundEvent = event
-        self.triggerAtExit = True
-        break
-      if 'single' in flags:
-        if eid in global_single_events:
-          break
+    if matches is None:
+      index = self.filter.matchEvent(event, self.traceids)
+    else:
+      index = self.filter.matchTraces(event, matches, self.traceids)
+    if index < 0:
+      return
+    (eid, order, parameter) = self.filter.events[index]
+
+    # Fire callback
+    if order is None:
+      self.callback(event)
+
+    # Handle order
+    elif order == 'first':
+      if self.foundEvent is None:
         self.foundEvent = event
         self.callback(event)
-        global_single_events[eid] = event
-        break
-      if 'after' in flags:
-        time = parseTimeExpr(flagParameters['after'])
-        if time is None:
-          raise ValueError(
-              'Event selector `:after({})` contains an invalid time expression'.
-              format(flagParameters['after']))
 
-        # Restart timer to call the callback after the given delay
-        if self.timer:
-          self.timer.cancel()
-        self.logger.debug('(Re)Starting timer after {} sec'.format(time))
-        self.foundEvent = event
-        self.timer = Timer(time, self.afterTimerCallback)
-        self.timer.start()
-        break
-      if 'nth' in flags:
-        parts = flagParameters['nth'].split(',')
-        nth = int(parts[0])
-        grp = eid
-        if len(parts) > 1:
-          grp = parts[1]
-        if not grp in self.counterGroups:
-          self.counterGroups[grp] = 0
-        self.counterGroups[grp] += 1
-        self.logger.debug('Found {} hits on group {} ({} requested)'.format(
-          self.counterGroups[grp], grp, nth))
-        if nth == self.counterGroups[grp]:
-          self.logger.debug('Found all {} hits found'.format(nth))
-          self.foundEvent = event
-          self.callback(event)
-        break
-
-      # Fire callback
+    elif order == 'last':
+      self.foundEvent = event
+      self.triggerAtExit = True
+
+    elif order == 'single':
+      if eid in global_single_events:
+        return
+      self.foundEvent = event
       self.callback(event)
-      break
+      global_single_events[eid] = event
+
+    elif order == 'after':
+      # Restart timer to call the callback after the given delay
+      if self.timer:
+        self.timer.cancel()
+      self.logger.debug('(Re)Starting timer after {} sec'.format(parameter))
+      self.foundEvent = event
+      self.timer = getDefaultScheduler().callLater(parameter,
+                                                   self.afterTimerCallback)
+
+    elif order == 'nth':
+      (nth, grp) = parameter
+      if grp is None:
+        grp = eid
+      if not grp in self.counterGroups:
+        self.counterGroups[grp] = 0
+      self.counterGroups[grp] += 1
+      self.logger.debug('Found {} hits on group {} ({} requested)'.format(
+        self.counterGroups[grp], grp, nth))
+      if nth == self.counterGroups[grp]:
+        self.logger.debug('Found all {} hits found'.format(nth))
+        self.foundEvent = event
+        self.callback(event)
 
   def finalize(self):
     """
     Called when a tracking session is finalised
     """
 
+    # Stop receiving events from the index
+    if self.index:
+      self.index.remove(self)
+
     # If we have an active :after() timer, flush it now
     if self.timer:
+      self.timer.cancel()
       self.afterTimerCallback()
 
     # Submit the last event
@@ -336,16 +440,33 @@ class EventFilter:
 
   def __init__(self, expression):
     self.expression = expression
-    self.events = tokenizeExpression(expression)
+    (self.matchEvent, self.matchAttributes, self.traced, self.events,
+     self.eventNames, self.negated) = compileExpression(expression)
+
+  def matchTraces(self, event, matches, traceids):
+    """
+    Return the first of the given event `matches` (as returned by
+    `matchAttributes`) that accepts the trace IDs of the event, or -1 if none
+    of them does
+    """
+    for index in matches:
+      if traceids is None or not self.traced[index] or \
+         not traceids.isdisjoint(event.traceids):
+        return index
+    return -1
 
   def start(self, traceids, callback):
     """
     Start a tracking session with the given trace ID
     """
 
-    # Make sure trace IDs is always a list
-    if (traceids != None) and (type(traceids) not in (list, set, tuple)):
-      traceids = set([traceids])
+    # Make sure trace IDs is always a set of interned IDs that the session
+    # can extend (Note: The trace IDs of the events are immutable tuples)
+    if traceids != None:
+      if isinstance(traceids, (list, set, frozenset, tuple)):
+        traceids = set(map(internTraceId, traceids))
+      else:
+        traceids = set([internTraceId(traceids)])
 
     return EventFilterSession(self, traceids, callback)
 
@@ -354,3 +475,145 @@ class EventFilter:
 
   def __repr__(self):
     return '<Filter[{}]>'.format(self.expression)
+
+
+def filterEvents(filters, events=()):
+  """
+  Return the `events` to subscribe to the bus with, in order to receive the
+  events that the given filters can match plus the given `events`, or None if
+  any of the filters can match any event
+  """
+  names = set()
+  for eventFilter in filters:
+    if eventFilter.eventNames is None:
+      return None
+    names.update(eventFilter.eventNames)
+
+  return tuple(events) + tuple(sorted(names))
+
+
+class EventFilterIndex:
+  """
+  Routes the events of the bus to the filter sessions registered to it, so
+  the components that are tracking events don't have to pass every event
+  through every one of their sessions.
+
+  The sessions are grouped by their filter expression and every event is
+  routed only to the groups whose filter can match it's type (or any of it's
+  parent types). The routes are computed once per event type and kept until
+  the next session is added or removed. The type and attribute checks of a
+  filter are performed once for all the sessions in it's group, and the
+  sessions of the accepted groups are only checking their trace IDs (except
+  for the negated filters, where every session performs the full match).
+
+  If an `eventbus` is given, the index is subscribed to it after every other
+  subscriber, so the sessions started while handling an event also receive
+  that event. This is not guaranteed in the ``mailbox`` dispatch mode, where
+  the index has it's own mailbox. The components whose sessions depend on
+  the order of the events they receive (ex. the trackers that start a session
+  on every ``ParameterUpdateEvent``) should instead keep an index without an
+  `eventbus` and call `handleEvent` from their own subscriber, after they have
+  handled the event themselves.
+  """
+
+  def __init__(self, eventbus=None, order=1000):
+    self.logger = logging.getLogger('EventFilterIndex')
+    self.eventbus = eventbus
+    self.order = order
+    self.groups = {}
+    self.routes = {}
+    self.lock = Lock()
+    self.subscribed = False
+
+  def start(self, eventFilter, traceids, callback):
+    """
+    Start a session of the given filter and register it to the index until
+    it's finalized
+    """
+    session = eventFilter.start(traceids, callback)
+    self.add(session)
+    return session
+
+  def add(self, session):
+    """
+    Register the given session to the index
+    """
+    with self.lock:
+      # (Note: The groups are replaced instead of being modified, so the
+      # routes can be resolved without locking)
+      expression = session.filter.expression
+      (eventFilter, sessions) = self.groups.get(expression,
+                                                (session.filter, ()))
+      groups = dict(self.groups)
+      groups[expression] = (eventFilter, sessions + (session, ))
+      self.groups = groups
+      self.routes = {}
+      session.index = self
+
+      # Subscribe to the bus only when there is something to route
+      if not self.subscribed and not self.eventbus is None:
+        self.subscribed = True
+        self.eventbus.subscribe(self.handleEvent, order=self.order)
+
+  def remove(self, session):
+    """
+    Remove the given session from the index
+    """
+    with self.lock:
+      expression = session.filter.expression
+      if not expression in self.groups:
+        return
+
+      (eventFilter, sessions) = self.groups[expression]
+      sessions = tuple(filter(lambda s: not s is session, sessions))
+      groups = dict(self.groups)
+      if sessions:
+        groups[expression] = (eventFilter, sessions)
+      else:
+        del groups[expression]
+      self.groups = groups
+      self.routes = {}
+      session.index = None
+
+  def resolveSessions(self, eventType):
+    """
+    Return the `(eventFilter, sessions)` groups that can match events of the
+    given type
+    """
+    # (Note: The routes are read before the groups, since `add` and `remove`
+    # are replacing them in the opposite order)
+    routes = self.routes
+    groups = routes.get(eventType)
+    if groups is None:
+      names = getEventTypeNames(eventType)
+      groups = tuple(
+          filter(lambda group: group[0].eventNames is None or \
+                 not group[0].eventNames.isdisjoint(names),
+                 self.groups.values()))
+      routes[eventType] = groups
+
+    return groups
+
+  def handleEvent(self, event):
+    """
+    Route the given event to the sessions that can match it
+    """
+    for (eventFilter, sessions) in self.resolveSessions(type(event)):
+      try:
+        # Check the event type and attributes once for all the sessions, since
+        # the sessions of a group differ only on their trace IDs
+        # (Note: This is not possible for negated filters, where the trace ID
+        # check is also negated)
+        matches = None
+        if not eventFilter.negated:
+          matches = eventFilter.matchAttributes(event)
+          if not matches:
+            continue
+
+        for session in sessions:
+          session.handle(event, matches)
+
+      except Exception as e:
+        self.logger.error('Exception while handling {} with filter {}'.format(
+            event, eventFilter))
+        self.logger.exception(e)
@@ -2,14 +2,19 @@ import re
 import time
 import uuid
 
+from .traces import TraceIds, allocateEventId, internTraceId, resolveTraceIds
+
 # Regex to strip ANSI sequences from the log lines
 ANSI_SEQUENCE = re.compile(r'\x1b[^m]*m')
 
 # Event matching cache for speed-up
 MATCHER_CACHE = {}
 
-# Monotonically increasing trace ID
-LAST_TRACE_ID = 0
+# The names of the fields of every event class, used by `Event.toDict`
+EVENT_FIELDS = {}
+
+# The class names every event class matches, used by the event filters
+EVENT_TYPE_NAMES = {}
 
 
 def isEventClassMatchingName(eventClass, className):
@@ -24,6 +29,18 @@ def isEventClassMatchingName(eventClass, className):
           eventClass.__bases__))
 
 
+def getEventTypeNames(eventClass):
+  """
+  Return the names of the `eventClass` and all of it's parent classes
+  """
+  names = EVENT_TYPE_NAMES.get(eventClass)
+  if names is None:
+    names = frozenset(map(lambda c: c.__name__, eventClass.__mro__))
+    EVENT_TYPE_NAMES[eventClass] = names
+
+  return names
+
+
 def isEventMatching(eventInstance, eventCheck):
   """
   Check if the `eventCheck` is validating the `eventInstance`
@@ -50,42 +67,69 @@ def isEventMatching(eventInstance, eventCheck):
   return ans
 
 
-def allocateEventId():
+def getEventFields(eventClass):
   """
-  Allocate a new monotonically increasing ID in order to avoid using string IDs
-  that are less performant on resolving.
+  Return the names of the public fields declared in the `__slots__` of the
+  given event class and it's parents, except the ones of the base `Event`
   """
-  global LAST_TRACE_ID
+  fields = EVENT_FIELDS.get(eventClass)
+  if fields is None:
+    fields = []
+    for cls in reversed(eventClass.__mro__):
+      if cls is Event:
+        continue
+      slots = cls.__dict__.get('__slots__', ())
+      if type(slots) is str:
+        slots = (slots, )
+      for name in slots:
+        if not name.startswith('_') and not name in fields:
+          fields.append(name)
+
+    fields = EVENT_FIELDS[eventClass] = tuple(fields)
 
-  # Increment trace ID and return it
-  LAST_TRACE_ID += 1
-  return LAST_TRACE_ID
+  return fields
 
 
 class Event:
   """
   Base event
 
-  The `traceid` parameter is a unique string or object that is carried along
-  related events and is used to group them together to the same operation.
+  The `traceid` parameter is a unique string or integer (or a collection of
+  them) that is carried along related events and is used to group them
+  together to the same operation.
+
+  Events are allocated in large numbers, so they are using `__slots__` instead
+  of a `__dict__`. Sub-classes should declare the fields they are setting in
+  their own `__slots__`, otherwise they fall back to a `__dict__`.
   """
 
+  __slots__ = ('ts', 'traceids')
+
+  #: The name of the event class
+  event = 'Event'
+
+  def __init_subclass__(cls, **kwargs):
+    super().__init_subclass__(**kwargs)
+    cls.event = cls.__name__
+
   def __init__(self, traceid=None, ts=None):
-    self._cachedMatchers = {}
-    self.event = type(self).__name__
     if ts is None:
       self.ts = time.time()
     else:
       self.ts = ts
 
-    # Allocate a unique trace ID for this event
-    self.traceids = set([allocateEventId()])
-
-    # Enrich with the given trace IDs
-    if type(traceid) in (tuple, list, set):
-      self.traceids.update(set(traceid))
-    elif not traceid is None:
-      self.traceids.add(traceid)
+    # Allocate a unique trace ID for this event and enrich it with the
+    # given trace IDs, interned to integers (Note: The trace IDs of other
+    # events are already unique and interned)
+    eventId = allocateEventId()
+    if traceid is None:
+      self.traceids = TraceIds((eventId, ))
+    elif type(traceid) is TraceIds:
+      self.traceids = TraceIds((eventId, ) + traceid)
+    elif type(traceid) in (tuple, list, set, frozenset):
+      self.traceids = TraceIds((eventId, ) + TraceIds.fromIterable(traceid))
+    else:
+      self.traceids = TraceIds((eventId, internTraceId(traceid)))
 
   def hasTrace(self, traceid):
     """
@@ -97,22 +141,35 @@ class Event:
     """
     Check if at least one of the given trace ids are in the traceids
     """
-    for trace in traceids:
-      if trace in self.traceids:
-        return True
+    return not self.traceids.isdisjoint(traceids)
+
+  def coalesce(self, event):
+    """
+    Merge the given event of the same type in this one, when the event queue
+    is full. Return False if the events cannot be merged.
+    """
     return False
 
   def toDict(self):
     """
     Return dict representation of the event
     """
-    inst = dict(self.__dict__)
-
-    # Remove private keys
-    del inst['_cachedMatchers']
-
-    # Map sets to lists
-    inst['traceids'] = list(inst['traceids'])
+    inst = {
+        'event': self.event,
+        'ts': self.ts,
+        'traceids': resolveTraceIds(self.traceids)
+    }
+
+    # Collect the fields from the slots, skipping the ones not set
+    for name in getEventFields(type(self)):
+      try:
+        inst[name] = getattr(self, name)
+      except AttributeError:
+        pass
+
+    # Sub-classes without `__slots__` keep their fields in a `__dict__`
+    if hasattr(self, '__dict__'):
+      inst.update(self.__dict__)
 
     # Return dict
     return inst
@@ -121,7 +178,8 @@ class Event:
     """
     Return a string representation of the event
     """
-    return '{}[trace={}]'.format(self.event, ','.join(map(str, self.traceids)))
+    return '{}[trace={}]'.format(
+        self.event, ','.join(map(str, resolveTraceIds(self.traceids))))
 
 
 class StartEvent(Event):
@@ -130,6 +188,8 @@ class StartEvent(Event):
   and the environment is ready, in order to start the policies.
   """
 
+  __slots__ = ()
+
 
 class RestartEvent(Event):
   """
@@ -137,6 +197,8 @@ class RestartEvent(Event):
   test loops has to be executed.
   """
 
+  __slots__ = ()
+
 
 class TeardownEvent(Event):
   """
@@ -144,6 +206,8 @@ class TeardownEvent(Event):
   system is about to be torn down.
   """
 
+  __slots__ = ()
+
 
 class InterruptEvent(Event):
   """
@@ -151,6 +215,8 @@ class InterruptEvent(Event):
   or when the user has instructed to interupt the tests via a keystroke
   """
 
+  __slots__ = ()
+
 
 class StalledEvent(Event):
   """
@@ -158,12 +224,16 @@ class StalledEvent(Event):
   to a non-terminal state for longer than expected time.
   """
 
+  __slots__ = ()
+
 
 class RunTaskEvent(Event):
   """
   This event is dispatched when a policy requires the session to execute a task
   """
 
+  __slots__ = ('task',)
+
   def __init__(self, task):
     super().__init__()
     self.task = task
@@ -175,6 +245,8 @@ class RunTaskCompletedEvent(Event):
   want to keep track of a lengthy event
   """
 
+  __slots__ = ('task', 'exception')
+
   def __init__(self, previousEvent, exception=None):
     super().__init__(traceid=previousEvent.traceids)
     self.task = previousEvent.task
@@ -186,17 +258,42 @@ class TickEvent(Event):
   A clock event is dispatched periodically by the event bus
   """
 
+  __slots__ = ('count', 'delta')
+
   def __init__(self, count, delta, *args, **kwargs):
     super().__init__(*args, **kwargs)
     self.count = count
     self.delta = delta
 
+  def coalesce(self, event):
+    """
+    Collapse consecutive ticks into one, carrying the total delta
+    """
+    self.count = event.count
+    self.delta += event.delta
+    return True
+
+
+class EventBusStatsEvent(Event):
+  """
+  A statistics event is periodically dispatched by the event bus, reporting
+  it's own performance
+  """
+
+  __slots__ = ('stats',)
+
+  def __init__(self, stats, *args, **kwargs):
+    super().__init__(*args, **kwargs)
+    self.stats = stats
+
 
 class ParameterUpdateEvent(Event):
   """
   A parameter change request
   """
 
+  __slots__ = ('parameters', 'oldParameters', 'changes')
+
   def __init__(self, newParameters, oldParameters, changes, *args, **kwargs):
     super().__init__(*args, **kwargs)
     self.parameters = newParameters
@@ -204,38 +301,43 @@ class ParameterUpdateEvent(Event):
     self.changes = changes
 
 
-class MetricUpdateEvent(Event):
+class FlagUpdateEvent(Event):
   """
-  A metric has changed value
+  A flag has changed for this run
   """
 
-  def __init__(self, name, value, axis, *args, **kwargs):
+  __slots__ = ('name', 'value')
+
+  def __init__(self, name, value, *args, **kwargs):
     super().__init__(*args, **kwargs)
     self.name = name
     self.value = value
-    self.axis = axis
 
 
-class FlagUpdateEvent(Event):
+class MetricUpdateEvent(Event):
   """
-  A flag has changed for this run
+  A metric has changed
   """
 
+  __slots__ = ('name', 'value')
+
   def __init__(self, name, value, *args, **kwargs):
     super().__init__(*args, **kwargs)
     self.name = name
     self.value = value
 
 
-class MetricUpdateEvent(Event):
+class SummaryUpdateEvent(Event):
   """
-  A metric has changed
+  The live summaries of the axes that were updated since the previous
+  summary, periodically published by the summarizer
   """
 
-  def __init__(self, name, value, *args, **kwargs):
+  __slots__ = ('summaries',)
+
+  def __init__(self, summaries, *args, **kwargs):
     super().__init__(*args, **kwargs)
-    self.name = name
-    self.value = value
+    self.summaries = summaries
 
 
 class ObserverEvent(Event):
@@ -243,6 +345,8 @@ class ObserverEvent(Event):
   A metric change is observed
   """
 
+  __slots__ = ('metric',)
+
   def __init__(self, metric, *args, **kwargs):
     super().__init__(*args, **kwargs)
     self.metric = metric
@@ -253,6 +357,8 @@ class ObserverValueEvent(ObserverEvent):
   A metric has changed to a new value
   """
 
+  __slots__ = ('value',)
+
   def __init__(self, metric, value, *args, **kwargs):
     super().__init__(metric, *args, **kwargs)
     self.value = value
@@ -263,6 +369,8 @@ class LogLineEvent(Event):
   A log line from an observer
   """
 
+  __slots__ = ('line', 'source', 'kind')
+
   def __init__(self, line, source, kind=None, *args, **kwargs):
     super().__init__(*args, **kwargs)
     self.line = ANSI_SEQUENCE.sub('', line)
@@ -0,0 +1,183 @@
+import heapq
+import logging
+import time
+
+from threading import Thread, Condition, Lock
+
+# The scheduler shared by the components that have no access to the event bus
+DEFAULT_SCHEDULER = None
+DEFAULT_SCHEDULER_LOCK = Lock()
+
+
+def getDefaultScheduler():
+  """
+  Return the shared scheduler instance, starting it on the first call
+  """
+  global DEFAULT_SCHEDULER
+
+  with DEFAULT_SCHEDULER_LOCK:
+    if DEFAULT_SCHEDULER is None:
+      DEFAULT_SCHEDULER = Scheduler(name='scheduler-default')
+      DEFAULT_SCHEDULER.start()
+    return DEFAULT_SCHEDULER
+
+
+class ScheduledCall:
+  """
+  A handle to a call that is scheduled for later
+  """
+
+  def __init__(self, scheduler, deadline, callback, args, kwargs):
+    self.scheduler = scheduler
+    self.deadline = deadline
+    self.callback = callback
+    self.args = args
+    self.kwargs = kwargs
+    self.cancelled = False
+
+  def cancel(self):
+    """
+    Cancel the call, if it was not already called
+    """
+    self.scheduler.cancel(self)
+
+  def __lt__(self, other):
+    return self.deadline < other.deadline
+
+
+class Scheduler:
+  """
+  A scheduler that calls the given functions at the designated time, from a
+  single thread that sleeps until the next deadline.
+
+  The pending calls are kept in a heap, ordered by their deadline, so the
+  scheduler costs nothing while there is nothing to be called. Since all the
+  calls are performed from the same thread, the callbacks should return as
+  soon as possible, handing over any lengthy work to another thread.
+  """
+
+  def __init__(self, name='scheduler'):
+    self.logger = logging.getLogger('Scheduler')
+    self.name = name
+    self.heap = []
+    self.cancelledCount = 0
+    self.condition = Condition()
+    self.active = False
+    self.thread = None
+
+  def callAt(self, ts, callback, *args, **kwargs):
+    """
+    Call the given function at the given `time.time()` timestamp and return
+    a `ScheduledCall` handle that can be used to cancel it
+    """
+    return self.callLater(ts - time.time(), callback, *args, **kwargs)
+
+  def callLater(self, delay, callback, *args, **kwargs):
+    """
+    Call the given function after `delay` seconds and return a `ScheduledCall`
+    handle that can be used to cancel it
+    """
+    call = ScheduledCall(self,
+                         time.monotonic() + delay, callback, args, kwargs)
+    with self.condition:
+      heapq.heappush(self.heap, call)
+
+      # Wake up the thread only if the new call is the next one
+      if self.heap[0] is call:
+        self.condition.notify()
+
+    return call
+
+  def cancel(self, call):
+    """
+    Cancel the given scheduled call
+    """
+    with self.condition:
+      if call.cancelled:
+        return
+
+      # (Note: Cancelled calls are removed from the heap when they reach the
+      # top, avoiding the re-ordering of the heap. However if they pile up,
+      # for example when a timer is restarted on every event, the heap is
+      # rebuilt without them.)
+      call.cancelled = True
+      self.cancelledCount += 1
+      if self.cancelledCount > 64 and self.cancelledCount > len(self.heap) / 2:
+        self.heap = list(filter(lambda call: not call.cancelled, self.heap))
+        heapq.heapify(self.heap)
+        self.cancelledCount = 0
+
+  def pending(self):
+    """
+    Return the number of calls pending
+    """
+    with self.condition:
+      return len(list(filter(lambda call: not call.cancelled, self.heap)))
+
+  def start(self):
+    """
+    Start the scheduler thread
+    """
+    with self.condition:
+      if self.active:
+        return
+      self.active = True
+
+    self.thread = Thread(target=self._schedulerthread, name=self.name,
+                         daemon=True)
+    self.thread.start()
+
+  def stop(self):
+    """
+    Stop the scheduler thread and discard all the pending calls
+    """
+    with self.condition:
+      self.active = False
+      self.heap = []
+      self.cancelledCount = 0
+      self.condition.notify()
+
+    if self.thread:
+      self.thread.join()
+      self.thread = None
+
+  def _schedulerthread(self):
+    """
+    The thread that waits for the next deadline and performs the calls
+    """
+    self.logger.debug('Scheduler thread started')
+    while True:
+      with self.condition:
+        call = None
+        while self.active:
+          # Discard cancelled calls
+          while self.heap and self.heap[0].cancelled:
+            heapq.heappop(self.heap)
+            self.cancelledCount -= 1
+
+          if not self.heap:
+            self.condition.wait()
+            continue
+
+          # Wait until the deadline of the next call, unless a call with an
+          # earlier deadline is placed in the mean time
+          remaining = self.heap[0].deadline - time.monotonic()
+          if remaining > 0:
+            self.condition.wait(remaining)
+            continue
+
+          # (Note: A call that was performed cannot be cancelled any more)
+          call = heapq.heappop(self.heap)
+          call.cancelled = True
+          break
+
+        if call is None:
+          break
+
+      try:
+        call.callback(*call.args, **call.kwargs)
+      except Exception as e:
+        self.logger.error('Exception while calling {}'.format(call.callback))
+        self.logger.exception(e)
+
+    self.logger.debug('Scheduler thread exited')
@@ -5,21 +5,53 @@ import threading
 import traceback
 import time
 
-from .eventbus import EventBus, EventBusSubscriber
+from .eventbus import EventBus, AsyncEventBus, EventBusSubscriber
 from .events import StartEvent, RestartEvent, TeardownEvent, InterruptEvent, \
                     StalledEvent, RunTaskEvent, RunTaskCompletedEvent
 from .parameters import ParameterBatch
 from .summarizer import Summarizer
+from .traces import releaseTraceIds
 
 from performance.driver.core.reflection import subscribesToHint, publishesHint
+from performance.driver.core.utils import parseTimeExpr
 
 
 class Session(EventBusSubscriber):
   @subscribesToHint(RunTaskEvent)
-  def __init__(self, config, workers=8, fps=30):
+  def __init__(self, config, workers=8, fps=30, eventbus=None):
     """
     """
-    super().__init__(EventBus(clockFrequency=fps, threadCount=workers))
+    eventbusConfig = config.general().eventbus
+    if eventbus is None:
+      eventbus = eventbusConfig.get('backend', 'thread')
+    stats = eventbusConfig.get('stats', False)
+    statsInterval = parseTimeExpr(eventbusConfig.get('statsInterval', None))
+
+    # Create the event bus of the requested implementation
+    queueConfig = eventbusConfig.get('queue', {})
+    if eventbus == 'asyncio':
+      super().__init__(
+          AsyncEventBus(
+              clockFrequency=fps,
+              threadCount=workers,
+              dispatch=eventbusConfig.get('dispatch', 'pool'),
+              stats=stats,
+              statsInterval=statsInterval,
+              queueSize=int(queueConfig.get('size', 0))))
+    elif eventbus == 'thread':
+      super().__init__(
+          EventBus(
+              clockFrequency=fps,
+              threadCount=workers,
+              dispatch=eventbusConfig.get('dispatch', 'pool'),
+              mailboxBatch=int(eventbusConfig.get('mailboxBatch', 32)),
+              stats=stats,
+              statsInterval=statsInterval,
+              queueSize=int(queueConfig.get('size', 0)),
+              queuePolicy=queueConfig.get('policy', 'block'),
+              queuePolicies=queueConfig.get('policies', {})))
+    else:
+      raise ValueError('Unknown event bus implementation `{}`'.format(eventbus))
     self.logger = logging.getLogger('Session')
     self.config = config
     self.prevSigHandler = None
@@ -222,6 +254,11 @@ class Session(EventBusSubscriber):
       runs -= 1
       if not self.interrupted and (runs > 0):
 
+        # The traces of the previous run are completed, so the string trace
+        # IDs it interned can be released
+        self.eventbus.flush()
+        releaseTraceIds()
+
         # Start all policies, effectively starting the tests
         self.logger.info('Restarting tests ({} run(s) left)'.format(runs))
         for policy in self.policies:
@@ -243,3 +280,18 @@ class Session(EventBusSubscriber):
     self.eventbus.flush()
     self.eventbus.publish(RunTaskEvent('teardown'))
     self.eventbus.stop()
+
+    # Summarize the statistics of the event bus and report the subscribers
+    # that kept it busy
+    if self.eventbus.stats:
+      report = self.eventbus.stats.report()
+      events = sum(map(lambda e: e['count'], report['events'].values()))
+      dropped = sum(
+          map(lambda d: sum(d.values()), report['queue']['dropped'].values()))
+      self.logger.info(
+          'Event bus dispatched {} events in {:.1f}s (max queue depth {}, {} '
+          'dropped)'.format(events, report['duration'],
+                            report['queue']['max'], dropped))
+      for name, event, totalTime in self.eventbus.stats.slowestSubscribers(3):
+        self.logger.info('Event bus subscriber {} spent {:.3f}s on {}'.format(
+            name, totalTime, event))
@@ -1,3 +1,4 @@
-from .axis import SummarizerAxis, SummarizerAxisParameters
+from .axis import SummarizerAxis, SummarizerAxisIndex, SummarizerAxisParameters
 from .core import Summarizer
-from .timeseries import SummarizerAxisTimeseries
+from .batch import TimeseriesBatch
+from .timeseries import SummarizerAxisTimeseries, MappedSummarizerAxisTimeseries
@@ -1,4 +1,26 @@
-from .timeseries import SummarizerAxisTimeseries
+import json
+
+from .timeseries import SummarizerAxisTimeseries, MappedSummarizerAxisTimeseries
+
+
+def hashableValue(value):
+  """
+  Return a hashable representation of the given parameter value
+  """
+  try:
+    hash(value)
+    return value
+  except TypeError:
+    return json.dumps(value, sort_keys=True, default=repr)
+
+
+def parameterKey(parameters):
+  """
+  Return a canonical, hashable key for the given parameter values, that is
+  the same for all the parameter dictionaries with equal values
+  """
+  return tuple(
+      sorted(map(lambda kv: (kv[0], hashableValue(kv[1])), parameters.items())))
 
 
 class SummarizerAxisParameters(dict):
@@ -15,13 +37,25 @@ class SummarizerAxis:
   def __init__(self, config, parameters, traceids):
     self.config = config
     self.parameters = SummarizerAxisParameters(parameters)
+    self.key = parameterKey(parameters)
     self.traceids = set(traceids)
     self.flags = {}
-
-    # Generate timeseries classes
+    self.sums = {}
+
+    # Generate timeseries classes, spilling the values in the column store
+    # if one is configured. The running statistics are only needed for the
+    # live summaries.
+    store = self.config.instanceStorage()
+    window = int(self.config.storage.get('window', 4096))
+    streaming = bool(self.config.summaries.get('interval', None))
     self.timeseries = {}
     for metric, config in self.config.metrics.items():
-      self.timeseries[metric] = SummarizerAxisTimeseries(metric, config)
+      if store is None:
+        self.timeseries[metric] = SummarizerAxisTimeseries(
+            metric, config, streaming=streaming)
+      else:
+        self.timeseries[metric] = MappedSummarizerAxisTimeseries(
+            metric, config, store, window, streaming)
 
   def flag(self, name, value):
     """
@@ -53,30 +87,111 @@ class SummarizerAxis:
     # Collect values
     values = {}
     for metric, series in self.timeseries.items():
-      values[metric] = series.values
+      values[metric] = series.raw()
 
     return values
 
-  def sum(self):
+  @property
+  def version(self):
     """
-    Summarize using the merge rules given
+    A number that changes every time a value is pushed in any of the
+    timeseries of the axis
     """
+    return sum(map(lambda series: series.version, self.timeseries.values()))
 
-    # Collect summarize rules for each metric
-    metricSummarizers = {}
-    for metric, config in self.config.metrics.items():
-      metricSummarizers[metric] = config.instanceSummarizers()
+  def snapshot(self, percentiles=(50, 90, 99)):
+    """
+    Return the live summaries of the timeseries, calculated incrementally
+    """
+    values = {}
+    for metric, series in self.timeseries.items():
+      values[metric] = series.snapshot(percentiles)
 
-    # Collect values
+    return values
+
+  def sum(self):
+    """
+    Summarize using the merge rules given
+
+    The summaries of every metric are calculated once and re-used until a new
+    value is pushed in it's timeseries.
+    """
     values = {}
     for metric, series in self.timeseries.items():
 
-      # Summarize timeseries
-      sums = {}
-      for summarizer in metricSummarizers[metric]:
-        sums[summarizer.name] = summarizer.calculate(series, self.parameters)
+      # Re-use the summaries if the timeseries was not changed since then
+      # (Note: The version is read before summarizing, so a value pushed in
+      # the mean time is going to invalidate the summaries)
+      version = series.version
+      (sumsVersion, sums) = self.sums.get(metric, (None, None))
+      if sumsVersion != version:
+
+        # Summarize timeseries
+        sums = {}
+        for summarizer in self.config.metrics[metric].instanceSummarizers():
+          sums[summarizer.name] = summarizer.calculate(series, self.parameters)
+        self.sums[metric] = (version, sums)
 
       # Collect
-      values[metric] = sums
+      values[metric] = dict(sums)
 
     return values
+
+
+class SummarizerAxisIndex(list):
+  """
+  The list of the axes, in the order they were created, indexed by the
+  canonical key of their parameters and by the value of every parameter, in
+  order to quickly look up the axis of a parameter update or the axes
+  matching some of the parameters.
+  """
+
+  def __init__(self):
+    super().__init__()
+    self.keyLookup = {}
+    self.parameterLookup = {}
+
+  def add(self, axis):
+    """
+    Add the given axis in the index
+    """
+    self.append(axis)
+    self.keyLookup[axis.key] = axis
+    for parameter in axis.key:
+      self.parameterLookup.setdefault(parameter, []).append(axis)
+
+  def find(self, parameters):
+    """
+    Return the axis with the given parameter values, or None if missing.
+
+    The parameters can be a subset of the parameters of the axis, in which
+    case the first axis created with these values is returned.
+    """
+    axis = self.keyLookup.get(parameterKey(parameters))
+    if axis is None:
+      axes = self.where(**parameters)
+      if axes:
+        axis = axes[0]
+
+    return axis
+
+  def where(self, **parameters):
+    """
+    Return the axes whose parameters have the given values, in the order
+    they were created
+    """
+    if not parameters:
+      return list(self)
+
+    # Start from the parameter with the fewest axes and filter the rest
+    candidates = sorted(
+        map(lambda kv: self.parameterLookup.get((kv[0], hashableValue(kv[1])),
+                                                []), parameters.items()),
+        key=len)
+    if len(candidates) == 1:
+      return list(candidates[0])
+
+    axes = set(map(id, candidates[0]))
+    for moreAxes in candidates[1:]:
+      axes.intersection_update(map(id, moreAxes))
+    return list(filter(lambda axis: id(axis) in axes, candidates[0]))
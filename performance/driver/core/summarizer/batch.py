@@ -0,0 +1,183 @@
+# NOTE: The following block is needed only when sphinx is parsing this file
+#       in order to generate the documentation. It's not really useful for
+#       the logic of the file itself.
+try:
+  import numpy as np
+  from scipy import stats
+except ImportError:
+  import logging
+  logging.error(
+      'One or more libraries required by core.summarizer.batch '
+      'were not installed. The driver might not function properly.')
+
+
+class TimeseriesBatch:
+  """
+  The values of a metric in many axes, packed in a single ragged structure
+  (the concatenated `values` and the `offsets` where the values of every axis
+  start), in order to calculate the summaries of all the axes at once with a
+  few vectorized numpy calls.
+
+  Every summary method returns an array with one value for every axis, that is
+  equal to the one the respective built-in summarizer would calculate for the
+  timeseries of the axis.
+  """
+
+  def __init__(self, values, offsets):
+    self.values = values
+    self.offsets = offsets
+    self.counts = np.diff(offsets)
+    self.starts = offsets[:-1]
+    self.segments = np.repeat(np.arange(len(self.counts)), self.counts)
+    self.sortedValues = None
+    self.filtered = {}
+
+  @staticmethod
+  def fromTimeseries(timeseries):
+    """
+    Pack the values of the given list of timeseries in a batch
+    """
+    offsets = np.zeros(len(timeseries) + 1, dtype=np.int64)
+    np.cumsum(list(map(len, timeseries)), out=offsets[1:])
+    if offsets[-1] == 0:
+      values = np.empty(0, dtype=np.float64)
+    else:
+      values = np.concatenate(list(map(lambda series: series.data, timeseries)))
+
+    return TimeseriesBatch(values, offsets)
+
+  def __len__(self):
+    return len(self.counts)
+
+  def reduce(self, ufunc, values=None):
+    """
+    Reduce the values of every axis with the given numpy ufunc (ex. `np.add`),
+    returning 0 for the axes without values
+    """
+    if values is None:
+      values = self.values
+    result = np.zeros(len(self.counts), dtype=np.float64)
+    nonEmpty = self.counts > 0
+    if values.size:
+      # (Note: The empty axes are skipped, since they would take the next
+      # value, and the remaining values are consecutive)
+      result[nonEmpty] = ufunc.reduceat(values, self.starts[nonEmpty])
+    return result
+
+  def sorted(self):
+    """
+    Return the values sorted within every axis
+    """
+    if self.sortedValues is None:
+      self.sortedValues = self.values[np.lexsort((self.values, self.segments))]
+    return self.sortedValues
+
+  def pick(self, values, index):
+    """
+    Return the value at the given index within every axis from the given
+    values, or 0 for the axes without values
+    """
+    result = np.zeros(len(self.counts), dtype=np.float64)
+    nonEmpty = self.counts > 0
+    result[nonEmpty] = values[self.starts[nonEmpty] + index[nonEmpty]]
+    return result
+
+  def sum(self):
+    """
+    The sum of the values of every axis
+    """
+    return self.reduce(np.add)
+
+  def min(self):
+    """
+    The minimum value of every axis
+    """
+    return self.reduce(np.minimum)
+
+  def max(self):
+    """
+    The maximum value of every axis
+    """
+    return self.reduce(np.maximum)
+
+  def mean(self):
+    """
+    The mean value of every axis
+    """
+    return self.sum() / np.maximum(self.counts, 1)
+
+  def variance(self):
+    """
+    The (population) variance of every axis
+    """
+    deviation = self.values - self.mean()[self.segments]
+    return self.reduce(np.add, deviation * deviation) / np.maximum(
+        self.counts, 1)
+
+  def sdeviation(self):
+    """
+    The (population) standard deviation of every axis
+    """
+    return np.sqrt(self.variance())
+
+  def median(self):
+    """
+    The middle value of every axis, like the `median` built-in summarizer
+    """
+    return self.pick(self.sorted(), np.round(self.counts / 2).astype(np.int64))
+
+  def exactMedian(self):
+    """
+    The median of every axis, like `np.median`
+    """
+    values = self.sorted()
+    return (self.pick(values, (self.counts - 1) // 2) + self.pick(
+        values, self.counts // 2)) / 2
+
+  def percentile(self, q):
+    """
+    The `q`-th percentile of every axis, like `np.percentile`
+    """
+    values = self.sorted()
+    position = q / 100 * np.maximum(self.counts - 1, 0)
+    lower = np.floor(position).astype(np.int64)
+    upper = np.ceil(position).astype(np.int64)
+    lowerValue = self.pick(values, lower)
+    return lowerValue + (self.pick(values, upper) - lowerValue) * (
+        position - lower)
+
+  def confidenceInterval(self, confidence=0.975):
+    """
+    The `(mean, error margin)` tuples of every axis, like
+    `util.confidence_interval`
+    """
+    mean = self.mean()
+    with np.errstate(divide='ignore', invalid='ignore'):
+      tCritical = stats.t.ppf(q=confidence, df=self.counts - 1)
+      sigma = self.sdeviation() / np.sqrt(self.counts)
+      margin = tCritical * sigma
+
+    return list(
+        map(lambda i: (mean[i], margin[i]) if self.counts[i] else (0.0, 0.0),
+            range(0, len(self.counts))))
+
+  def rejectOutliers(self, m=2.):
+    """
+    Return a new batch without the outliers of every axis, like
+    `util.reject_outliers`
+    """
+    if m in self.filtered:
+      return self.filtered[m]
+
+    d = np.abs(self.values - self.exactMedian()[self.segments])
+    mdev = TimeseriesBatch(d, self.offsets).exactMedian()[self.segments]
+    with np.errstate(divide='ignore', invalid='ignore'):
+      s = np.where(mdev != 0, d / mdev, 0.)
+    mask = s < m
+
+    offsets = np.zeros(len(self.offsets), dtype=np.int64)
+    np.cumsum(
+        np.bincount(self.segments[mask], minlength=len(self.counts)),
+        out=offsets[1:])
+    self.filtered[m] = TimeseriesBatch(self.values[mask], offsets)
+    return self.filtered[m]
@@ -1,79 +1,89 @@
+import math
+
 from collections import Counter
+from .batch import TimeseriesBatch
 from .timeseries import SummarizerAxisTimeseries
 from .util import confidence_interval
 
+# (Note: The following summarizers are operating on the raw values of the
+# timeseries when they are available, otherwise they are using the running
+# statistics and the histogram collected while the values were pushed)
+
 
 def sum(timeseries: SummarizerAxisTimeseries, param: dict):
   """
   Summarize the values of the given timeseries
   """
-  v_sum = 0
-  for ts, value in timeseries.values:
-    v_sum += value
+  if not timeseries.keepRaw:
+    return timeseries.stats.sum
 
-  return v_sum
+  return timeseries.data.sum()
 
 
 def min(timeseries: SummarizerAxisTimeseries, param: dict):
   """
   Get the minimum of the values
   """
-  if len(timeseries.values) < 1:
+  if not timeseries.keepRaw:
+    return timeseries.stats.min or 0
+  if len(timeseries) < 1:
     return 0
 
-  v_min = timeseries.values[0][1]
-  for ts, value in timeseries.values:
-    if value < v_min:
-      v_min = value
-
-  return v_min
+  return timeseries.data.min()
 
 
 def max(timeseries: SummarizerAxisTimeseries, param: dict):
   """
   Get the maximum of the values
   """
-  if len(timeseries.values) < 1:
+  if not timeseries.keepRaw:
+    return timeseries.stats.max or 0
+  if len(timeseries) < 1:
     return 0
 
-  v_max = timeseries.values[0][1]
-  for ts, value in timeseries.values:
-    if value > v_max:
-      v_max = value
-
-  return v_max
+  return timeseries.data.max()
 
 
 def mean(timeseries: SummarizerAxisTimeseries, param: dict):
   """
   Calculate the mean of the timeseries
   """
-  v_mean = 0
-  for ts, value in timeseries.values:
-    v_mean += value
-
-  # Average
-  count = len(timeseries.values)
-  if count == 0:
+  if not timeseries.keepRaw:
+    return timeseries.stats.mean
+  if len(timeseries) == 0:
     return 0
-  return v_mean / count
+
+  return timeseries.data.mean()
 
 
 def median(timeseries: SummarizerAxisTimeseries, param: dict):
   """
   Calculate the median of the timeseries
   """
-  values = sorted(list(map(lambda v: v[1], timeseries.values)))
+  if not timeseries.keepRaw:
+    return timeseries.histogram.percentile(50)
+  if len(timeseries) == 0:
+    return 0
 
   # Return middle value
-  return values[round(len(values) / 2)]
+  # (Note: Partitioning the values is enough for finding the middle value,
+  # without sorting all of them)
+  middle = round(len(timeseries) / 2)
+  values = timeseries.data.copy()
+  values.partition(middle)
+  return values[middle]
 
 
 def mode(timeseries: SummarizerAxisTimeseries, param: dict):
   """
   Calculate the mode of the timeseries
   """
-  values = sorted(list(map(lambda v: v[1], timeseries.values)))
+  if not timeseries.keepRaw:
+    return timeseries.histogram.mode()
+  if len(timeseries) == 0:
+    return 0
+
+  values = sorted(timeseries.data.tolist())
 
   # Return the most-frequently encountered value
   data = Counter(values)
@@ -84,25 +94,19 @@ def variance(timeseries: SummarizerAxisTimeseries, param: dict):
   """
   Calculate the variance of the timeseries
   """
-  v_mean = mean(timeseries)
-
-  # Calculate variance
-  v_variance = 0
-  for ts, value in timeseries.values():
-    v_variance = (value - v_mean)**2
-
-  # Average
-  v_variance = len(timeseries.values)
-  if v_variance == 0:
+  if not timeseries.keepRaw:
+    return timeseries.stats.variance()
+  if len(timeseries) == 0:
     return 0
-  return mean / v_variance
+
+  return timeseries.data.var()
 
 
 def sdeviation(timeseries: SummarizerAxisTimeseries, param: dict):
   """
   Calculate the standard deviation
   """
-  return sqrt(variance(timeseries))
+  return math.sqrt(variance(timeseries, param))
 
 
 def mean_err(timeseries: SummarizerAxisTimeseries, param: dict):
@@ -110,3 +114,17 @@ def mean_err(timeseries: SummarizerAxisTimeseries, param: dict):
   Calculate the sample mean, including confidence interval
   """
   return confidence_interval(timeseries)
+
+
+# The summarizers above that can also summarize the values of many axes at
+# once, and the respective `TimeseriesBatch` method
+BATCH_SUMMARIZERS = {
+    'sum': TimeseriesBatch.sum,
+    'min': TimeseriesBatch.min,
+    'max': TimeseriesBatch.max,
+    'mean': TimeseriesBatch.mean,
+    'median': TimeseriesBatch.median,
+    'variance': TimeseriesBatch.variance,
+    'sdeviation': TimeseriesBatch.sdeviation,
+    'mean_err': TimeseriesBatch.confidenceInterval,
+}
@@ -1,15 +1,19 @@
 import logging
 import time
 
-from .axis import SummarizerAxis
-from performance.driver.core.events import ParameterUpdateEvent, RestartEvent, FlagUpdateEvent, MetricUpdateEvent
+from .axis import SummarizerAxis, SummarizerAxisIndex
+from .batch import TimeseriesBatch
+from performance.driver.core.events import ParameterUpdateEvent, RestartEvent, FlagUpdateEvent, MetricUpdateEvent, \
+  SummaryUpdateEvent, TickEvent
 from performance.driver.core.reflection import subscribesToHint, publishesHint
 from performance.driver.core.eventbus import EventBusSubscriber
+from performance.driver.core.traces import TraceIndex
+from performance.driver.core.utils import parseTimeExpr
 from threading import Lock
 
 
 class Summarizer(EventBusSubscriber):
-  @subscribesToHint(ParameterUpdateEvent, FlagUpdateEvent)
+  @subscribesToHint(ParameterUpdateEvent, FlagUpdateEvent, TickEvent)
   def __init__(self, eventbus, config):
     """
     Summarizer collects all the metric updates into an axis/timeseries matrix
@@ -17,8 +21,8 @@ class Summarizer(EventBusSubscriber):
     EventBusSubscriber.__init__(self, eventbus)
     self.logger = logging.getLogger('Summarizer')
     self.config = config
-    self.axes = []
-    self.axisLookup = {}
+    self.axes = SummarizerAxisIndex()
+    self.axisLookup = TraceIndex()
     self.axisLookupMutex = Lock()
     self.started = None
 
@@ -31,6 +35,16 @@ class Summarizer(EventBusSubscriber):
     self.eventbus.subscribe(
         self.handleFlagUpdateEvent, events=(FlagUpdateEvent, ))
 
+    # If requested, periodically publish the live summaries of the axes
+    summariesConfig = config.summaries
+    self.summaryInterval = parseTimeExpr(summariesConfig.get('interval', None))
+    self.summaryPercentiles = summariesConfig.get('percentiles', [50, 90, 99])
+    self.summaryVersions = {}
+    self.summaryMutex = Lock()
+    self.lastSummaryTs = time.time()
+    if self.summaryInterval:
+      self.eventbus.subscribe(self.handleTickEvent, events=(TickEvent, ))
+
   def raw(self):
     """
     Collect all values in raw timeseries format
@@ -49,6 +63,8 @@ class Summarizer(EventBusSubscriber):
     """
     Summarive the values with the rules specified
     """
+    self.sumBatch()
+
     data = []
     for axis in self.axes:
       data.append({
@@ -59,16 +75,102 @@ class Summarizer(EventBusSubscriber):
 
     return data
 
+  def sumBatch(self):
+    """
+    Summarize the changed timeseries of all the axes at once, for the metrics
+    whose summarizers all support batch calculation. The summaries are then
+    re-used by `SummarizerAxis.sum`.
+    """
+    # (Note: The batches are not used when the values are spilled in the
+    # column store, since they would load the values of all the axes)
+    if not self.config.instanceStorage() is None:
+      return
+
+    for metric, config in self.config.metrics.items():
+      summarizers = config.instanceSummarizers()
+      if not config.raw or not all(map(lambda s: s.supportsBatch(),
+                                       summarizers)):
+        continue
+
+      # Collect the axes whose summaries need to be calculated
+      axes = []
+      versions = []
+      for axis in list(self.axes):
+        version = axis.timeseries[metric].version
+        if axis.sums.get(metric, (None, None))[0] != version:
+          axes.append(axis)
+          versions.append(version)
+      if not axes:
+        continue
+
+      # Summarize all of them at once
+      batch = TimeseriesBatch.fromTimeseries(
+          list(map(lambda axis: axis.timeseries[metric], axes)))
+      parameters = list(map(lambda axis: axis.parameters, axes))
+      results = {}
+      for summarizer in summarizers:
+        results[summarizer.name] = summarizer.calculateBatch(batch, parameters)
+
+      # Update the summaries of the axes
+      for i, axis in enumerate(axes):
+        axis.sums[metric] = (versions[i], dict(
+            map(lambda kv: (kv[0], kv[1][i]), results.items())))
+
+  def axesWhere(self, **parameters):
+    """
+    Return the axes whose parameters have the given values (ex. all the axes
+    where `instances=100`)
+    """
+    with self.axisLookupMutex:
+      return self.axes.where(**parameters)
+
   def indicators(self):
     """
     Summarize the entire all the test runs to scalar indicators
     """
+    self.sumBatch()
+
     data = {}
     for indicator, config in self.config.indicators.items():
       data[indicator] = config.instance().calculate(self.axes)
 
     return data
 
+  @publishesHint(SummaryUpdateEvent)
+  def publishSummaries(self):
+    """
+    Publish the live summaries of the axes that were updated since the
+    previous summary. The summaries are calculated incrementally, from the
+    running statistics of the timeseries.
+    """
+    with self.axisLookupMutex:
+      axes = list(self.axes)
+
+    summaries = []
+    for axis in axes:
+      version = axis.version
+      if self.summaryVersions.get(axis.key, 0) == version:
+        continue
+      self.summaryVersions[axis.key] = version
+      summaries.append({
+          "parameters": axis.parameters,
+          "values": axis.snapshot(self.summaryPercentiles),
+          "flags": axis.flags
+      })
+
+    if summaries:
+      self.eventbus.publish(SummaryUpdateEvent(summaries))
+
+  def handleTickEvent(self, event):
+    """
+    Publish the live summaries when the summary interval has passed
+    """
+    with self.summaryMutex:
+      if event.ts - self.lastSummaryTs < self.summaryInterval:
+        return
+      self.lastSummaryTs = event.ts
+      self.publishSummaries()
+
   def handleFlagUpdateEvent(self, event):
     """
     Handle flag update
@@ -81,9 +183,8 @@ class Summarizer(EventBusSubscriber):
 
     # Update the flags of matched axes
     with self.axisLookupMutex:
-      for traceid in event.traceids:
-        if traceid in self.axisLookup:
-          self.axisLookup[traceid].flag(event.name, event.value)
+      for axis in self.axisLookup.findAll(event.traceids):
+        axis.flag(event.name, event.value)
 
   def handleParameterUpdateEvent(self, event):
     """
@@ -99,30 +200,25 @@ class Summarizer(EventBusSubscriber):
     if self.started is None:
       self.started = event.ts
 
-    # Locate the axis whose parameters match the ones received
-    axis = None
-    for checkAxis in self.axes:
-      if checkAxis.matches(event.parameters):
+    with self.axisLookupMutex:
 
-        # If the check axis does not track the trace id of the event,
-        # extend it to support it
-        if not event.hasTraces(checkAxis.traceids):
-          checkAxis.traceids.update(event.traceids)
+      # Locate the axis whose parameters match the ones received
+      axis = self.axes.find(event.parameters)
+      if not axis is None:
 
-        # Break the correct axis
-        axis = checkAxis
-        break
+        # If the axis does not track the trace id of the event,
+        # extend it to support it
+        if not event.hasTraces(axis.traceids):
+          axis.traceids.update(event.traceids)
 
-    # If there is no parameter match, create new axis
-    if axis is None:
-      axis = SummarizerAxis(self.config, event.parameters, event.traceids)
-      self.axes.append(axis)
+      # If there is no parameter match, create new axis
+      else:
+        axis = SummarizerAxis(self.config, event.parameters, event.traceids)
+        self.axes.add(axis)
 
-    # Index them with their trace IDs in order to quickly look them up
-    # when tracking a metric
-    with self.axisLookupMutex:
-      for traceid in event.traceids:
-        self.axisLookup[traceid] = axis
+      # Index them with their trace IDs in order to quickly look them up
+      # when tracking a metric
+      self.axisLookup.add(event.traceids, axis)
 
   @publishesHint(MetricUpdateEvent)
   def trackMetric(self, name, value, traceids):
@@ -132,12 +228,8 @@ class Summarizer(EventBusSubscriber):
     self.logger.info('Metric {} changed to {}'.format(name, str(value)))
 
     # Locate the axis that can track the metric update
-    axis = None
     with self.axisLookupMutex:
-      for traceid in traceids:
-        if traceid in self.axisLookup:
-          axis = self.axisLookup[traceid]
-          break
+      axis = self.axisLookup.find(traceids)
 
     # We cannot continue without axis
     if axis is None:
@@ -150,4 +242,4 @@ class Summarizer(EventBusSubscriber):
 
     # Publish the metric update event in order for the real-time
     # subsystems to be notified for this action
-    self.eventbus.publish(MetricUpdateEvent(name, value, axis))
+    self.eventbus.publish(MetricUpdateEvent(name, value, traceid=traceids))
@@ -1,17 +1,219 @@
 import time
 
+from threading import Lock
+
+from performance.driver.core.utils import LogHistogram, RunningStats
+
+# NOTE: The following block is needed only when sphinx is parsing this file
+#       in order to generate the documentation. It's not really useful for
+#       the logic of the file itself.
+try:
+  import numpy as np
+except ImportError:
+  import logging
+  logging.error(
+      'One or more libraries required by core.summarizer.timeseries '
+      'were not installed. The driver might not function properly.')
+
 
 class SummarizerAxisTimeseries:
-  def __init__(self, name, config):
-    """
-    This structure just keeps track of the value evolution over time
-    """
+  """
+  This structure just keeps track of the value evolution over time.
+
+  The timestamps and the values are kept in two separate, contiguous `float64`
+  buffers that grow as needed. The `timestamps` and `data` properties are
+  zero-copy numpy views of the values collected so far, so the summarizers can
+  operate on them directly.
+
+  When the metric is configured not to keep the raw values (`raw: no`), or if
+  `streaming` is requested (ex. for the live summaries), the running
+  statistics (`stats`) and a mergeable histogram (`histogram`) of the values
+  are updated on every push instead, so the summarizers can operate in
+  bounded memory. Otherwise they are None and the summaries are calculated
+  from the raw values.
+  """
+
+  def __init__(self, name, config, capacity=64, streaming=False):
     self.name = name
     self.config = config
-    self.values = []
+    self.keepRaw = getattr(config, 'raw', True)
+    self.version = 0
+    self.length = 0
+    if not self.keepRaw:
+      capacity = 0
+    self.tsBuffer = np.empty(capacity, dtype=np.float64)
+    self.valueBuffer = np.empty(capacity, dtype=np.float64)
+    self.stats = None
+    self.histogram = None
+    if streaming or not self.keepRaw:
+      self.stats = RunningStats()
+      self.histogram = LogHistogram()
+    self.lock = Lock()
+
+  @staticmethod
+  def fromArrays(name, config, timestamps, data):
+    """
+    Create a new timeseries with the given timestamps and values
+
+    (Note: The running statistics are not calculated for this timeseries,
+    since it always keeps the raw values)
+    """
+    timeseries = SummarizerAxisTimeseries(name, None, max(len(data), 1))
+    timeseries.config = config
+    timeseries.tsBuffer[:len(data)] = timestamps
+    timeseries.valueBuffer[:len(data)] = data
+    timeseries.length = len(data)
+    return timeseries
 
   def push(self, value):
     """
     Push a value in the time series
     """
-    self.values.append((time.time(), value))
+    with self.lock:
+      self.version += 1
+      if not self.stats is None:
+        self.stats.add(value)
+        self.histogram.add(value)
+      if not self.keepRaw:
+        return
+
+      # Make room for the value when the buffers are full
+      if self.length == len(self.valueBuffer):
+        self._reserve()
+
+      length = self.length
+      self.tsBuffer[length] = time.time()
+      self.valueBuffer[length] = value
+      self.length = length + 1
+
+  def _reserve(self):
+    """
+    Make room for more values in the buffers, by doubling their size
+    """
+    self.tsBuffer = self._grow(self.tsBuffer)
+    self.valueBuffer = self._grow(self.valueBuffer)
+
+  def _grow(self, buffer):
+    """
+    Return a copy of the given buffer with twice it's size
+    """
+    newBuffer = np.empty(len(buffer) * 2, dtype=np.float64)
+    newBuffer[:len(buffer)] = buffer
+    return newBuffer
+
+  def snapshot(self, percentiles=(50, 90, 99)):
+    """
+    Return the count, mean, min, max and the given percentiles of the values
+    collected so far, from the running statistics and the histogram, without
+    scanning the raw values (unless they are not maintained)
+    """
+    if self.stats is None:
+      data = self.data
+      summary = {
+          'count': len(data),
+          'mean': float(np.mean(data)) if len(data) else 0.0,
+          'min': float(np.min(data)) if len(data) else None,
+          'max': float(np.max(data)) if len(data) else None
+      }
+      for q in percentiles:
+        summary['p{:g}'.format(q)] = \
+          float(np.percentile(data, q)) if len(data) else 0
+      return summary
+
+    with self.lock:
+      summary = {
+          'count': self.stats.count,
+          'mean': self.stats.mean,
+          'min': self.stats.min,
+          'max': self.stats.max
+      }
+      for q in percentiles:
+        summary['p{:g}'.format(q)] = self.histogram.percentile(q)
+
+    return summary
+
+  @property
+  def timestamps(self):
+    """
+    The timestamps of the values, as a numpy array
+    """
+    return self.tsBuffer[:self.length]
+
+  @property
+  def data(self):
+    """
+    The values, as a numpy array
+    """
+    return self.valueBuffer[:self.length]
+
+  @property
+  def values(self):
+    """
+    The list of `(timestamp, value)` tuples of the timeseries
+    """
+    return self.raw()
+
+  def raw(self):
+    """
+    Return the JSON-serializable list of `(timestamp, value)` tuples of the
+    timeseries
+    """
+    return list(zip(self.timestamps.tolist(), self.data.tolist()))
+
+  def __len__(self):
+    return self.length
+
+
+class MappedSummarizerAxisTimeseries(SummarizerAxisTimeseries):
+  """
+  A timeseries that keeps only the most recent values in memory (the "hot"
+  window) and spills the rest in memory-mapped column files of the given
+  column store.
+
+  The `timestamps` and `data` properties are read-only numpy arrays mapped on
+  the column files, so the summarizers and the reporters can read them
+  without loading all the values in memory.
+  """
+
+  def __init__(self, name, config, store, window=4096, streaming=False):
+    super().__init__(name, config, window, streaming)
+    self.tsColumn = None
+    self.valueColumn = None
+    if self.keepRaw:
+      self.tsColumn = store.column('{}-ts'.format(name))
+      self.valueColumn = store.column(name)
+
+  def _reserve(self):
+    """
+    Make room for more values in the window, by spilling it in the columns
+    """
+    self.tsColumn.append(self.tsBuffer[:self.length])
+    self.valueColumn.append(self.valueBuffer[:self.length])
+    self.length = 0
+
+  @property
+  def timestamps(self):
+    """
+    The timestamps of the values, as a memory-mapped numpy array
+    """
+    if self.tsColumn is None:
+      return self.tsBuffer[:0]
+    with self.lock:
+      self._reserve()
+      return self.tsColumn.array()
+
+  @property
+  def data(self):
+    """
+    The values, as a memory-mapped numpy array
+    """
+    if self.valueColumn is None:
+      return self.valueBuffer[:0]
+    with self.lock:
+      self._reserve()
+      return self.valueColumn.array()
+
+  def __len__(self):
+    if self.valueColumn is None:
+      return 0
+    return len(self.valueColumn) + self.length
@@ -16,21 +16,24 @@ except ImportError:
 def reject_outliers(timeseries: SummarizerAxisTimeseries, m=2.):
   """
   Helper function to reject outliers of time series
+
+  (Note: The outliers can be rejected only if the raw values of the time
+  series are kept)
   """
-  if len(timeseries.values) == 0:
+  if not timeseries.keepRaw or len(timeseries) == 0:
     return timeseries
 
-  ts_array = np.array(timeseries.values)
-  data = ts_array[:, 1]
+  data = timeseries.data
 
   d = np.abs(data - np.median(data))
   mdev = np.median(d)
   s = d / mdev if mdev else np.repeat(0., len(data))
 
   # Compose new timeseries
-  ntimeseries = SummarizerAxisTimeseries(timeseries.name, timeseries.config)
-  ntimeseries.values = list(ts_array[s < m])
-  return ntimeseries
+  mask = s < m
+  return SummarizerAxisTimeseries.fromArrays(
+      timeseries.name, timeseries.config, timeseries.timestamps[mask],
+      data[mask])
 
 
 def confidence_interval(timeseries: SummarizerAxisTimeseries,
@@ -39,20 +42,27 @@ def confidence_interval(timeseries: SummarizerAxisTimeseries,
   Calculate the error margin of the given distribution, for the given
   confidence level
   """
-  if len(timeseries.values) == 0:
-    return (0.0, 0.0)
+  if not timeseries.keepRaw:
+    sample_size = timeseries.stats.count
+    if sample_size == 0:
+      return (0.0, 0.0)
+    sample_mean = timeseries.stats.mean
+    sample_stdev = timeseries.stats.sdeviation()
 
-  data = np.array(timeseries.values)[:, 1]
-  sample_size = len(data)
-  sample_mean = data.mean()
+  else:
+    if len(timeseries) == 0:
+      return (0.0, 0.0)
+    data = timeseries.data
+    sample_size = len(data)
+    sample_mean = data.mean()
+    sample_stdev = data.std()
 
   # We don't know the population standard deviation, so we are using the
   # sample's standard deviation and the t-distribution
   t_critical = stats.t.ppf(q=confidence, df=sample_size - 1)
-  sample_stdev = data.std()
 
   # Standard deviation estimate
   sigma = sample_stdev / np.sqrt(sample_size)
 
   # Return sample mean and the error margin
-  return (data.mean(), t_critical * sigma)
+  return (sample_mean, t_critical * sigma)
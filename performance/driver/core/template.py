@@ -3,6 +3,8 @@ import time
 import uuid
 import logging
 
+from collections import ChainMap
+
 PATHCOMP = re.compile(r'([\\/]|\.\.)')
 MACRO = re.compile(r'{{(.*?)}}')
 METHOD = re.compile(r'([\w_]+)\((.*)\)')
@@ -65,6 +67,31 @@ def toTemplate(obj):
   return obj
 
 
+def compileTemplate(obj, props, varying=()):
+  """
+  Compile the given object (that might contain templates) with the properties
+  that do not change, returning a `CompiledTemplate`
+  """
+  obj = toTemplate(obj)
+  if isinstance(obj, Template):
+    return obj.compile(props, varying)
+
+  return CompiledTemplate(lambda values: obj, static=True)
+
+
+def isVaryingExpr(expr, varying):
+  """
+  Check if the value of the given macro expression might change between the
+  renders of a compiled template, because it's referring to one of the
+  `varying` properties or because it's calling a method (ex. `uuid()`)
+  """
+  for cond in expr.split("|"):
+    if cond in varying or METHOD.match(cond):
+      return True
+
+  return False
+
+
 def evaluateValue(expr, props):
   """
   Evaluate the given macro method
@@ -109,6 +136,27 @@ def evaluateExpr(expr, props):
   return ""
 
 
+class CompiledTemplate:
+  """
+  A template that is pre-rendered with the properties that do not change,
+  keeping only the macros that depend on the `varying` properties to be
+  rendered on every `apply`.
+
+  If the template has no such macros it's `static`, and `apply` always returns
+  the same, pre-rendered, object.
+  """
+
+  def __init__(self, render, static=False):
+    self.render = render
+    self.static = static
+
+  def apply(self, values={}):
+    """
+    Render the template with the given values of the varying properties
+    """
+    return self.render(values)
+
+
 class Template:
   """
   Base template class used solely for type hinting through multiple inheritance
@@ -126,6 +174,13 @@ class Template:
     """
     return self
 
+  def compile(self, props, varying=()):
+    """
+    Return a `CompiledTemplate` that renders the template with the given
+    properties, extended with the values of the `varying` properties
+    """
+    return CompiledTemplate(lambda values: self, static=True)
+
 
 class TemplateString(str, Template):
   """
@@ -149,6 +204,38 @@ class TemplateString(str, Template):
 
     return MACRO.sub(repl, self)
 
+  def compile(self, props, varying=()):
+    """
+    Pre-render the macros that do not refer to the `varying` properties and
+    split the string in segments, so only the remaining macros are evaluated
+    on every render, without parsing the string again
+    """
+    segments = []
+    literal = ''
+    for i, part in enumerate(MACRO.split(self)):
+      # (Note: The odd parts are the expressions of the macros)
+      if i % 2 and isVaryingExpr(part, varying):
+        segments.append(literal)
+        segments.append(part)
+        literal = ''
+      elif i % 2:
+        literal += evaluateExpr(part, props)
+      else:
+        literal += part
+    segments.append(literal)
+
+    if len(segments) == 1:
+      return CompiledTemplate(lambda values: literal, static=True)
+
+    def render(values):
+      chain = ChainMap(values, props)
+      return ''.join([
+          evaluateExpr(segment, chain) if i % 2 else segment
+          for i, segment in enumerate(segments)
+      ])
+
+    return CompiledTemplate(render)
+
 
 class TemplateList(list, Template):
   """
@@ -175,6 +262,18 @@ class TemplateList(list, Template):
     return list(
         map(lambda x: x.apply(props) if isinstance(x, Template) else x, self))
 
+  def compile(self, props, varying=()):
+    """
+    Compile every item of the list
+    """
+    items = list(map(lambda x: compileTemplate(x, props, varying), self))
+    if all(map(lambda item: item.static, items)):
+      rendered = list(map(lambda item: item.apply(), items))
+      return CompiledTemplate(lambda values: rendered, static=True)
+
+    return CompiledTemplate(
+        lambda values: list(map(lambda item: item.apply(values), items)))
+
 
 class TemplateDict(dict, Template):
   """
@@ -200,3 +299,17 @@ class TemplateDict(dict, Template):
     Replace all string keys with template string
     """
     return dict(map(lambda kv: (kv[0], kv[1].apply(props)) if isinstance(kv[1], Template) else kv, self.items()))
+
+  def compile(self, props, varying=()):
+    """
+    Compile every value of the dict
+    """
+    items = dict(
+        map(lambda kv: (kv[0], compileTemplate(kv[1], props, varying)),
+            self.items()))
+    if all(map(lambda item: item.static, items.values())):
+      rendered = dict(map(lambda kv: (kv[0], kv[1].apply()), items.items()))
+      return CompiledTemplate(lambda values: rendered, static=True)
+
+    return CompiledTemplate(lambda values: dict(
+        map(lambda kv: (kv[0], kv[1].apply(values)), items.items())))
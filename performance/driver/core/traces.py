@@ -0,0 +1,179 @@
+import itertools
+import operator
+
+from functools import partial
+from threading import Lock
+
+# Monotonically increasing trace ID, allocated from a range of negative
+# integers reserved for them, so they never collide with the integer trace IDs
+# given explicitly (and still sort before them)
+# (Note: `next()` on an `itertools.count` is atomic, so it's safe to allocate
+# IDs from any thread)
+TRACE_ID_BASE = -2**62
+TRACE_ID_COUNTER = itertools.count(TRACE_ID_BASE + 1)
+
+# The integer IDs allocated for the trace IDs that are not integers
+# (ex. strings given by the user), and the reverse lookup
+TRACE_IDS = {}
+TRACE_NAMES = {}
+TRACE_IDS_LOCK = Lock()
+
+# A C-level `lambda x: x is not None`, used for filtering index lookups
+IS_NOT_NONE = partial(operator.is_not, None)
+
+
+def allocateEventId():
+  """
+  Allocate a new monotonically increasing ID in order to avoid using string IDs
+  that are less performant on resolving.
+  """
+  return next(TRACE_ID_COUNTER)
+
+
+def internTraceId(traceid):
+  """
+  Return the integer ID of the given trace ID, allocating a new one for the
+  trace IDs that are not integers. This way all the trace IDs can be compared,
+  sorted and looked up as plain integers.
+
+  Only integer and string trace IDs are accepted, since the interned IDs are
+  kept until `releaseTraceIds` is called.
+  """
+  if type(traceid) is int:
+    return traceid
+  if not type(traceid) is str:
+    raise TypeError('A trace ID must be an integer or a string, not {}'.format(
+        type(traceid).__name__))
+
+  traceIntId = TRACE_IDS.get(traceid)
+  if traceIntId is None:
+    with TRACE_IDS_LOCK:
+      traceIntId = TRACE_IDS.get(traceid)
+      if traceIntId is None:
+        traceIntId = allocateEventId()
+        TRACE_NAMES[traceIntId] = traceid
+        TRACE_IDS[traceid] = traceIntId
+
+  return traceIntId
+
+
+def releaseTraceIds():
+  """
+  Forget the integer IDs of all the interned trace IDs, so the strings are
+  not kept for the life of the process. This should be called between the
+  runs, when the traces of the previous run are completed.
+
+  (Note: The interned IDs that are still referenced are resolved to their
+  integer values from then on, and interning the same string again gives a
+  new integer ID)
+  """
+  global TRACE_IDS, TRACE_NAMES
+  with TRACE_IDS_LOCK:
+    TRACE_IDS = {}
+    TRACE_NAMES = {}
+
+
+def lookupTraceId(traceid):
+  """
+  Return the integer ID of the given trace ID, without allocating a new one
+  """
+  if type(traceid) is int:
+    return traceid
+  return TRACE_IDS.get(traceid)
+
+
+def resolveTraceIds(traceids):
+  """
+  Return a list with the original values of the given interned trace IDs
+  """
+  return list(map(TRACE_NAMES.get, traceids, traceids))
+
+
+class TraceIds(tuple):
+  """
+  The immutable collection of the trace IDs of an event.
+
+  The trace IDs are interned integers kept in a tuple, since it's a fraction
+  of the size of a set and an event rarely carries more than a few of them.
+  The most common set operations are provided for compatibility.
+  """
+
+  __slots__ = ()
+
+  def __contains__(self, traceid):
+    return tuple.__contains__(self, lookupTraceId(traceid))
+
+  def union(self, *others):
+    """
+    Return a set with the trace IDs of this and the given collections
+    """
+    return frozenset(self).union(*map(TraceIds.fromIterable, others))
+
+  def intersection(self, *others):
+    """
+    Return a set with the trace IDs common in this and the given collections
+    """
+    return frozenset(self).intersection(*map(TraceIds.fromIterable, others))
+
+  def isdisjoint(self, other):
+    """
+    Return True if none of the given trace IDs is in this collection
+    """
+    # (Note: The sets of trace IDs kept by the trackers and the summarizer are
+    # collected from the events, so they contain interned IDs)
+    if type(other) in (set, frozenset):
+      return other.isdisjoint(self)
+    return frozenset(self).isdisjoint(map(lookupTraceId, other))
+
+  @staticmethod
+  def fromIterable(traceids):
+    """
+    Return the interned trace IDs from the given iterable
+    """
+    if type(traceids) is TraceIds:
+      return traceids
+    return TraceIds(dict.fromkeys(map(internTraceId, traceids)))
+
+
+class TraceIndex(dict):
+  """
+  A dictionary that maps trace IDs to the objects tracking them (ex. the
+  tracker sessions or the summarizer axes) and answers which of them an
+  event belongs to.
+
+  The index is keyed by the interned trace IDs and all the lookups with the
+  trace IDs of an event are performed with C-level iteration, without looping
+  in python. The `keys` are reported with their original values.
+  """
+
+  def add(self, traceids, value):
+    """
+    Index the given value with all the given trace IDs
+    """
+    if not type(traceids) is TraceIds:
+      traceids = map(internTraceId, traceids)
+    self.update(dict.fromkeys(traceids, value))
+
+  def find(self, traceids):
+    """
+    Return the value of the first indexed trace ID in the given trace IDs,
+    or None if none of them is indexed
+    """
+    if not type(traceids) is TraceIds:
+      traceids = map(lookupTraceId, traceids)
+    return next(filter(IS_NOT_NONE, map(self.get, traceids)), None)
+
+  def findAll(self, traceids):
+    """
+    Return the unique values of all the indexed trace IDs in the given trace
+    IDs, in the order they were found
+    """
+    if not type(traceids) is TraceIds:
+      traceids = map(lookupTraceId, traceids)
+    return list(dict.fromkeys(filter(IS_NOT_NONE, map(self.get, traceids))))
+
+  def keys(self):
+    """
+    Return the original values of the indexed trace IDs
+    """
+    return resolveTraceIds(dict.keys(self))
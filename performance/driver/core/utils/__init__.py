@@ -2,3 +2,8 @@ from .lrudict import LRUDict
 from .http import is_accessible, wait_till_accessible
 from .dictdiff import dictDiff
 from .strutil import parseTimeExpr
+from .histogram import LogHistogram
+from .stats import RunningStats
+from .columns import ColumnFile, ColumnStore
+from .httptiming import HTTPTimings, TimingHTTPAdapter, mountTimingAdapter, \
+  timingTraceConfig
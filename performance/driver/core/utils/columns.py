@@ -0,0 +1,100 @@
+import itertools
+import os
+import re
+import tempfile
+
+from threading import Lock
+
+# NOTE: The following block is needed only when sphinx is parsing this file
+#       in order to generate the documentation. It's not really useful for
+#       the logic of the file itself.
+try:
+  import numpy as np
+except ImportError:
+  import logging
+  logging.error(
+      'One or more libraries required by core.utils.columns '
+      'were not installed. The driver might not function properly.')
+
+
+class ColumnFile:
+  """
+  An append-only file of `float64` values, that is read through a memory map.
+
+  The values are appended in blocks and the file is only opened while
+  writing, so an arbitrary number of columns can be kept without running out
+  of file descriptors.
+  """
+
+  def __init__(self, filename):
+    self.filename = filename
+    self.length = 0
+    self.mapped = None
+
+    # Truncate any left-overs from previous runs
+    open(self.filename, 'wb').close()
+
+  def append(self, values):
+    """
+    Append the given numpy array of values at the end of the file
+    """
+    if not len(values):
+      return
+    with open(self.filename, 'ab') as f:
+      f.write(np.ascontiguousarray(values, dtype=np.float64).tobytes())
+    self.length += len(values)
+
+  def array(self):
+    """
+    Return a read-only numpy array with the values in the file, that is
+    mapped in memory and loaded by the OS page-by-page when accessed
+    """
+    if self.length == 0:
+      return np.empty(0, dtype=np.float64)
+
+    # Map the file again only if values were appended since the last time
+    if self.mapped is None or len(self.mapped) != self.length:
+      self.mapped = np.memmap(
+          self.filename, dtype=np.float64, mode='r', shape=(self.length, ))
+    return self.mapped
+
+  def __len__(self):
+    return self.length
+
+
+class ColumnStore:
+  """
+  A directory where the values that should not be kept in memory are spilled,
+  as column files (ex. the timeseries of the metrics) or as plain files (ex.
+  the events traced by a reporter).
+
+  If no path is given, a temporary directory is used, that is removed when
+  the store is garbage-collected.
+  """
+
+  def __init__(self, path=None):
+    self.tempdir = None
+    if path is None:
+      self.tempdir = tempfile.TemporaryDirectory(prefix='perf-driver-')
+      path = self.tempdir.name
+    else:
+      os.makedirs(path, exist_ok=True)
+
+    self.path = path
+    self.counter = itertools.count(1)
+    self.mutex = Lock()
+
+  def filename(self, name):
+    """
+    Return a unique filename in the store for a file with the given name
+    """
+    with self.mutex:
+      index = next(self.counter)
+    return os.path.join(
+        self.path, '{:06d}-{}'.format(index, re.sub(r'[^\w.-]', '_', name)))
+
+  def column(self, name):
+    """
+    Create a new column file with the given name
+    """
+    return ColumnFile(self.filename('{}.f64'.format(name)))
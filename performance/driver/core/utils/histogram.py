@@ -0,0 +1,123 @@
+import math
+
+
+class LogHistogram:
+  """
+  A mergeable histogram with logarithmically-sized buckets, that can answer
+  percentile queries with a bounded relative error, using bounded memory.
+
+  Every positive value `v` is counted in the bucket `ceil(log(v, gamma))`,
+  where `gamma = (1 + accuracy) / (1 - accuracy)`. The percentiles are then
+  estimated within the `accuracy` relative error, regardless of the number
+  of values collected.
+  """
+
+  def __init__(self, accuracy=0.01):
+    self.accuracy = accuracy
+    self.gamma = (1 + accuracy) / (1 - accuracy)
+    self.logGamma = math.log(self.gamma)
+    self.positive = {}
+    self.negative = {}
+    self.zero = 0
+    self.count = 0
+    self.sum = 0.0
+    self.min = None
+    self.max = None
+
+  def add(self, value, count=1):
+    """
+    Collect the given value in the histogram
+    """
+    if value > 0:
+      bucket = math.ceil(math.log(value) / self.logGamma)
+      self.positive[bucket] = self.positive.get(bucket, 0) + count
+    elif value < 0:
+      bucket = math.ceil(math.log(-value) / self.logGamma)
+      self.negative[bucket] = self.negative.get(bucket, 0) + count
+    else:
+      self.zero += count
+
+    self.count += count
+    self.sum += value * count
+    if self.min is None or value < self.min:
+      self.min = value
+    if self.max is None or value > self.max:
+      self.max = value
+
+  def merge(self, other):
+    """
+    Merge the values of another histogram with the same accuracy in this one
+    """
+    if other.gamma != self.gamma:
+      raise ValueError('Cannot merge histograms of different accuracy')
+    if not other.count:
+      return
+
+    for bucket, count in other.positive.items():
+      self.positive[bucket] = self.positive.get(bucket, 0) + count
+    for bucket, count in other.negative.items():
+      self.negative[bucket] = self.negative.get(bucket, 0) + count
+    self.zero += other.zero
+
+    self.count += other.count
+    self.sum += other.sum
+    if self.min is None or other.min < self.min:
+      self.min = other.min
+    if self.max is None or other.max > self.max:
+      self.max = other.max
+
+  def mean(self):
+    """
+    Return the mean of the values collected
+    """
+    if not self.count:
+      return 0
+    return self.sum / self.count
+
+  def mode(self):
+    """
+    Estimate the most frequently encountered value of the values collected
+    """
+    if not self.count:
+      return 0
+
+    (value, count) = (0, self.zero)
+    for bucket, bucketCount in self.positive.items():
+      if bucketCount > count:
+        (value, count) = (self._bucketValue(bucket), bucketCount)
+    for bucket, bucketCount in self.negative.items():
+      if bucketCount > count:
+        (value, count) = (-self._bucketValue(bucket), bucketCount)
+
+    return max(self.min, min(self.max, value))
+
+  def percentile(self, q):
+    """
+    Estimate the `q`-th percentile (0 - 100) of the values collected
+    """
+    if not self.count:
+      return 0
+
+    # Find the rank of the value we are looking for, and walk the buckets
+    # from the smallest to the largest value
+    rank = q / 100 * (self.count - 1)
+    seen = 0
+    for bucket in sorted(self.negative.keys(), reverse=True):
+      seen += self.negative[bucket]
+      if seen > rank:
+        return min(self.max, max(self.min, -self._bucketValue(bucket)))
+    seen += self.zero
+    if seen > rank:
+      return 0
+    for bucket in sorted(self.positive.keys()):
+      seen += self.positive[bucket]
+      if seen > rank:
+        return max(self.min, min(self.max, self._bucketValue(bucket)))
+
+    return self.max
+
+  def _bucketValue(self, bucket):
+    """
+    Return the representative value of the given bucket
+    """
+    return 2 * self.gamma**bucket / (self.gamma + 1)
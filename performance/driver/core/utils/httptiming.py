@@ -0,0 +1,318 @@
+import socket
+import threading
+import time
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError
+from urllib3.util.connection import allowed_gai_family
+
+# NOTE: The following block is needed only when sphinx is parsing this file
+#       in order to generate the documentation. It's not really useful for
+#       the logic of the file itself.
+try:
+  import aiohttp
+except ImportError:
+  import logging
+  logging.error(
+      'One or more libraries required by core.utils.httptiming '
+      'were not installed. The driver might not function properly.')
+
+# The timings of the request that is currently placed by every thread
+currentRequest = threading.local()
+
+
+class HTTPTimings:
+  """
+  The durations (in seconds) of the phases of an HTTP request, measured with
+  the monotonic, high-resolution `time.perf_counter` clock:
+
+  * ``dns`` : The time it took to resolve the host name
+  * ``connect`` : The time it took to establish the TCP connection
+  * ``tls`` : The time it took to complete the TLS handshake (or `None` if
+    it's not known, in which case it's included in ``connect``)
+  * ``ttfb`` : The time from the moment the connection was ready, until the
+    response headers were received (time to first byte)
+  * ``transfer`` : The time it took to receive the response body
+  * ``total`` : The time from the beginning of the request till the end of the
+    response
+
+  When a connection is re-used, the ``dns``, ``connect`` and ``tls`` phases
+  take no time.
+  """
+
+  __slots__ = ('dns', 'connect', 'tls', 'ttfb', 'transfer', 'startedTs',
+               'connectedTs', 'sentTs', 'headersTs', 'finishedTs')
+
+  def __init__(self):
+    self.dns = 0.0
+    self.connect = 0.0
+    self.tls = 0.0
+    self.ttfb = None
+    self.transfer = None
+    self.startedTs = time.perf_counter()
+    self.connectedTs = None
+    self.sentTs = None
+    self.headersTs = None
+    self.finishedTs = None
+
+  @property
+  def total(self):
+    """
+    The time from the beginning of the request till the end of the response
+    """
+    if self.finishedTs is None:
+      return None
+    return self.finishedTs - self.startedTs
+
+  def received(self):
+    """
+    Mark the time the response headers were received
+    """
+    self.headersTs = time.perf_counter()
+    self.ttfb = self.headersTs - max(
+        filter(lambda ts: ts is not None,
+               (self.startedTs, self.connectedTs, self.sentTs)))
+
+  def finish(self):
+    """
+    Mark the time the response body was received. Only the first call has an
+    effect, so it's safe to call it more than once.
+    """
+    if self.finishedTs is not None:
+      return
+    self.finishedTs = time.perf_counter()
+    if self.headersTs is not None:
+      self.transfer = self.finishedTs - self.headersTs
+
+  def toDict(self):
+    """
+    Return the dict representation of the timings
+    """
+    return {
+        'dns': self.dns,
+        'connect': self.connect,
+        'tls': self.tls,
+        'ttfb': self.ttfb,
+        'transfer': self.transfer,
+        'total': self.total
+    }
+
+  def __repr__(self):
+    return '<HTTPTimings {}>'.format(', '.join(
+        map(lambda kv: '{}={}'.format(*kv), self.toDict().items())))
+
+
+class TimingConnectionMixin:
+  """
+  Instruments the urllib3 connections in order to measure the phases of the
+  requests placed through a `TimingHTTPAdapter`
+  """
+
+  def _new_conn(self):
+    timings = getattr(currentRequest, 'timings', None)
+    if timings is None:
+      return super()._new_conn()
+
+    # Resolve the host name separately, in order to time it (Note: If the
+    # name cannot be resolved, urllib3 is going to raise the appropriate
+    # error)
+    startedTs = time.perf_counter()
+    host = self._dns_host
+    try:
+      addresses = []
+      for res in socket.getaddrinfo(host.strip('[]'), self.port,
+                                    allowed_gai_family(), socket.SOCK_STREAM):
+        if not res[4][0] in addresses:
+          addresses.append(res[4][0])
+    except socket.gaierror:
+      addresses = []
+    if not addresses:
+      addresses = [host]
+    resolvedTs = time.perf_counter()
+
+    # Connect to the resolved addresses in turn, until one of them succeeds,
+    # like urllib3 does when it resolves the name itself
+    try:
+      for (i, address) in enumerate(addresses):
+        self._dns_host = address
+        try:
+          sock = super()._new_conn()
+          break
+        # (Note: This is also the base class of `NewConnectionError`)
+        except ConnectTimeoutError:
+          if i == len(addresses) - 1:
+            raise
+    finally:
+      self._dns_host = host
+
+    timings.connectedTs = time.perf_counter()
+    timings.dns = resolvedTs - startedTs
+    timings.connect = timings.connectedTs - resolvedTs
+    return sock
+
+  def request(self, *args, **kwargs):
+    timings = getattr(currentRequest, 'timings', None)
+    if timings is not None:
+      timings.sentTs = time.perf_counter()
+    return super().request(*args, **kwargs)
+
+  def getresponse(self, *args, **kwargs):
+    timings = getattr(currentRequest, 'timings', None)
+    response = super().getresponse(*args, **kwargs)
+    if timings is None:
+      return response
+
+    # The response body is completely read when the connection is released
+    timings.received()
+    releaseConn = response.release_conn
+
+    def finishAndRelease():
+      timings.finish()
+      releaseConn()
+
+    response.release_conn = finishAndRelease
+    return response
+
+
+class TimingHTTPConnection(TimingConnectionMixin, HTTPConnection):
+  """
+  An HTTP connection that measures the phases of the requests
+  """
+
+
+class TimingHTTPSConnection(TimingConnectionMixin, HTTPSConnection):
+  """
+  An HTTPS connection that measures the phases of the requests, including
+  the TLS handshake
+  """
+
+  def connect(self):
+    timings = getattr(currentRequest, 'timings', None)
+    if timings is None:
+      return super().connect()
+
+    startedTs = time.perf_counter()
+    super().connect()
+    timings.connectedTs = time.perf_counter()
+    timings.tls = max(0.0, timings.connectedTs - startedTs - timings.dns -
+                      timings.connect)
+
+
+class TimingHTTPConnectionPool(HTTPConnectionPool):
+  ConnectionCls = TimingHTTPConnection
+
+
+class TimingHTTPSConnectionPool(HTTPSConnectionPool):
+  ConnectionCls = TimingHTTPSConnection
+
+
+class TimingHTTPAdapter(HTTPAdapter):
+  """
+  A `requests` transport adapter that measures the phases of every request,
+  exposing them as the `timings` (`HTTPTimings`) field of the response.
+
+  The ``transfer`` phase is completed when the response body is read. When
+  the body is streamed, it's completed when it's entirely consumed, or when
+  `timings.finish()` is called.
+
+  ::
+
+    session = requests.Session()
+    mountTimingAdapter(session)
+  """
+
+  def init_poolmanager(self, *args, **kwargs):
+    super().init_poolmanager(*args, **kwargs)
+    self.poolmanager.pool_classes_by_scheme = {
+        'http': TimingHTTPConnectionPool,
+        'https': TimingHTTPSConnectionPool
+    }
+
+  def send(self, request, *args, **kwargs):
+    timings = HTTPTimings()
+    currentRequest.timings = timings
+    try:
+      response = super().send(request, *args, **kwargs)
+    finally:
+      currentRequest.timings = None
+
+    response.timings = timings
+    return response
+
+
+def mountTimingAdapter(session, **kwargs):
+  """
+  Mount a `TimingHTTPAdapter` (created with the given arguments) on the given
+  `requests` session, for both the HTTP and HTTPS requests
+  """
+  adapter = TimingHTTPAdapter(**kwargs)
+  session.mount('http://', adapter)
+  session.mount('https://', adapter)
+  return session
+
+
+def timingTraceConfig():
+  """
+  Create an `aiohttp` trace config that measures the phases of the requests
+  that are given an `HTTPTimings` object as their `trace_request_ctx`.
+
+  The TLS handshake is not traced by `aiohttp`, so it's included in the
+  ``connect`` phase, and the ``transfer`` phase is completed when
+  `timings.finish()` is called after reading the body.
+  """
+
+  def timingsOf(context):
+    timings = context.trace_request_ctx
+    if isinstance(timings, HTTPTimings):
+      return timings
+    return None
+
+  async def onRequestStart(session, context, params):
+    context.dnsStartedTs = None
+    context.connectStartedTs = None
+    timings = timingsOf(context)
+    if timings is not None:
+      timings.tls = None
+
+  async def onDnsResolveStart(session, context, params):
+    context.dnsStartedTs = time.perf_counter()
+
+  async def onDnsResolveEnd(session, context, params):
+    timings = timingsOf(context)
+    if timings is not None and context.dnsStartedTs is not None:
+      timings.dns = time.perf_counter() - context.dnsStartedTs
+
+  async def onConnectionCreateStart(session, context, params):
+    context.connectStartedTs = time.perf_counter()
+
+  async def onConnectionCreateEnd(session, context, params):
+    timings = timingsOf(context)
+    if timings is not None:
+      timings.connectedTs = time.perf_counter()
+
+      # (Note: The host name is resolved while the connection is created)
+      timings.connect = max(
+          0.0,
+          timings.connectedTs - context.connectStartedTs - timings.dns)
+
+  async def onConnectionReused(session, context, params):
+    timings = timingsOf(context)
+    if timings is not None:
+      timings.connectedTs = time.perf_counter()
+
+  async def onRequestEnd(session, context, params):
+    timings = timingsOf(context)
+    if timings is not None:
+      timings.received()
+
+  traceConfig = aiohttp.TraceConfig()
+  traceConfig.on_request_start.append(onRequestStart)
+  traceConfig.on_dns_resolvehost_start.append(onDnsResolveStart)
+  traceConfig.on_dns_resolvehost_end.append(onDnsResolveEnd)
+  traceConfig.on_connection_create_start.append(onConnectionCreateStart)
+  traceConfig.on_connection_create_end.append(onConnectionCreateEnd)
+  traceConfig.on_connection_reuseconn.append(onConnectionReused)
+  traceConfig.on_request_end.append(onRequestEnd)
+  return traceConfig
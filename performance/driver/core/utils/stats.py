@@ -0,0 +1,67 @@
+import math
+
+
+class RunningStats:
+  """
+  The running count, sum, minimum, maximum, mean and variance of a series of
+  values, calculated in constant memory using Welford's online algorithm.
+
+  Two instances can be merged, giving the same results as if all the values
+  were collected in one of them.
+  """
+
+  def __init__(self):
+    self.count = 0
+    self.sum = 0.0
+    self.min = None
+    self.max = None
+    self.mean = 0.0
+    self.m2 = 0.0
+
+  def add(self, value):
+    """
+    Collect the given value
+    """
+    self.count += 1
+    self.sum += value
+    if self.min is None or value < self.min:
+      self.min = value
+    if self.max is None or value > self.max:
+      self.max = value
+
+    delta = value - self.mean
+    self.mean += delta / self.count
+    self.m2 += delta * (value - self.mean)
+
+  def merge(self, other):
+    """
+    Merge the values collected by another instance in this one
+    """
+    if not other.count:
+      return
+    if not self.count:
+      self.__dict__.update(other.__dict__)
+      return
+
+    count = self.count + other.count
+    delta = other.mean - self.mean
+    self.m2 += other.m2 + delta * delta * self.count * other.count / count
+    self.mean += delta * other.count / count
+    self.count = count
+    self.sum += other.sum
+    self.min = min(self.min, other.min)
+    self.max = max(self.max, other.max)
+
+  def variance(self):
+    """
+    Return the (population) variance of the values collected
+    """
+    if not self.count:
+      return 0
+    return self.m2 / self.count
+
+  def sdeviation(self):
+    """
+    Return the (population) standard deviation of the values collected
+    """
+    return math.sqrt(self.variance())
@@ -12,8 +12,19 @@ setup(
   license = "Apache 2",
   url = "https://github.com/mesosphere/dcos-perf-test-driver",
 
+  classifiers = [
+    'Programming Language :: Python :: 3',
+    'Programming Language :: Python :: 3 :: Only',
+    'Programming Language :: Python :: 3.6',
+  ],
+
+  # The asyncio event bus needs Python 3.6, where the asyncio API is no
+  # longer provisional
+  python_requires = '>=3.6',
+
   packages = find_packages(),
   install_requires = [
+    'aiohttp>=3.0.0',
     'appdirs>=1.4.3',
     'asn1crypto>=0.22.0',
     'boto3>=1.4.4',
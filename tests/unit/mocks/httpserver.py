@@ -68,8 +68,10 @@ class MockHTTPServer:
     self.running = False
     with self.connectionsLock:
       for conn in self.connections:
+        # (Note: Shutting down both directions wakes up the connection
+        # threads that are blocked reading from the socket)
         try:
-          conn.shutdown(socket.SHUT_WR)
+          conn.shutdown(socket.SHUT_RDWR)
         except Exception as e:
           pass
         try:
@@ -78,7 +80,12 @@ class MockHTTPServer:
           pass
       self.connections = []
 
-    # Close socket and join thread
+    # Close socket and join thread (Note: On linux closing the socket does
+    # not interrupt a pending `accept`, so it has to be shut down first)
+    try:
+      self.sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+      pass
     self.sock.close()
     self.thread.join()
 
@@ -93,7 +100,7 @@ class MockHTTPServer:
     while self.running:
       try:
         connection, address = self.sock.accept()
-      except ConnectionAbortedError:
+      except OSError:
         break
 
       # Start a new thread for each connection
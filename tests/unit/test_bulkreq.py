@@ -1,3 +1,5 @@
+import gc
+import logging
 import time
 import unittest
 
@@ -7,6 +9,10 @@ from threading import Thread
 from concurrent.futures import Future
 from performance.driver.classes.channel.utils.bulk import \
   injectResultTimestampFn, Request, RequestPool, BulkRequestManager
+from performance.driver.classes.channel.utils.arrivals import arrivalSchedule
+from performance.driver.classes.channel.utils.ratelimit import TokenBucket, \
+  RateMeter
+from performance.driver.classes.channel.utils.retry import RetryPolicy
 
 def createRequestWithFuture():
   """
@@ -199,6 +205,43 @@ class TestBulkRequestManager(unittest.TestCase):
     self.assertFalse(req1.future.done())
     self.assertFalse(req2.future.done())
 
+  def test_benchmark_RequestPool(self):
+    """
+    Benchmark the cost of collecting a completed request, as the number of
+    pending requests in the pool grows
+    """
+
+    def measure(size):
+      pool = RequestPool()
+      requests = list(map(lambda i: createRequestWithFuture(), range(0, size)))
+      for request in requests:
+        pool.append(request)
+
+      # Complete the requests one by one, collecting each one of them
+      # (Note: Like `timeit`, the garbage collector is paused while measuring)
+      gc.collect()
+      gc.disable()
+      try:
+        ts = time.perf_counter()
+        for request in requests:
+          request.future.set_result(None)
+          pool.waitOne()
+        delta = time.perf_counter() - ts
+      finally:
+        gc.enable()
+
+      self.assertEqual(len(pool), 0)
+      return delta / size
+
+    small = min(map(lambda i: measure(100), range(0, 5)))
+    large = min(map(lambda i: measure(5000), range(0, 3)))
+    logging.getLogger('Benchmark').info(
+      'Request collection cost: {:.2f} us (100 pending), '
+      '{:.2f} us (5000 pending)'.format(small * 1e6, large * 1e6))
+
+    # The cost of every completion should not depend on the pool size
+    self.assertLess(large, small * 3)
+
   def test_BulkRequestManager_simple(self):
     """
     Test if the the BulkRequestManager can place a simple HTTP request
@@ -318,3 +361,245 @@ class TestBulkRequestManager(unittest.TestCase):
     self.assertEqual(len(failed), 0)
     self.assertEqual(completed[0].status_code, 200)
 
+  def test_arrivalSchedule(self):
+    """
+    Test if the open-loop arrival schedules have the requested rate
+    """
+    schedule = arrivalSchedule('constant', 10, 100)
+    self.assertEqual(list(map(lambda _: next(schedule), range(0, 3))),
+                     [100, 100.1, 100.2])
+
+    schedule = arrivalSchedule('poisson', 100, 0)
+    times = list(map(lambda _: next(schedule), range(0, 10001)))
+    self.assertEqual(times, sorted(times))
+    self.assertAlmostEqual(times[-1], 100, delta=5)
+
+    with self.assertRaises(ValueError):
+      next(arrivalSchedule('burst', 10, 0))
+
+  def test_BulkRequestManager_openloop(self):
+    """
+    Test if the the BulkRequestManager places the open-loop requests on
+    schedule, without waiting for the responses
+    """
+
+    with self.assertRaises(ValueError):
+      BulkRequestManager(arrival='constant')
+
+    requests = []
+    manager = BulkRequestManager(
+      rate=100, arrival='constant', parallel=10, successFn=requests.append)
+    server = MockHTTPServer(fakeLattency=0.5)
+
+    # Start a local mock server
+    server.start()
+    url = 'http://127.0.0.1:{}'.format(server.port)
+
+    # Schedule multiple HTTP requests
+    for i in range(0, 50):
+      manager.enqueue(Request(url))
+
+    # Execute
+    (completed, failed) = manager.execute().result()
+    manager.session.close()
+    server.stop()
+
+    # Check if the requests were placed correctly
+    self.assertEqual(server.totalRequests, 50)
+    self.assertEqual(len(completed), 50)
+    self.assertEqual(len(failed), 0)
+
+    # The requests should have been placed on their scheduled time, while
+    # the previous ones were still pending
+    self.assertGreater(server.totalConnections, 1)
+    intended = sorted(map(lambda r: r.intendedTs, requests))
+    self.assertAlmostEqual(intended[-1] - intended[0], 0.49, places=5)
+    for request in requests:
+      self.assertLess(request.lastRequest - request.intendedTs, 0.1)
+      self.assertIsNotNone(request.timings.transfer)
+
+  def test_BulkRequestManager_openloop_retry(self):
+    """
+    Test if the the BulkRequestManager re-tries the failed open-loop requests
+    without taking the slots of new arrivals
+    """
+    manager = BulkRequestManager(rate=10, arrival='constant', parallel=10,
+                                 retry=2)
+    server = MockHTTPServer(responseCode=500)
+    manager.logger.setLevel(logging.CRITICAL)
+
+    # Start a local mock server
+    server.start()
+    url = 'http://127.0.0.1:{}'.format(server.port)
+
+    # Schedule a few requests that are going to fail
+    requests = [Request(url) for i in range(0, 3)]
+    for request in requests:
+      manager.enqueue(request)
+
+    # Execute
+    startTime = time.time()
+    (completed, failed) = manager.execute().result()
+    manager.session.close()
+    server.stop()
+
+    # Every request was placed twice, but only took one arrival slot and kept
+    # the time it was originally intended to start at
+    self.assertEqual(server.totalRequests, 6)
+    self.assertEqual(len(failed), 3)
+    intended = list(map(lambda r: r.intendedTs, requests))
+    self.assertLess(intended[0] - startTime, 0.05)
+    self.assertAlmostEqual(intended[1] - intended[0], 0.1, places=5)
+    self.assertAlmostEqual(intended[2] - intended[0], 0.2, places=5)
+
+  def test_TokenBucket(self):
+    """
+    Test if the token bucket hands out slots at the given rate
+    """
+    now = [100.0]
+    sleeps = []
+    def sleep(t):
+      sleeps.append(t)
+      now[0] += t
+    bucket = TokenBucket(10, 3, clock=lambda: now[0], sleep=sleep)
+
+    # The slots are spaced by the interval
+    self.assertEqual(bucket.acquire(), 100.0)
+    self.assertAlmostEqual(bucket.acquire(), 100.1)
+    self.assertAlmostEqual(sleeps[-1], 0.1)
+
+    # The time the caller was late is compensated
+    now[0] += 0.15
+    self.assertAlmostEqual(bucket.acquire(), 100.2)
+    self.assertAlmostEqual(bucket.acquire(), 100.3)
+    self.assertAlmostEqual(now[0], 100.3)
+
+    # At most `size` tokens are accumulated while idle
+    now[0] += 10
+    sleeps.clear()
+    for i in range(0, 3):
+      bucket.acquire()
+    self.assertEqual(sleeps, [])
+    bucket.acquire()
+    self.assertEqual(len(sleeps), 1)
+
+    with self.assertRaises(ValueError):
+      TokenBucket(10, 0)
+
+  def test_BulkRequestManager_rate(self):
+    """
+    Test if the the BulkRequestManager paces the requests at the given rate
+    """
+
+    with self.assertRaises(ValueError):
+      BulkRequestManager(bucketSize=10)
+
+    # Pace the requests on a fake clock, advanced only by the sleeps
+    now = [0.0]
+    def sleep(t):
+      now[0] += t
+    slots = []
+    manager = BulkRequestManager(
+      rate=200, bucketSize=5, parallel=10, clock=lambda: now[0],
+      sleep=sleep, requestFn=lambda request: slots.append(now[0]))
+    server = MockHTTPServer()
+
+    # Start a local mock server
+    server.start()
+    url = 'http://127.0.0.1:{}'.format(server.port)
+
+    # Schedule multiple HTTP requests
+    for i in range(0, 100):
+      manager.enqueue(Request(url))
+
+    # Execute
+    (completed, failed) = manager.execute().result()
+    manager.session.close()
+    server.stop()
+
+    # Check if the requests were placed on the slots of the given rate
+    self.assertEqual(len(completed), 100)
+    self.assertEqual(manager.sendMeter.count, 100)
+    self.assertEqual(len(slots), 100)
+    for i, slot in enumerate(slots):
+      self.assertAlmostEqual(slot, i * 0.005)
+
+    # Check the rate meter
+    meter = RateMeter(clock=iter([0, 0.5, 1]).__next__)
+    self.assertIsNone(meter.rate)
+    for i in range(0, 3):
+      meter.mark()
+    self.assertEqual(meter.rate, 2)
+
+  def test_RetryPolicy(self):
+    """
+    Test if the retry delays are backing off exponentially, with jitter
+    """
+    policy = RetryPolicy(1)
+    self.assertEqual(list(map(policy.delay, range(1, 4))), [1, 1, 1])
+
+    policy = RetryPolicy(0.5, backoff=2, maxInterval=3)
+    self.assertEqual(list(map(policy.delay, range(1, 6))), [0.5, 1, 2, 3, 3])
+    self.assertEqual(policy.delay(10000), 3)
+
+    # The jitter shortens the delays by up to the given fraction
+    policy = RetryPolicy(2, backoff=2, jitter=0.5,
+                         random=iter([0, 0.5, 1]).__next__)
+    self.assertEqual(list(map(policy.delay, range(1, 4))), [2, 3, 4])
+
+    with self.assertRaises(ValueError):
+      RetryPolicy(1, backoff=0.5)
+    with self.assertRaises(ValueError):
+      RetryPolicy(1, jitter=2)
+    with self.assertRaises(ValueError):
+      RetryPolicy(1, maxInterval=0.5)
+
+  def test_BulkRequestManager_retry(self):
+    """
+    Test if the the BulkRequestManager re-tries the failed requests when
+    their backoff interval has passed
+    """
+
+    manager = BulkRequestManager(retry=3, retryInterval=0.1, retryBackoff=2)
+    server = MockHTTPServer(responseCode=500)
+    manager.logger.setLevel(logging.CRITICAL)
+
+    # Start a local mock server
+    server.start()
+    url = 'http://127.0.0.1:{}'.format(server.port)
+
+    # Schedule a request that is going to fail
+    request = Request(url)
+    manager.enqueue(request)
+
+    # Execute
+    startTime = time.time()
+    (completed, failed) = manager.execute().result()
+    duration = time.time() - startTime
+    manager.session.close()
+    server.stop()
+
+    # The request was placed 3 times, 0.1s and 0.2s after the failures
+    self.assertEqual(server.totalRequests, 3)
+    self.assertEqual(len(completed), 0)
+    self.assertEqual(failed, [request])
+    self.assertGreaterEqual(duration, 0.3)
+    self.assertLess(duration, 0.5)
+    self.assertEqual(manager.pendingRetries, {})
+
+    # The pending retries are cancelled when aborted
+    manager = BulkRequestManager(retry=3, retryInterval=60)
+    server = MockHTTPServer(responseCode=500)
+    manager.logger.setLevel(logging.CRITICAL)
+    server.start()
+    manager.enqueue(Request('http://127.0.0.1:{}'.format(server.port)))
+
+    future = manager.execute()
+    while not manager.pendingRetries:
+      time.sleep(0.01)
+    manager.abort()
+    with self.assertRaises(InterruptedError):
+      future.result(10)
+    self.assertEqual(manager.pendingRetries, {})
+    manager.session.close()
+    server.stop()
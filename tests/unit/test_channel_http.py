@@ -0,0 +1,268 @@
+import hashlib
+import logging
+import threading
+import unittest
+
+from .mocks.httpserver import MockHTTPServer
+
+from performance.driver.core.eventbus import EventBus
+from performance.driver.core.events import ParameterUpdateEvent, TeardownEvent
+from performance.driver.core.config import RootConfig
+from performance.driver.classes.channel.http import HTTPChannel, \
+  HTTPRequestState, \
+  HTTPRequestStartEvent, HTTPFirstRequestStartEvent, HTTPLastRequestStartEvent, \
+  HTTPResponseEndEvent, HTTPFirstResponseEndEvent, HTTPLastResponseEndEvent, \
+  HTTPErrorEvent
+
+
+class TestHTTPChannel(unittest.TestCase):
+
+  def setUp(self):
+    """
+    Setup phase
+    """
+    self.server = MockHTTPServer(fakeLattency=0.05, content="Hello")
+    self.server.start()
+    self.eventbus = EventBus()
+    self.eventbus.start()
+    self.channels = []
+
+  def tearDown(self):
+    """
+    Teardown phase
+    """
+    for channel in self.channels:
+      channel.handleTeardown(TeardownEvent())
+    self.eventbus.stop()
+    self.server.stop()
+
+  def createChannel(self, **config):
+    """
+    Create an HTTP channel with the given configuration
+    """
+    config.update({"class": "channel.HTTPChannel"})
+    config.setdefault("url", "http://127.0.0.1:{}/".format(self.server.port))
+    rootConfig = RootConfig({
+      "general": {
+        "parameters": [{"name": "foo"}]
+      },
+      "channels": [config]
+    })
+    channel = HTTPChannel(next(rootConfig.channels()), self.eventbus)
+    self.channels.append(channel)
+    return channel
+
+  def collectEvents(self, count):
+    """
+    Collect the HTTP events published and return an event that is set when
+    `count` response events are collected
+    """
+    events = []
+    completed = threading.Event()
+
+    def handleEvent(event):
+      events.append(event)
+      if len(list(filter(lambda e: isinstance(e, HTTPResponseEndEvent),
+                         events))) == count:
+        completed.set()
+
+    self.eventbus.subscribe(handleEvent, events=(HTTPRequestStartEvent,
+                                                 HTTPResponseEndEvent))
+    return (events, completed)
+
+  def test_request_templates(self):
+    """
+    Test if the url and the body are rendered for every repetition
+    """
+    channel = self.createChannel(
+        url="http://127.0.0.1/{{foo}}/{{i}}",
+        body=[
+          {"if": "i % 2 == 0", "value": "even {{foo}}"},
+          {"if": "True", "value": "odd {{foo}}"}
+        ])
+    state = HTTPRequestState(channel, {"foo": 1}, set())
+    self.assertEqual(state.getUrl(3), "http://127.0.0.1/1/3")
+    self.assertEqual(state.getBody(2), "even 1")
+    self.assertEqual(state.getBody(3), "odd 1")
+    state.completedCounter = 4
+    self.assertEqual(state.getUrl(), "http://127.0.0.1/1/4")
+    self.assertEqual(state.getBody(), "even 1")
+
+    # The bodies that do not refer to `i` are rendered only once
+    channel = self.createChannel(
+        body=[
+          {"if": "foo > 1", "value": "many"},
+          {"if": "foo == 1", "value": {"foo": "{{foo}}"}}
+        ])
+    state = HTTPRequestState(channel, {"foo": 1}, set())
+    self.assertEqual(state.getBody(1), {"foo": "1"})
+    self.assertIs(state.getBody(1), state.getBody(2))
+
+    with self.assertRaises(ValueError):
+      HTTPRequestState(channel, {"foo": 0}, set()).getBody(0)
+
+  def test_response_modes(self):
+    """
+    Test if the response bodies are handled according to the response mode
+    """
+    expected = {
+      "raw": ("Hello", None),
+      "truncate": ("Hel", None),
+      "hash": ("", hashlib.sha1(b"Hello").hexdigest()),
+      "discard": ("", None)
+    }
+    for engine in ("thread", "asyncio"):
+      for (mode, (body, digest)) in expected.items():
+        channel = self.createChannel(
+            engine=engine, response=mode, responseLimit=3)
+        (events, completed) = self.collectEvents(1)
+        channel.handleParameterUpdate(
+            ParameterUpdateEvent({"foo": 1}, {}, {"foo": 1}, traceid="http"))
+        self.assertTrue(completed.wait(10))
+
+        event = events[-1]
+        self.assertEqual(event.body, body)
+        self.assertEqual(event.size, 5)
+        self.assertEqual(event.digest, digest)
+        self.assertEqual(event.toDict()["size"], 5)
+
+        # The phases of the requests are timed by both engines
+        self.assertGreater(event.timings.ttfb, 0)
+        self.assertIsNotNone(event.timings.transfer)
+        self.assertEqual(event.toDict()["timings"]["ttfb"], event.timings.ttfb)
+
+    with self.assertRaises(ValueError):
+      self.createChannel(response="unknown")
+
+  def test_asyncio(self):
+    """
+    Test if the asyncio engine places the repeated requests concurrently
+    """
+    channel = self.createChannel(
+        engine="asyncio",
+        concurrency=10,
+        repeat=50,
+        url="http://127.0.0.1:{}/{{{{i}}}}".format(self.server.port))
+    (events, completed) = self.collectEvents(50)
+
+    event = ParameterUpdateEvent({"foo": 1}, {}, {"foo": 1}, traceid="http")
+    channel.handleParameterUpdate(event)
+    state = channel.requestStates[0]
+    self.assertTrue(completed.wait(10))
+    state.activeTask.result(10)
+    self.eventbus.flush()
+
+    # The requests are kept in flight concurrently
+    self.assertEqual(self.server.totalRequests, 50)
+    self.assertGreater(self.server.maxConcurrentConnections, 1)
+    self.assertLessEqual(self.server.maxConcurrentConnections, 10)
+    self.assertEqual(channel.requestStates, [])
+
+    # The events carry the trace IDs of the parameter update
+    for e in events:
+      self.assertIn("http", e.traceids)
+
+    starts = list(filter(lambda e: isinstance(e, HTTPRequestStartEvent), events))
+    self.assertEqual(len(starts), 50)
+    self.assertEqual(
+        sorted(map(lambda e: int(e.url.split('/')[-1]), starts)),
+        list(range(0, 50)))
+    self.assertEqual(
+        len(list(filter(lambda e: type(e) is HTTPFirstRequestStartEvent,
+                        starts))), 1)
+    self.assertEqual(
+        len(list(filter(lambda e: type(e) is HTTPLastRequestStartEvent,
+                        starts))), 1)
+
+    ends = list(filter(lambda e: isinstance(e, HTTPResponseEndEvent), events))
+    self.assertEqual(ends[-1].body, "Hello")
+    self.assertEqual(
+        len(list(filter(lambda e: type(e) is HTTPLastResponseEndEvent,
+                        ends))), 1)
+
+  def test_asyncio_first_last(self):
+    """
+    Test if the First/Last response events follow the order the concurrent
+    responses arrive, regardless of the order the requests were placed
+    """
+    self.server.fakeLattency = 0.2
+    for config in ({"concurrency": 10}, {"arrival": "constant", "rate": 200}):
+      channel = self.createChannel(engine="asyncio", repeat=30, **config)
+      (events, completed) = self.collectEvents(30)
+
+      channel.handleParameterUpdate(
+          ParameterUpdateEvent({"foo": 1}, {}, {"foo": 1}, traceid="http"))
+      state = channel.requestStates[0]
+      self.assertTrue(completed.wait(10))
+      state.activeTask.result(10)
+      self.eventbus.flush()
+
+      ends = sorted(filter(lambda e: isinstance(e, HTTPResponseEndEvent), events),
+                    key=lambda e: e.ts)
+      self.assertEqual(len(ends), 30)
+      self.assertIs(type(ends[0]), HTTPFirstResponseEndEvent)
+      self.assertIs(type(ends[-1]), HTTPLastResponseEndEvent)
+      for e in ends[1:-1]:
+        self.assertIs(type(e), HTTPResponseEndEvent)
+
+  def test_asyncio_openloop(self):
+    """
+    Test if the asyncio engine places the open-loop requests on schedule
+    """
+    with self.assertRaises(ValueError):
+      self.createChannel(arrival="constant", rate=10)
+
+    channel = self.createChannel(
+        engine="asyncio", arrival="constant", rate=100, repeat=20)
+    (events, completed) = self.collectEvents(20)
+
+    channel.handleParameterUpdate(
+        ParameterUpdateEvent({"foo": 1}, {}, {"foo": 1}, traceid="http"))
+    state = channel.requestStates[0]
+    self.assertTrue(completed.wait(10))
+    state.activeTask.result(10)
+    self.eventbus.flush()
+
+    # The requests were placed without waiting for the responses
+    self.assertEqual(self.server.totalRequests, 20)
+    self.assertEqual(state.completedCounter, 20)
+    self.assertGreater(self.server.maxConcurrentConnections, 1)
+
+    # And they carry the time they were scheduled at
+    starts = list(filter(lambda e: isinstance(e, HTTPRequestStartEvent), events))
+    intended = sorted(map(lambda e: e.intendedTs, starts))
+    self.assertAlmostEqual(intended[-1] - intended[0], 0.19, places=5)
+    for e in starts:
+      self.assertLess(e.ts - e.intendedTs, 0.1)
+    for e in events:
+      self.assertIsNotNone(e.intendedTs)
+
+  def test_asyncio_error(self):
+    """
+    Test if the asyncio engine publishes the connection errors
+    """
+    channel = self.createChannel(engine="asyncio", url="http://127.0.0.1:1/")
+    channel.logger.setLevel(logging.CRITICAL)
+    (events, completed) = self.collectEvents(1)
+
+    channel.handleParameterUpdate(
+        ParameterUpdateEvent({"foo": 1}, {}, {"foo": 1}, traceid="http"))
+    self.assertTrue(completed.wait(10))
+    self.assertIsInstance(events[-1], HTTPErrorEvent)
+
+  def test_asyncio_teardown(self):
+    """
+    Test if the pending asyncio requests are cancelled on teardown
+    """
+    channel = self.createChannel(
+        engine="asyncio", repeat=1000, repeatInterval=60)
+    (events, completed) = self.collectEvents(1)
+
+    channel.handleParameterUpdate(
+        ParameterUpdateEvent({"foo": 1}, {}, {"foo": 1}, traceid="http"))
+    self.assertTrue(completed.wait(10))
+    state = channel.requestStates[0]
+
+    channel.handleTeardown(TeardownEvent())
+    self.assertFalse(state.active)
+    self.assertTrue(state.activeTask.cancelled())
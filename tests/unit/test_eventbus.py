@@ -1,12 +1,17 @@
+import asyncio
+import gc
 import logging
 import os
 import time
 import threading
 import unittest
 
+from queue import Full
 from unittest.mock import Mock, call
-from performance.driver.core.eventbus import EventBus
-from performance.driver.core.events import Event, TickEvent
+from performance.driver.core.eventbus import EventBus, AsyncEventBus, EventQueue
+from performance.driver.classes.channel.http import HTTPResponseEndEvent
+from performance.driver.core.events import Event, TickEvent, EventBusStatsEvent
+from performance.driver.core.eventbusstats import EventBusStats
 
 class TestEventBus(unittest.TestCase):
 
@@ -25,10 +30,11 @@ class TestEventBus(unittest.TestCase):
     # After
     self.assertNotEqual(eventbus.threads, [])
 
-    # There should be 9 threads : 8 threadpool threads and a timer event
+    # There should be 10 threads : 8 threadpool threads, a timer event and
+    # the scheduler
     threadsAfter = set(threading.enumerate())
     newThreads = threadsAfter - threadsBefore
-    self.assertEqual(len(newThreads), 9)
+    self.assertEqual(len(newThreads), 10)
 
     # Stop it
     eventbus.stop()
@@ -58,6 +64,51 @@ class TestEventBus(unittest.TestCase):
     event = Event(traceid='foo')
     self.assertIn('foo', event.traceids)
 
+  def test_event_slots(self):
+    """
+    Test if the compact event representation behaves like a regular object
+    """
+    parent = TickEvent(1, 0.5, traceid='foo')
+    event = TickEvent(2, 0.5, traceid=parent.traceids, ts=10)
+    self.assertFalse(hasattr(event, '__dict__'))
+    self.assertEqual(event.event, 'TickEvent')
+    self.assertIn('foo', event.traceids)
+    self.assertTrue(event.hasTraces(parent.traceids))
+    self.assertEqual(len(event.traceids), 3)
+
+    # The trace IDs are immutable
+    with self.assertRaises(AttributeError):
+      event.traceids.add('bar')
+
+    self.assertEqual(event.toDict(), {
+      'event': 'TickEvent',
+      'ts': 10,
+      'traceids': [event.traceids[0], parent.traceids[0], 'foo'],
+      'count': 2,
+      'delta': 0.5
+    })
+
+    # Heavy payloads are decoded on demand
+    event = HTTPResponseEndEvent('http://127.0.0.1', 'αβ'.encode('utf-8'), {},
+                                 encoding='utf-8')
+    self.assertEqual(event.body, 'αβ')
+    self.assertEqual(event.toDict()['body'], 'αβ')
+
+    # Events without slots keep working
+    class TestEvent(Event):
+      def __init__(self, value, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.value = value
+
+    event = TestEvent(42, ts=10)
+    self.assertEqual(event.event, 'TestEvent')
+    self.assertEqual(event.toDict(), {
+      'event': 'TestEvent',
+      'ts': 10,
+      'traceids': list(event.traceids),
+      'value': 42
+    })
+
   def test_publish(self):
     """
     Test if we can publish events to the bus
@@ -274,3 +325,567 @@ class TestEventBus(unittest.TestCase):
 
     # Check if we were called
     self.assertIn(len(subscriber.mock_calls), (9,10,11))
+
+  def test_subscribe_event_names(self):
+    """
+    Test if the subscription on events given by name works, including the
+    names of the parent classes
+    """
+    eventbus = EventBus(clockFrequency=0)
+    eventbus.start()
+
+    # Some test events
+    class TestEvent(Event):
+      pass
+
+    class TestChildEvent(TestEvent):
+      pass
+
+    # Create a mock subscription
+    subscriberTest = Mock()
+    subscriberChild = Mock()
+    eventbus.subscribe(subscriberTest, events=('TestEvent',))
+    eventbus.subscribe(subscriberChild, events=('TestChildEvent',))
+
+    # Dispatch and test
+    firstEvent = TestEvent()
+    secondEvent = TestChildEvent()
+    eventbus.publish(firstEvent)
+    eventbus.publish(secondEvent)
+
+    # Stop waits for the queue to drain
+    eventbus.stop()
+
+    # Check if we were called
+    self.assertEqual(subscriberTest.mock_calls, [
+        call(firstEvent),
+        call(secondEvent)
+      ])
+    self.assertEqual(subscriberChild.mock_calls, [
+        call(secondEvent)
+      ])
+
+  def test_dispatch_table(self):
+    """
+    Test if the dispatch table is updated when the subscriptions change
+    """
+    eventbus = EventBus(clockFrequency=0)
+
+    class TestEvent(Event):
+      pass
+
+    subscriberAll = Mock()
+    subscriberTest = Mock()
+    subscriberTick = Mock()
+
+    # Resolve the subscribers once, populating the dispatch table
+    eventbus.subscribe(subscriberAll, order=10)
+    eventbus.subscribe(subscriberTick, events=(TickEvent,))
+    self.assertEqual(
+      list(map(lambda x: x[1], eventbus.resolveSubscribers(TestEvent))),
+      [subscriberAll])
+    self.assertIn(TestEvent, eventbus.dispatchTable)
+
+    # A new subscription should be considered, respecting the order
+    eventbus.subscribe(subscriberTest, events=(TestEvent,))
+    self.assertEqual(
+      list(map(lambda x: x[1], eventbus.resolveSubscribers(TestEvent))),
+      [subscriberTest, subscriberAll])
+    self.assertEqual(
+      list(map(lambda x: x[1], eventbus.resolveSubscribers(TickEvent))),
+      [subscriberTick, subscriberAll])
+
+    # An unsubscription should be considered too
+    eventbus.unsubscribe(subscriberAll)
+    self.assertEqual(
+      list(map(lambda x: x[1], eventbus.resolveSubscribers(TestEvent))),
+      [subscriberTest])
+
+  def test_mailbox_order(self):
+    """
+    Test if the mailbox dispatch mode delivers the events in order, and never
+    concurrently to the same subscriber
+    """
+    eventbus = EventBus(clockFrequency=0, dispatch='mailbox')
+    eventbus.start()
+
+    # A subscriber that checks that it's never called concurrently
+    received = []
+    active = threading.Lock()
+    overlaps = []
+    def subscriber(event):
+      if not active.acquire(blocking=False):
+        overlaps.append(event)
+        return
+      time.sleep(0.001)
+      received.append(event)
+      active.release()
+
+    eventbus.subscribe(subscriber)
+
+    # Dispatch and test
+    events = list(map(lambda x: Event(), range(0, 100)))
+    for event in events:
+      eventbus.publish(event)
+
+    # Stop waits for the queue and the mailboxes to drain
+    eventbus.stop()
+
+    # Check if we were called in order
+    self.assertEqual(overlaps, [])
+    self.assertEqual(received, events)
+
+  def test_mailbox_subscribe_events(self):
+    """
+    Test if the mailbox dispatch mode respects the subscribed events
+    """
+    eventbus = EventBus(clockFrequency=0, dispatch='mailbox')
+    eventbus.start()
+
+    class TestEvent(Event):
+      pass
+
+    # Create a mock subscription
+    subscriberAll = Mock()
+    subscriberTest = Mock()
+    subscriberRemoved = Mock()
+    eventbus.subscribe(subscriberAll)
+    eventbus.subscribe(subscriberTest, events=(TestEvent,))
+    eventbus.subscribe(subscriberRemoved)
+    eventbus.unsubscribe(subscriberRemoved)
+
+    # Dispatch and test
+    firstEvent = Event()
+    secondEvent = TestEvent()
+    eventbus.publish(firstEvent)
+    eventbus.publish(secondEvent)
+    eventbus.flush()
+
+    # The events should be delivered after a flush
+    self.assertEqual(subscriberAll.mock_calls, [
+        call(firstEvent),
+        call(secondEvent)
+      ])
+    self.assertEqual(subscriberTest.mock_calls, [
+        call(secondEvent)
+      ])
+    subscriberRemoved.assert_not_called()
+
+    # Stop it
+    eventbus.stop()
+    self.assertEqual(eventbus.threads, [])
+
+  def test_benchmark_mailbox(self):
+    """
+    Benchmark the throughput of fast subscribers when a slow subscriber is
+    present, in the `pool` and in the `mailbox` dispatch modes
+    """
+
+    def measure(dispatch):
+      eventbus = EventBus(clockFrequency=0, dispatch=dispatch)
+      eventbus.start()
+
+      # The slow consumer takes 2ms per event, and it comes first
+      eventbus.subscribe(lambda event: time.sleep(0.002), order=1)
+
+      # A few fast consumers that just count the events
+      counters = [0, 0, 0]
+      countersLock = threading.Lock()
+      done = threading.Event()
+      def fastSubscriber(event, index):
+        with countersLock:
+          counters[index] += 1
+          if min(counters) == 400:
+            done.set()
+      for i in range(0, len(counters)):
+        eventbus.subscribe(fastSubscriber, order=2, args=[i])
+
+      # Publish the events and wait until the fast consumers got them
+      # (Note: Like `timeit`, the garbage collector is paused while measuring,
+      # since a full collection would take longer than the measurement)
+      gc.collect()
+      gc.disable()
+      try:
+        ts = time.time()
+        for i in range(0, 400):
+          eventbus.publish(Event())
+        delivered = done.wait(10)
+        delta = time.time() - ts
+      finally:
+        gc.enable()
+
+      eventbus.stop()
+
+      # Every fast consumer should receive every event
+      self.assertTrue(delivered)
+      self.assertEqual(counters, [400, 400, 400])
+      return 400 / delta
+
+    poolRate = measure('pool')
+    mailboxRate = measure('mailbox')
+    logging.getLogger('Benchmark').info(
+      'Fast consumer throughput: {:.0f} events/s (pool), '
+      '{:.0f} events/s (mailbox)'.format(poolRate, mailboxRate))
+
+    # The fast consumers should not be throttled more than in the pool mode
+    # (Note: Only a sanity bound, since the throughput depends on the thread
+    # scheduling of the machine)
+    self.assertGreaterEqual(mailboxRate, poolRate)
+
+  def test_async_subscribe(self):
+    """
+    Test if the asyncio event bus respects the subscription order and the
+    subscribed events
+    """
+    eventbus = AsyncEventBus(clockFrequency=0)
+    eventbus.start()
+
+    class TestEvent(Event):
+      pass
+
+    # Create a mock subscription
+    subscriber1 = Mock()
+    subscriber2 = Mock()
+    subscriberTest = Mock()
+    manager = Mock()
+    manager.attach_mock(subscriber1, 'subscriber1')
+    manager.attach_mock(subscriber2, 'subscriber2')
+    eventbus.subscribe(subscriber1, order=10)
+    eventbus.subscribe(subscriber2, order=1)
+    eventbus.subscribe(subscriberTest, events=(TestEvent,))
+
+    # Dispatch and test
+    firstEvent = Event()
+    secondEvent = TestEvent()
+    eventbus.publish(firstEvent)
+    eventbus.publish(secondEvent)
+
+    # Stop waits for the events to be dispatched
+    eventbus.stop()
+
+    # Check if we were called in the correct order for every event
+    # (Note: Consecutive events are delivered by different worker threads)
+    for event in (firstEvent, secondEvent):
+      self.assertEqual(
+          list(filter(lambda c: c[1][0] is event, manager.mock_calls)), [
+              call.subscriber2(event),
+              call.subscriber1(event)
+          ])
+    self.assertEqual(subscriberTest.mock_calls, [
+        call(secondEvent)
+      ])
+
+  def test_async_slow_subscriber(self):
+    """
+    Test if a slow regular subscriber does not block the dispatch of the
+    other events on the asyncio event bus
+    """
+    eventbus = AsyncEventBus(clockFrequency=0)
+    eventbus.start()
+
+    class SlowEvent(Event):
+      pass
+    class FastEvent(Event):
+      pass
+
+    received = threading.Event()
+    eventbus.subscribe(lambda event: time.sleep(0.5), events=(SlowEvent, ))
+    eventbus.subscribe(lambda event: received.set(), events=(FastEvent, ))
+
+    # The fast event is delivered while the slow one is still being handled
+    eventbus.publish(SlowEvent())
+    eventbus.publish(FastEvent())
+    self.assertTrue(received.wait(0.25))
+
+    eventbus.stop()
+
+  def test_async_options(self):
+    """
+    Test if the options that the asyncio event bus does not support are
+    rejected
+    """
+    with self.assertRaises(ValueError):
+      AsyncEventBus(clockFrequency=0, dispatch='mailbox')
+    with self.assertRaises(ValueError):
+      AsyncEventBus(clockFrequency=0, queueSize=100)
+
+  def test_async_coroutine(self):
+    """
+    Test if coroutine subscribers are awaited by the asyncio event bus
+    """
+    eventbus = AsyncEventBus(clockFrequency=0)
+    eventbus.start()
+
+    # A coroutine subscriber that publishes from within the loop
+    received = []
+    class TestEvent(Event):
+      pass
+    async def subscriber(event):
+      await asyncio.sleep(0.01)
+      received.append(event)
+      if not type(event) is TestEvent:
+        eventbus.publish(TestEvent())
+
+    eventbus.subscribe(subscriber)
+
+    # Publish from a different thread
+    pubEvent = Event()
+    threading.Thread(target=eventbus.publish, args=(pubEvent,)).start()
+    time.sleep(0.01)
+
+    # Flush should wait for the tasks and the cascaded events
+    eventbus.flush()
+    self.assertEqual(len(received), 2)
+    self.assertEqual(received[0], pubEvent)
+    self.assertEqual(type(received[1]), TestEvent)
+
+    eventbus.stop()
+    self.assertEqual(eventbus.threads, [])
+
+  def test_async_publish_stopped(self):
+    """
+    Check if the events published after the asyncio event bus is stopped are
+    dropped, without affecting the pending events
+    """
+    eventbus = AsyncEventBus(clockFrequency=0)
+    eventbus.start()
+
+    subscriber = Mock()
+    eventbus.subscribe(subscriber)
+    eventbus.stop()
+
+    # A late publisher should neither fail nor leave the bus pending
+    eventbus.publish(Event())
+    eventbus.flush()
+    self.assertEqual(eventbus.pending, 0)
+    self.assertEqual(subscriber.mock_calls, [])
+
+  def test_async_clock(self):
+    """
+    Check if the asyncio event bus fires tick events
+    """
+    eventbus = AsyncEventBus(clockFrequency=10)
+    eventbus.start()
+
+    # Create a mock subscription
+    subscriber = Mock()
+    eventbus.subscribe(subscriber, events=(TickEvent,))
+
+    # Wait for a bit more than a second, but not enough for another tick
+    time.sleep(1.02)
+    eventbus.stop()
+
+    # Check if we were called
+    self.assertIn(len(subscriber.mock_calls), (9,10,11))
+
+  def test_stats(self):
+    """
+    Check if the event bus collects statistics about it's subscribers
+    """
+    eventbus = EventBus(clockFrequency=10, stats=True, statsInterval=0.2)
+    eventbus.start()
+
+    class TestEvent(Event):
+      pass
+
+    def slowSubscriber(event):
+      time.sleep(0.01)
+
+    statsEvents = []
+    eventbus.subscribe(slowSubscriber, events=(TestEvent,))
+    eventbus.subscribe(statsEvents.append, events=(EventBusStatsEvent,))
+
+    for i in range(0, 10):
+      eventbus.publish(TestEvent())
+    time.sleep(0.5)
+    eventbus.stop()
+
+    report = eventbus.stats.report()
+    self.assertEqual(report['events']['TestEvent']['count'], 10)
+    self.assertIn('TickEvent', report['events'])
+    self.assertGreater(len(report['queue']['samples']), 0)
+
+    stats = report['subscribers'][
+        'TestEventBus.test_stats.<locals>.slowSubscriber']
+    self.assertEqual(stats['TestEvent']['count'], 10)
+    self.assertGreaterEqual(stats['TestEvent']['totalTime'], 100)
+    self.assertGreaterEqual(stats['TestEvent']['time']['p50'], 9)
+
+    # The slowest subscriber should be reported first
+    name, event, totalTime = eventbus.stats.slowestSubscribers()[0]
+    self.assertEqual(event, 'TestEvent')
+    self.assertGreaterEqual(totalTime, 0.1)
+
+    # Statistics should have been periodically published
+    self.assertGreater(len(statsEvents), 0)
+    self.assertIn('subscribers', statsEvents[0].stats)
+
+  def test_stats_threads(self):
+    """
+    Check if the statistics collected by different threads are merged
+    """
+    stats = EventBusStats()
+
+    class TestEvent(Event):
+      pass
+
+    def subscriber(event):
+      pass
+
+    def record():
+      for i in range(0, 100):
+        stats.recordEvent(TestEvent, 0.001)
+        stats.recordDispatch(TestEvent, subscriber, 0.001, 0.002)
+      stats.recordDrop(TestEvent, 'drop')
+
+    threads = list(map(lambda i: threading.Thread(target=record), range(0, 4)))
+    for thread in threads:
+      thread.start()
+    for thread in threads:
+      thread.join()
+
+    # Every thread collects it's statistics in it's own shard
+    self.assertEqual(len(stats.shards), 4)
+    report = stats.report()
+    self.assertEqual(report['events']['TestEvent']['count'], 400)
+    self.assertEqual(report['queue']['dropped'], {'TestEvent': {'drop': 4}})
+    dispatch = report['subscribers'][
+        'TestEventBus.test_stats_threads.<locals>.subscriber']['TestEvent']
+    self.assertEqual(dispatch['count'], 400)
+    self.assertAlmostEqual(dispatch['totalTime'], 800)
+    self.assertAlmostEqual(dispatch['time']['p50'], 2, delta=0.05)
+
+    # The dispatches of the worker threads of the bus are merged
+    eventbus = EventBus(clockFrequency=0, threadCount=4, stats=True)
+    eventbus.start()
+    eventbus.subscribe(subscriber, events=(TestEvent,))
+    for i in range(0, 200):
+      eventbus.publish(TestEvent())
+    eventbus.flush()
+    eventbus.stop()
+    self.assertEqual(eventbus.stats.report()['subscribers'][
+        'TestEventBus.test_stats_threads.<locals>.subscriber']['TestEvent']
+        ['count'], 200)
+
+  def test_stats_disabled(self):
+    """
+    Check if the statistics collection is disabled by default
+    """
+    eventbus = EventBus()
+    eventbus.start()
+
+    class TestEvent(Event):
+      pass
+
+    subscriber = Mock()
+    eventbus.subscribe(subscriber, events=(TestEvent,))
+    eventbus.publish(TestEvent())
+    eventbus.flush()
+    eventbus.stop()
+
+    self.assertIsNone(eventbus.stats)
+    self.assertEqual(len(subscriber.mock_calls), 1)
+
+  def test_queue_policies(self):
+    """
+    Check if the bounded event queue applies the per-type policies
+    """
+    class TestEvent(Event):
+      pass
+
+    class TestSubEvent(TestEvent):
+      pass
+
+    class OtherEvent(Event):
+      pass
+
+    drops = []
+    queue = EventQueue(3, 'drop-newest', {
+        'TestEvent': 'drop-oldest',
+        TickEvent: 'coalesce'
+      }, onDrop=lambda eventType, policy: drops.append((eventType, policy)))
+    self.assertEqual(queue.policyFor(TestSubEvent), 'drop-oldest')
+    self.assertEqual(queue.policyFor(OtherEvent), 'drop-newest')
+
+    # Ticks are coalesced in the most recent tick
+    tick = TickEvent(1, 0.1)
+    test1 = TestEvent()
+    queue.put(tick)
+    queue.put(test1)
+    queue.put(OtherEvent())
+    queue.put(TickEvent(2, 0.2))
+    self.assertEqual(queue.qsize(), 3)
+    self.assertEqual(tick.count, 2)
+    self.assertAlmostEqual(tick.delta, 0.3)
+
+    # Test events drop the oldest test event
+    test2 = TestEvent()
+    queue.put(test2)
+    self.assertEqual(queue.qsize(), 3)
+
+    # Other events are dropped
+    queue.put(OtherEvent())
+    self.assertEqual(queue.qsize(), 3)
+
+    self.assertEqual(queue.get(), tick)
+    self.assertEqual(type(queue.get()), OtherEvent)
+    self.assertEqual(queue.get(), test2)
+    self.assertEqual(drops, [
+      (TickEvent, 'coalesce'),
+      (TestEvent, 'drop-oldest'),
+      (OtherEvent, 'drop-newest'),
+    ])
+
+    # Blocking policy
+    queue = EventQueue(1)
+    queue.put(Event())
+    with self.assertRaises(Full):
+      queue.put(Event(), timeout=0.01)
+    queue.put(Event(), overflow=True)
+    self.assertEqual(queue.qsize(), 2)
+
+    with self.assertRaises(ValueError):
+      EventQueue(1, 'invalid')
+
+  def test_bounded_queue(self):
+    """
+    Check if the subscribers can publish events to a full queue without
+    blocking the bus
+    """
+    eventbus = EventBus(clockFrequency=0, threadCount=1, queueSize=1)
+    eventbus.start()
+
+    class TestEvent(Event):
+      pass
+
+    received = []
+    def subscriber(event):
+      if len(received) < 10:
+        eventbus.publish(TestEvent())
+        eventbus.publish(TestEvent())
+      received.append(event)
+
+    eventbus.subscribe(subscriber, events=(TestEvent,))
+    eventbus.publish(TestEvent())
+    eventbus.flush()
+    eventbus.stop()
+
+    self.assertEqual(len(received), 21)
+
+  def test_scheduler(self):
+    """
+    Check if the event bus performs the scheduled calls while running
+    """
+    eventbus = EventBus(clockFrequency=0)
+    eventbus.start()
+
+    calls = []
+    eventbus.callLater(0.01, calls.append, 1)
+    eventbus.callAt(time.time() + 0.02, calls.append, 2)
+    call = eventbus.callLater(0.01, calls.append, 3)
+    eventbus.cancel(call)
+    eventbus.callLater(10, calls.append, 4)
+
+    time.sleep(0.05)
+    eventbus.stop()
+    self.assertEqual(calls, [1, 2])
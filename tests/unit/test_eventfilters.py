@@ -5,7 +5,7 @@ import threading
 import unittest
 
 from unittest.mock import Mock, call
-from performance.driver.core.eventfilters import EventFilter
+from performance.driver.core.eventfilters import EventFilter, EventFilterIndex
 from performance.driver.core.events import Event
 
 class FooEvent(Event):
@@ -20,12 +20,27 @@ class BarEvent(Event):
     self.a = a
     self.b = b
 
+class SubFooEvent(FooEvent):
+  pass
+
 class BazEvent(Event):
   def __init__(self, a=None, b=None, *args, **kwargs):
     super().__init__(*args, **kwargs)
     self.a = a
     self.b = b
 
+class CountingValue:
+  """
+  A value that counts how many times it was compared
+  """
+  def __init__(self, value):
+    self.value = value
+    self.comparisons = 0
+
+  def __eq__(self, other):
+    self.comparisons += 1
+    return self.value == other
+
 class TestEventBus(unittest.TestCase):
 
   def test_any(self):
@@ -841,3 +856,159 @@ class TestEventBus(unittest.TestCase):
     self.assertEqual(eventCallback.mock_calls, [
         call(fooEvent1),
       ])
+
+  def test_compile_cache(self):
+    """
+    Test if the same expression is compiled only once
+    """
+
+    eventFilter1 = EventFilter("FooEvent[a=He]:first BarEvent:nth(2,all)")
+    eventFilter2 = EventFilter("FooEvent[a=He]:first BarEvent:nth(2,all)")
+    self.assertIs(eventFilter1.matchEvent, eventFilter2.matchEvent)
+    self.assertEqual(eventFilter1.events[0][1:], ('first', None))
+    self.assertEqual(eventFilter1.events[1][1:], ('nth', (2, 'all')))
+
+    # Invalid selector parameters should be reported when compiling
+    with self.assertRaises(ValueError):
+      EventFilter("FooEvent:after(never)")
+
+  def test_benchmark(self):
+    """
+    Test if the compiled expressions are fast enough to handle many events,
+    compared to the simplest expression (`*`)
+    """
+
+    expressions = [
+      "*",
+      "FooEvent BarEvent",
+      "FooEvent:first",
+      "FooEvent:nth(2,all) BarEvent:nth(2,all)",
+      "FooEvent[a~=u?lo+]",
+      "FooEvent[a=He,b=Lo]",
+      "FooEvent[a.'some'.'dict'=1]",
+    ]
+
+    traceids = ['foobar']
+    events = [
+      FooEvent(a={'some': {'dict': 1}}, b="Lo", traceid=traceids),
+      FooEvent(a={'some': {'other': 1}}, traceid=traceids),
+      BarEvent(a="He", traceid=traceids),
+      BazEvent(traceid=['other']),
+    ]
+
+    # (Note: The best of a few runs is kept, so a stall of the machine does
+    # not affect the result)
+    count = 2000
+    costs = {}
+    for expression in expressions:
+      session = EventFilter(expression).start(traceids, lambda event: None)
+      durations = []
+      for run in range(0, 3):
+        ts = time.perf_counter()
+        for i in range(0, count):
+          for event in events:
+            session.handle(event)
+        durations.append(time.perf_counter() - ts)
+
+      costs[expression] = min(durations) / (count * len(events))
+      logging.info('{}: {:.2f} us/event'.format(
+          expression, costs[expression] * 1000000))
+
+    # The attribute and order checks should add only a small overhead
+    for expression in expressions:
+      self.assertLess(costs[expression], costs["*"] * 20)
+
+  def test_index(self):
+    """
+    Test if the filter index routes the events only to the matching sessions
+    """
+
+    eventbus = Mock()
+    index = EventFilterIndex(eventbus)
+
+    # Start two sessions of the same filter with different traces
+    traceids1 = ['foo']
+    traceids2 = ['bar']
+    eventCallback1 = Mock()
+    eventCallback2 = Mock()
+    eventCallback3 = Mock()
+    fooFilter = EventFilter("FooEvent[a=He]")
+    session1 = index.start(fooFilter, traceids1, eventCallback1)
+    session2 = index.start(fooFilter, traceids2, eventCallback2)
+    session3 = index.start(EventFilter("BarEvent"), None, eventCallback3)
+
+    # The index should be subscribed once to the bus
+    self.assertEqual(len(eventbus.subscribe.mock_calls), 1)
+    self.assertEqual(len(index.groups), 2)
+
+    # Events should be routed only to the groups matching their type
+    self.assertEqual(len(index.resolveSessions(FooEvent)), 1)
+    self.assertEqual(len(index.resolveSessions(SubFooEvent)), 1)
+    self.assertEqual(len(index.resolveSessions(BazEvent)), 0)
+
+    # Only the sessions with the trace IDs of the event should be called
+    fooEvent1 = SubFooEvent(a="He", traceid=traceids1)
+    fooEvent2 = FooEvent(a="Lo", traceid=traceids2)
+    fooEvent3 = FooEvent(a="He", traceid=traceids2)
+    barEvent = BarEvent()
+    for event in (fooEvent1, fooEvent2, fooEvent3, barEvent, BazEvent()):
+      index.handleEvent(event)
+    self.assertEqual(eventCallback1.mock_calls, [call(fooEvent1)])
+    self.assertEqual(eventCallback2.mock_calls, [call(fooEvent3)])
+    self.assertEqual(eventCallback3.mock_calls, [call(barEvent)])
+
+    # The attributes are checked once for both sessions of the group
+    value = CountingValue("He")
+    fooEvent4 = FooEvent(a=value, traceid=traceids1)
+    index.handleEvent(fooEvent4)
+    self.assertEqual(value.comparisons, 1)
+    self.assertEqual(eventCallback1.mock_calls, [call(fooEvent1), call(fooEvent4)])
+    self.assertEqual(eventCallback2.mock_calls, [call(fooEvent3)])
+
+    # The sessions pick the first event match that accepts their trace IDs
+    multiFilter = EventFilter("FooEvent[a=He] FooEvent:notrace")
+    for event in (fooEvent1, fooEvent3):
+      self.assertEqual(
+          multiFilter.matchTraces(event, multiFilter.matchAttributes(event),
+                                  set(fooEvent1.traceids)),
+          multiFilter.matchEvent(event, set(fooEvent1.traceids)))
+    self.assertEqual(
+        multiFilter.matchTraces(fooEvent3, [0, 1], set(fooEvent1.traceids)), 1)
+
+    # Finalized sessions should be removed from the index
+    session1.finalize()
+    session3.finalize()
+    self.assertEqual(len(index.groups), 1)
+    self.assertEqual(len(index.resolveSessions(BarEvent)), 0)
+    index.handleEvent(FooEvent(a="He", traceid=traceids1))
+    index.handleEvent(BarEvent())
+    self.assertEqual(eventCallback1.mock_calls, [call(fooEvent1), call(fooEvent4)])
+    self.assertEqual(eventCallback3.mock_calls, [call(barEvent)])
+
+  def test_index_any(self):
+    """
+    Test if the filter index routes all the events to the "*" and negated
+    filters
+    """
+
+    index = EventFilterIndex(Mock())
+    eventCallback1 = Mock()
+    eventCallback2 = Mock()
+    eventCallback3 = Mock()
+    index.start(EventFilter("*"), None, eventCallback1)
+    index.start(EventFilter(":not(FooEvent[a=He])"), ['foo'], eventCallback2)
+
+    # The negated filters are matched by every session, so they should accept
+    # the same events as a session outside of the index
+    session = EventFilter(":not(FooEvent[a=He])").start(['foo'], eventCallback3)
+
+    self.assertEqual(len(index.resolveSessions(BazEvent)), 2)
+    event = BazEvent(a="Lo", traceid=['bar'])
+    events = (event, BazEvent(a="Lo", traceid=['foo']), FooEvent(a="He"))
+    for e in events:
+      index.handleEvent(e)
+      session.handle(e)
+
+    self.assertEqual(eventCallback1.mock_calls, list(map(call, events)))
+    self.assertEqual(eventCallback2.mock_calls, [call(event)])
+    self.assertEqual(eventCallback2.mock_calls, eventCallback3.mock_calls)
@@ -0,0 +1,100 @@
+import time
+import threading
+import unittest
+
+from performance.driver.core.scheduler import Scheduler, getDefaultScheduler
+
+
+class TestScheduler(unittest.TestCase):
+
+  def test_order(self):
+    """
+    Check if the calls are performed in the order of their deadlines
+    """
+    scheduler = Scheduler()
+    scheduler.start()
+
+    calls = []
+    done = threading.Event()
+    scheduler.callLater(0.03, calls.append, 3)
+    scheduler.callLater(0.01, calls.append, 1)
+    scheduler.callAt(time.time() + 0.02, calls.append, 2)
+    scheduler.callLater(0.04, done.set)
+
+    self.assertTrue(done.wait(1))
+    scheduler.stop()
+    self.assertEqual(calls, [1, 2, 3])
+
+  def test_precision(self):
+    """
+    Check if the calls are performed on time
+    """
+    scheduler = Scheduler()
+    scheduler.start()
+
+    calledAt = []
+    done = threading.Event()
+    def callback():
+      calledAt.append(time.monotonic())
+      done.set()
+
+    ts = time.monotonic()
+    scheduler.callLater(0.05, callback)
+
+    self.assertTrue(done.wait(1))
+    scheduler.stop()
+    self.assertGreaterEqual(calledAt[0] - ts, 0.05)
+    self.assertLess(calledAt[0] - ts, 0.06)
+
+  def test_cancel(self):
+    """
+    Check if the cancelled calls are not performed
+    """
+    scheduler = Scheduler()
+    scheduler.start()
+
+    calls = []
+    done = threading.Event()
+    call = scheduler.callLater(0.01, calls.append, 1)
+    scheduler.callLater(0.02, calls.append, 2)
+    scheduler.callLater(0.03, done.set)
+    call.cancel()
+
+    # Restarting a timer many times should not pile up the cancelled calls
+    call = None
+    for i in range(0, 1000):
+      if call:
+        call.cancel()
+      call = scheduler.callLater(10, calls.append, 3)
+    self.assertLess(len(scheduler.heap), 1000)
+    self.assertEqual(scheduler.pending(), 3)
+    call.cancel()
+
+    self.assertTrue(done.wait(1))
+    scheduler.stop()
+    self.assertEqual(calls, [2])
+    self.assertEqual(scheduler.pending(), 0)
+
+  def test_exception(self):
+    """
+    Check if an exception in a call does not stop the scheduler
+    """
+    scheduler = Scheduler()
+    scheduler.start()
+
+    def failing():
+      raise RuntimeError('Failed')
+
+    done = threading.Event()
+    scheduler.callLater(0, failing)
+    scheduler.callLater(0.01, done.set)
+
+    self.assertTrue(done.wait(1))
+    scheduler.stop()
+
+  def test_default(self):
+    """
+    Check if the default scheduler is shared
+    """
+    self.assertIs(getDefaultScheduler(), getDefaultScheduler())
+    self.assertTrue(getDefaultScheduler().active)
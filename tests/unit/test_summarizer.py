@@ -1,10 +1,13 @@
 import logging
+import random
 import threading
 import unittest
 
 from unittest.mock import Mock, call
-from performance.driver.core.summarizer import Summarizer
-from performance.driver.core.events import Event, ParameterUpdateEvent
+from performance.driver.core.summarizer import Summarizer, SummarizerAxis, SummarizerAxisTimeseries, \
+  MappedSummarizerAxisTimeseries
+from performance.driver.core.summarizer import builtin, util
+from performance.driver.core.events import Event, ParameterUpdateEvent, SummaryUpdateEvent, TickEvent
 from performance.driver.core.eventbus import EventBus
 from performance.driver.core.config import GeneralConfig
 
@@ -234,3 +237,321 @@ class TestSummarizer(unittest.TestCase):
     self.assertEqual(list(map(lambda x: x[1], self.summarizer.axes[0].timeseries["bax"].values)), [4])
     self.assertEqual(list(map(lambda x: x[1], self.summarizer.axes[1].timeseries["baz"].values)), [5])
     self.assertEqual(list(map(lambda x: x[1], self.summarizer.axes[1].timeseries["bax"].values)), [6])
+
+  def test_axes_where(self):
+    """
+    The Summarizer should index the axes by their parameters
+    """
+
+    # Publish a few parameter updates, the last one on an existing axis
+    for (foo, bar, traceid) in ((1, 2, "w1"), (1, 3, "w2"), (2, 3, "w3"),
+                                (1, 3, "w4")):
+      self.eventbus.publish(
+        ParameterUpdateEvent({"foo": foo, "bar": bar}, {}, {"foo": foo},
+                             traceid=traceid))
+    self.eventbus.flush()
+
+    self.assertEqual(len(self.summarizer.axes), 3)
+    axis = self.summarizer.axes.find({"bar": 3, "foo": 1})
+    self.assertEqual(axis.parameters, {"foo": 1, "bar": 3})
+    self.assertIs(self.summarizer.axisLookup.find(["w4"]), axis)
+    self.assertIsNone(self.summarizer.axes.find({"foo": 3, "bar": 3}))
+
+    # Look up the axes by some of their parameters
+    self.assertEqual(
+        list(map(lambda axis: axis.parameters["bar"],
+                 self.summarizer.axesWhere(foo=1))), [2, 3])
+    self.assertEqual(
+        list(map(lambda axis: axis.parameters["foo"],
+                 self.summarizer.axesWhere(bar=3))), [1, 2])
+    self.assertEqual(len(self.summarizer.axesWhere(foo=2, bar=3)), 1)
+    self.assertEqual(len(self.summarizer.axesWhere(foo=2, bar=2)), 0)
+    self.assertEqual(len(self.summarizer.axesWhere(foo=4)), 0)
+    self.assertEqual(len(self.summarizer.axesWhere()), 3)
+
+  def test_axes_find_partial(self):
+    """
+    The Summarizer should find the axes by some of their parameters
+    """
+    for (foo, bar, traceid) in ((1, 2, "p1"), (1, 3, "p2"), (2, 3, "p3")):
+      self.eventbus.publish(
+        ParameterUpdateEvent({"foo": foo, "bar": bar}, {}, {"foo": foo},
+                             traceid=traceid))
+    self.eventbus.flush()
+
+    # The first axis created with the given values is found
+    self.assertIs(self.summarizer.axes.find({"foo": 1}),
+                  self.summarizer.axes[0])
+    self.assertIs(self.summarizer.axes.find({"bar": 3}),
+                  self.summarizer.axes[1])
+    self.assertIsNone(self.summarizer.axes.find({"foo": 3}))
+
+    # A parameter update with some of the parameters re-uses the axis
+    self.eventbus.publish(
+      ParameterUpdateEvent({"foo": 2}, {}, {"foo": 2}, traceid="p4"))
+    self.eventbus.flush()
+    self.assertEqual(len(self.summarizer.axes), 3)
+    self.assertIs(self.summarizer.axisLookup.find(["p4"]),
+                  self.summarizer.axes[2])
+
+  def test_live_summaries(self):
+    """
+    The Summarizer should periodically publish the summaries of the updated
+    axes
+    """
+    config = GeneralConfig({
+        "parameters": [{"name": "foo"}],
+        "metrics": [{"name": "baz"}],
+        "summaries": {"interval": "10s", "percentiles": [50, 99]}
+      }, None)
+    summarizer = Summarizer(self.eventbus, config)
+    summaries = []
+    self.eventbus.subscribe(
+        lambda event: summaries.append(event.summaries),
+        events=(SummaryUpdateEvent, ))
+
+    for (foo, traceid) in ((1, "l1"), (2, "l2")):
+      self.eventbus.publish(
+        ParameterUpdateEvent({"foo": foo}, {}, {"foo": foo}, traceid=traceid))
+    self.eventbus.flush()
+    for value in range(1, 101):
+      summarizer.trackMetric("baz", value, ["l1"])
+
+    # Nothing is published before the interval has passed
+    started = summarizer.lastSummaryTs
+    summarizer.handleTickEvent(TickEvent(1, 0, ts=started + 1))
+    self.eventbus.flush()
+    self.assertEqual(summaries, [])
+
+    # Only the updated axes are summarized
+    summarizer.handleTickEvent(TickEvent(2, 0, ts=started + 10))
+    self.eventbus.flush()
+    self.assertEqual(len(summaries), 1)
+    self.assertEqual(len(summaries[0]), 1)
+    self.assertEqual(summaries[0][0]["parameters"], {"foo": 1})
+    values = summaries[0][0]["values"]["baz"]
+    self.assertEqual(values["count"], 100)
+    self.assertEqual(values["mean"], 50.5)
+    self.assertEqual(values["min"], 1)
+    self.assertEqual(values["max"], 100)
+    self.assertAlmostEqual(values["p50"], 50.5, delta=1)
+    self.assertAlmostEqual(values["p99"], 99, delta=1)
+
+    # Axes without new values are not summarized again
+    summarizer.trackMetric("baz", 5, ["l2"])
+    summarizer.handleTickEvent(TickEvent(3, 0, ts=started + 20))
+    summarizer.handleTickEvent(TickEvent(4, 0, ts=started + 30))
+    self.eventbus.flush()
+    self.assertEqual(len(summaries), 2)
+    self.assertEqual(summaries[1][0]["parameters"], {"foo": 2})
+    self.assertEqual(summaries[1][0]["values"]["baz"]["count"], 1)
+
+
+class TestSummarizerTimeseries(unittest.TestCase):
+
+  def test_push(self):
+    """
+    Check if the timeseries buffers grow and expose the values collected
+    """
+    timeseries = SummarizerAxisTimeseries('foo', None, capacity=2)
+    for value in range(0, 100):
+      timeseries.push(value)
+
+    self.assertEqual(len(timeseries), 100)
+    self.assertEqual(timeseries.data.tolist(), list(range(0, 100)))
+    self.assertEqual(len(timeseries.timestamps), 100)
+    self.assertEqual(list(map(lambda x: x[1], timeseries.values)),
+                     list(range(0, 100)))
+
+    # The views should not copy the buffers
+    self.assertIs(timeseries.data.base, timeseries.valueBuffer)
+    self.assertIs(timeseries.timestamps.base, timeseries.tsBuffer)
+
+    # The raw values should be plain python values
+    self.assertEqual(type(timeseries.raw()[0][0]), float)
+    self.assertEqual(type(timeseries.raw()[0][1]), float)
+
+  def test_summarizers(self):
+    """
+    Check if the built-in summarizers operate on the timeseries buffers
+    """
+    timeseries = SummarizerAxisTimeseries('foo', None)
+    for value in [1, 2, 2, 3, 100]:
+      timeseries.push(value)
+
+    self.assertEqual(builtin.sum(timeseries, {}), 108)
+    self.assertEqual(builtin.min(timeseries, {}), 1)
+    self.assertEqual(builtin.max(timeseries, {}), 100)
+    self.assertEqual(builtin.mean(timeseries, {}), 21.6)
+    self.assertEqual(builtin.median(timeseries, {}), 2)
+    self.assertEqual(builtin.mode(timeseries, {}), 2)
+    self.assertAlmostEqual(builtin.variance(timeseries, {}), 1537.04)
+    self.assertAlmostEqual(builtin.sdeviation(timeseries, {}), 1537.04**0.5)
+
+    # Outliers should be removed with their timestamps
+    filtered = util.reject_outliers(timeseries)
+    self.assertEqual(filtered.data.tolist(), [1, 2, 2, 3])
+    self.assertEqual(filtered.timestamps.tolist(),
+                     timeseries.timestamps[:4].tolist())
+
+    # An empty timeseries should summarize to zero
+    empty = SummarizerAxisTimeseries('foo', None)
+    self.assertEqual(builtin.sum(empty, {}), 0)
+    self.assertEqual(builtin.min(empty, {}), 0)
+    self.assertEqual(builtin.mean(empty, {}), 0)
+    self.assertEqual(util.confidence_interval(empty), (0.0, 0.0))
+
+  def test_streaming(self):
+    """
+    Check if the summarizers work without keeping the raw values
+    """
+    config = Mock()
+    config.raw = False
+    timeseries = SummarizerAxisTimeseries('foo', config)
+    for value in range(1, 1001):
+      timeseries.push(value)
+
+    # No raw values should be kept
+    self.assertEqual(len(timeseries), 0)
+    self.assertEqual(timeseries.raw(), [])
+
+    self.assertEqual(builtin.sum(timeseries, {}), 500500)
+    self.assertEqual(builtin.min(timeseries, {}), 1)
+    self.assertEqual(builtin.max(timeseries, {}), 1000)
+    self.assertAlmostEqual(builtin.mean(timeseries, {}), 500.5)
+    self.assertAlmostEqual(builtin.variance(timeseries, {}), 83333.25)
+    self.assertAlmostEqual(builtin.median(timeseries, {}), 500, delta=5)
+
+    # Outliers cannot be removed without the raw values
+    self.assertIs(util.reject_outliers(timeseries), timeseries)
+
+  def test_streaming_raw(self):
+    """
+    Check if the running statistics are maintained along with the raw values
+    only when streaming is requested
+    """
+    timeseries = SummarizerAxisTimeseries('foo', None)
+    streaming = SummarizerAxisTimeseries('foo', None, streaming=True)
+    for value in range(1, 101):
+      timeseries.push(value)
+      streaming.push(value)
+
+    self.assertIsNone(timeseries.stats)
+    self.assertIsNone(timeseries.histogram)
+    self.assertEqual(streaming.stats.count, 100)
+
+    # The snapshots are calculated from the raw values otherwise
+    snapshot = timeseries.snapshot((50, ))
+    self.assertEqual(snapshot['count'], 100)
+    self.assertEqual(snapshot['mean'], 50.5)
+    self.assertEqual(snapshot['min'], 1)
+    self.assertEqual(snapshot['max'], 100)
+    self.assertAlmostEqual(snapshot['p50'], streaming.snapshot((50, ))['p50'],
+                           delta=1)
+
+  def test_axis_sum_cache(self):
+    """
+    Check if the axis summaries are calculated again only when changed
+    """
+    config = GeneralConfig({
+        "parameters": [{"name": "foo"}],
+        "metrics": [{"name": "baz", "summarize": ["mean"]}]
+      }, None)
+    axis = SummarizerAxis(config, {"foo": 1}, [])
+    axis.push("baz", 1)
+    axis.push("baz", 3)
+    self.assertEqual(axis.sum(), {"baz": {"mean": 2}})
+
+    # The summarizers should not be called if nothing was pushed
+    summarizer = config.metrics["baz"].instanceSummarizers()[0]
+    summarizer.calculate = Mock(return_value=42)
+    self.assertEqual(axis.sum(), {"baz": {"mean": 2}})
+    self.assertEqual(len(summarizer.calculate.mock_calls), 0)
+
+    # But they should be called again when a value is pushed
+    axis.push("baz", 5)
+    self.assertEqual(axis.sum(), {"baz": {"mean": 42}})
+    self.assertEqual(axis.sum(), {"baz": {"mean": 42}})
+    self.assertEqual(len(summarizer.calculate.mock_calls), 1)
+
+  def test_batch(self):
+    """
+    Check if the batch summaries are the same as the summaries of every axis
+    """
+    summarize = ["sum", "min", "max", "mean", "median", "variance",
+                 "sdeviation", "mean_err", {
+                   "class": "@mean", "name": "mean_nooutliers",
+                   "outliers": False
+                 }, {
+                   "class": "summarize.PercentileSummarizer", "name": "p90",
+                   "percentile": 90
+                 }, {
+                   "class": "summarize.PercentileSummarizer", "name": "p50",
+                   "percentile": 50, "outliers": False
+                 }]
+    config = GeneralConfig({
+        "parameters": [{"name": "foo"}],
+        "metrics": [{"name": "baz", "summarize": summarize},
+                    {"name": "bax", "summarize": ["mean", "mode"]}]
+      }, None)
+    summarizer = Summarizer(Mock(), config)
+
+    random.seed(1)
+    for i in range(0, 20):
+      axis = SummarizerAxis(config, {"foo": i}, [])
+      for j in range(0, [0, 1, 2, 5, 100][i % 5]):
+        axis.push("baz", random.choice([1, 2, 2, 3, 50]) * random.random())
+        axis.push("bax", j % 3)
+      summarizer.axes.add(axis)
+
+    # Calculate the summaries of every axis on it's own
+    expected = list(map(lambda axis: axis.sum(), summarizer.axes))
+
+    # Calculate the batch summaries of the metrics that support them
+    for axis in summarizer.axes:
+      axis.sums = {}
+    summarizer.sumBatch()
+    for axis in summarizer.axes:
+      self.assertEqual(list(axis.sums.keys()), ["baz"])
+
+    for (axis, values) in zip(summarizer.axes, expected):
+      batchValues = axis.sum()
+      self.assertEqual(batchValues["bax"], values["bax"])
+      for name, value in values["baz"].items():
+        if type(value) is tuple:
+          self.assertEqual(len(value), len(batchValues["baz"][name]))
+          for (v1, v2) in zip(value, batchValues["baz"][name]):
+            if not v1 != v1:
+              self.assertAlmostEqual(v1, v2)
+        else:
+          self.assertAlmostEqual(value, batchValues["baz"][name], msg=name)
+
+  def test_mapped(self):
+    """
+    Check if the values spilled in the column store are summarized correctly
+    """
+    config = GeneralConfig({
+        "parameters": [{"name": "foo"}],
+        "metrics": [{"name": "baz", "summarize": ["sum", "mean", "median"]}],
+        "storage": {"backend": "mmap", "window": 16}
+      }, None)
+    axis = SummarizerAxis(config, {"foo": 1}, [])
+    timeseries = axis.timeseries["baz"]
+    self.assertIsInstance(timeseries, MappedSummarizerAxisTimeseries)
+
+    # Only the values of the window are kept in memory
+    for value in range(1, 101):
+      axis.push("baz", value)
+    self.assertEqual(len(timeseries), 100)
+    self.assertEqual(len(timeseries.valueBuffer), 16)
+    self.assertEqual(len(timeseries.valueColumn), 96)
+
+    self.assertEqual(timeseries.data.tolist(), list(range(1, 101)))
+    self.assertEqual(len(timeseries.timestamps), 100)
+    self.assertEqual(len(timeseries.raw()), 100)
+    self.assertEqual(axis.sum(), {"baz": {"sum": 5050, "mean": 50.5,
+                                          "median": 51}})
+
+    # Values pushed after reading should be appended
+    axis.push("baz", 101)
+    self.assertEqual(timeseries.data.tolist()[-2:], [100, 101])
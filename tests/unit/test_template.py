@@ -5,7 +5,7 @@ import threading
 import unittest
 
 from unittest.mock import Mock, call
-from performance.driver.core.template import TemplateString, TemplateDict, TemplateList, toTemplate
+from performance.driver.core.template import TemplateString, TemplateDict, TemplateList, toTemplate, compileTemplate
 
 class TestTemplate(unittest.TestCase):
 
@@ -164,3 +164,33 @@ class TestTemplate(unittest.TestCase):
       })
 
     self.assertEqual(tpl.macros(), set(["first", "another"]))
+
+  def test_compile(self):
+    """
+    Check if the compiled templates render only the varying macros
+    """
+    tpl = TemplateString("{{a}}/{{i}}/{{missing|i}}/{{b|'x'}}")
+    compiled = tpl.compile({"a": "1", "b": "2"}, ("i", ))
+    self.assertFalse(compiled.static)
+    self.assertEqual(compiled.apply({"i": 5}), "1/5/5/2")
+    self.assertEqual(compiled.apply({"i": 6}), "1/6/6/2")
+
+    # The methods are rendered again on every call
+    compiled = TemplateString("{{uuid()}}").compile({})
+    self.assertFalse(compiled.static)
+    self.assertNotEqual(compiled.apply(), compiled.apply())
+
+    # The templates without varying macros are rendered only once
+    compiled = compileTemplate({
+        "a": ["{{a}}", 1],
+        "b": "{{b}}"
+      }, {"a": "1", "b": "2"}, ("i", ))
+    self.assertTrue(compiled.static)
+    self.assertEqual(compiled.apply({"i": 1}), {"a": ["1", 1], "b": "2"})
+    self.assertIs(compiled.apply({"i": 1}), compiled.apply({"i": 2}))
+
+    compiled = compileTemplate(["{{i}}", {"if": "i > {{a}}"}], {"a": "1"},
+                               ("i", ))
+    self.assertFalse(compiled.static)
+    self.assertEqual(compiled.apply({"i": 3}), ["3", {"if": "i > 1"}])
+    self.assertEqual(compileTemplate(None, {}).apply(), None)
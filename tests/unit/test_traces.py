@@ -0,0 +1,94 @@
+import unittest
+
+from performance.driver.core.events import Event
+from performance.driver.core.traces import TraceIds, TraceIndex, \
+  internTraceId, lookupTraceId, releaseTraceIds, resolveTraceIds
+
+
+class TestTraces(unittest.TestCase):
+
+  def test_intern(self):
+    """
+    Check if the non-integer trace IDs are interned to the same integer
+    """
+    traceid = internTraceId('test-intern')
+    self.assertEqual(type(traceid), int)
+    self.assertEqual(internTraceId('test-intern'), traceid)
+    self.assertEqual(lookupTraceId('test-intern'), traceid)
+    self.assertIsNone(lookupTraceId('test-intern-missing'))
+
+    # Integer IDs (ex. the IDs of the events) are used as-is
+    eventId = Event().traceids[0]
+    self.assertEqual(internTraceId(eventId), eventId)
+    self.assertEqual(
+        resolveTraceIds([traceid, eventId]), ['test-intern', eventId])
+
+  def test_intern_types(self):
+    """
+    Check if only integer and string trace IDs are interned
+    """
+    with self.assertRaises(TypeError):
+      internTraceId(object())
+    with self.assertRaises(TypeError):
+      Event(traceid=('test-types', 1.5))
+
+  def test_release(self):
+    """
+    Check if the interned trace IDs can be released
+    """
+    traceid = internTraceId('test-release')
+    releaseTraceIds()
+    self.assertIsNone(lookupTraceId('test-release'))
+    self.assertEqual(resolveTraceIds([traceid]), [traceid])
+    self.assertNotEqual(internTraceId('test-release'), traceid)
+
+  def test_literal_ids(self):
+    """
+    Check if the allocated IDs never collide with literal integer trace IDs,
+    and still increase monotonically
+    """
+    first = internTraceId('test-literal')
+    event = Event(traceid=[1, 1000])
+    self.assertLess(first, event.traceids[0])
+    self.assertLess(event.traceids[0], 1)
+    self.assertEqual(list(event.traceids[1:]), [1, 1000])
+    self.assertEqual(resolveTraceIds([1000]), [1000])
+
+  def test_event_traceids(self):
+    """
+    Check if the trace IDs of an event can be queried with their original
+    values
+    """
+    parent = Event(traceid='test-event')
+    child = Event(traceid=parent.traceids)
+    self.assertIsInstance(child.traceids, TraceIds)
+    self.assertIn('test-event', child.traceids)
+    self.assertIn(parent.traceids[0], child.traceids)
+    self.assertNotIn('test-event-missing', child.traceids)
+    self.assertTrue(child.hasTraces(['test-event']))
+    self.assertTrue(child.hasTraces({parent.traceids[0]}))
+    self.assertFalse(child.hasTraces(['test-event-missing']))
+
+    event = Event(traceid=['test-event-a', 'test-event-b', 'test-event-a'])
+    self.assertEqual(len(event.traceids), 3)
+    self.assertEqual(
+        resolveTraceIds(event.traceids)[1:], ['test-event-a', 'test-event-b'])
+
+  def test_index(self):
+    """
+    Check if the trace index finds the values of the traces of an event
+    """
+    index = TraceIndex()
+    first = Event(traceid='test-index')
+    second = Event()
+    index.add(first.traceids, 'first')
+    index.add(second.traceids, 'second')
+
+    self.assertEqual(index.find(first.traceids), 'first')
+    self.assertEqual(index.find(['test-index']), 'first')
+    self.assertIsNone(index.find(Event().traceids))
+    self.assertIsNone(index.find(['test-index-missing']))
+
+    child = Event(traceid=first.traceids.union(second.traceids))
+    self.assertEqual(sorted(index.findAll(child.traceids)), ['first', 'second'])
+    self.assertIn('test-index', index.keys())
@@ -90,6 +90,35 @@ class TestTrackerDuration(unittest.TestCase):
     self.assertEqual(self.summarizer.trackMetric.call_args[0][0], "foo")
     self.assertEqual(self.summarizer.trackMetric.call_args[0][1], 1)
 
+  def test_mailbox(self):
+    """
+    Check if the sessions receive their events on a bus that delivers them to
+    every subscriber from it's own mailbox
+    """
+    self.eventbus.stop()
+    self.eventbus = EventBus(dispatch='mailbox')
+    self.tracker = DurationTracker(
+      next(self.config.trackers()),
+      self.eventbus,
+      self.summarizer)
+    self.eventbus.start()
+
+    # Start many sessions, each one immediately followed by it's events
+    for i in range(0, 50):
+      rootEvent = ParameterUpdateEvent({"bar": i}, {}, {"bar": i})
+      self.eventbus.publish(rootEvent)
+      self.eventbus.publish(StartEvent(traceid=rootEvent.traceids, ts=i))
+      self.eventbus.publish(EndEvent(traceid=rootEvent.traceids, ts=i + 1))
+
+    self.eventbus.publish(TeardownEvent())
+    self.eventbus.flush()
+
+    # Check if all the durations were reported
+    self.assertEqual(len(self.summarizer.trackMetric.mock_calls), 50)
+    for call in self.summarizer.trackMetric.mock_calls:
+      self.assertEqual(call[1][0], "foo")
+      self.assertEqual(call[1][1], 1)
+
   def test_reversed(self):
     """
     The expected case where the events arrive in reverse order
@@ -128,6 +157,33 @@ class TestTrackerDuration(unittest.TestCase):
     self.assertEqual(self.summarizer.trackMetric.call_args[0][0], "foo")
     self.assertEqual(self.summarizer.trackMetric.call_args[0][1], 1)
 
+  def test_corrected(self):
+    """
+    The corrected duration starts from the intended time of the start event
+    """
+    self.tracker.corrected = True
+
+    # Start the tests with a parameter update event
+    rootEvent = ParameterUpdateEvent({"bar": 1}, {}, {"bar": 1})
+    self.eventbus.publish(rootEvent)
+
+    # Send the two events, with the start event delayed by 1s
+    startEvent = StartEvent(traceid=rootEvent.traceids, ts=2)
+    startEvent.intendedTs = 1
+    self.eventbus.publish(startEvent)
+    self.eventbus.publish(EndEvent(traceid=rootEvent.traceids, ts=3))
+    self.eventbus.flush()
+
+    # Events without an intended time are measured as usual
+    self.eventbus.publish(StartEvent(traceid=rootEvent.traceids, ts=4))
+    self.eventbus.publish(EndEvent(traceid=rootEvent.traceids, ts=5))
+    self.eventbus.flush()
+
+    # Check if it was reported correctly
+    self.assertEqual(len(self.summarizer.trackMetric.mock_calls), 2)
+    self.assertEqual(self.summarizer.trackMetric.mock_calls[0][1][1], 2)
+    self.assertEqual(self.summarizer.trackMetric.mock_calls[1][1][1], 1)
+
   def test_multiple_regular(self):
     """
     Test multiple completed sessions
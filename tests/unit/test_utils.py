@@ -1,8 +1,20 @@
+import socket
 import time
 import unittest
 
+import numpy as np
+import requests
+
+from unittest import mock
+
+from .mocks.httpserver import MockHTTPServer
+
 from performance.driver.core.utils import LRUDict
 from performance.driver.core.utils import dictDiff
+from performance.driver.core.utils import LogHistogram
+from performance.driver.core.utils import RunningStats
+from performance.driver.core.utils import ColumnStore
+from performance.driver.core.utils import mountTimingAdapter
 
 class TestUtil(unittest.TestCase):
 
@@ -204,3 +216,143 @@ class TestUtil(unittest.TestCase):
     self.assertCountEqual(dictDiff(a,b), [
       (('a', 1), 'bar', 'baz')
     ])
+
+  def test_LogHistogram(self):
+    """
+    Test LogHistogram percentiles and merging
+    """
+    histogram = LogHistogram(accuracy=0.01)
+    self.assertEqual(histogram.percentile(50), 0)
+
+    for i in range(1, 1001):
+      histogram.add(i)
+    self.assertEqual(histogram.count, 1000)
+    self.assertEqual(histogram.mean(), 500.5)
+    self.assertAlmostEqual(histogram.percentile(50), 500, delta=500 * 0.01)
+    self.assertAlmostEqual(histogram.percentile(99), 990, delta=990 * 0.01)
+    self.assertEqual(histogram.percentile(100), 1000)
+    self.assertEqual(histogram.percentile(0), 1)
+
+    # Merge a second histogram with larger values
+    other = LogHistogram(accuracy=0.01)
+    for i in range(1001, 2001):
+      other.add(i)
+    histogram.merge(other)
+    self.assertEqual(histogram.count, 2000)
+    self.assertEqual(histogram.max, 2000)
+    self.assertAlmostEqual(histogram.percentile(50), 1000, delta=1000 * 0.01)
+
+    # Histograms of different accuracy cannot be merged
+    with self.assertRaises(ValueError):
+      histogram.merge(LogHistogram(accuracy=0.05))
+
+  def test_RunningStats(self):
+    """
+    Test RunningStats values and merging
+    """
+    stats = RunningStats()
+    self.assertEqual(stats.variance(), 0)
+
+    values = [2, 4, 4, 4, 5, 5, 7, 9]
+    for value in values:
+      stats.add(value)
+    self.assertEqual(stats.count, 8)
+    self.assertEqual(stats.sum, 40)
+    self.assertEqual(stats.min, 2)
+    self.assertEqual(stats.max, 9)
+    self.assertEqual(stats.mean, 5)
+    self.assertEqual(stats.variance(), 4)
+    self.assertEqual(stats.sdeviation(), 2)
+
+    # Merging should give the same results as collecting all the values
+    first = RunningStats()
+    second = RunningStats()
+    for value in values[:3]:
+      first.add(value)
+    for value in values[3:]:
+      second.add(value)
+    first.merge(second)
+    first.merge(RunningStats())
+    self.assertEqual(first.count, 8)
+    self.assertEqual(first.min, 2)
+    self.assertEqual(first.max, 9)
+    self.assertAlmostEqual(first.mean, 5)
+    self.assertAlmostEqual(first.variance(), 4)
+
+  def test_ColumnStore(self):
+    """
+    Test appending to and mapping column files
+    """
+    store = ColumnStore()
+    column = store.column('foo/bar')
+    self.assertNotEqual(column.filename, store.column('foo/bar').filename)
+    self.assertEqual(len(column.array()), 0)
+
+    column.append(np.arange(0, 10, dtype=np.float64))
+    column.append(np.array([]))
+    column.append([10, 11])
+    self.assertEqual(len(column), 12)
+    self.assertEqual(column.array().tolist(), list(range(0, 12)))
+
+    # The file should be mapped again only when values are appended
+    mapped = column.array()
+    self.assertIs(column.array(), mapped)
+    column.append([12])
+    self.assertEqual(column.array()[-1], 12)
+
+  def test_TimingHTTPAdapter(self):
+    """
+    Test measuring the phases of the HTTP requests
+    """
+    server = MockHTTPServer(fakeLattency=0.1, content="Hello")
+    server.start()
+    session = mountTimingAdapter(requests.Session())
+    url = 'http://localhost:{}/'.format(server.port)
+    try:
+      response = session.get(url)
+      timings = response.timings
+      self.assertEqual(response.text, "Hello")
+      self.assertGreater(timings.dns, 0)
+      self.assertGreater(timings.connect, 0)
+      self.assertEqual(timings.tls, 0)
+      self.assertLess(timings.ttfb, 0.2)
+      self.assertGreaterEqual(timings.transfer, 0)
+      self.assertAlmostEqual(
+          timings.total,
+          timings.dns + timings.connect + timings.ttfb + timings.transfer,
+          delta=0.01)
+
+      # The connection should be re-used
+      timings = session.get(url).timings
+      self.assertEqual(timings.dns, 0)
+      self.assertEqual(timings.connect, 0)
+
+      # The streamed bodies are timed when consumed
+      response = session.get(url, stream=True)
+      self.assertIsNone(response.timings.transfer)
+      self.assertEqual(response.content, b"Hello")
+      self.assertIsNotNone(response.timings.transfer)
+      self.assertEqual(
+          set(response.timings.toDict().keys()),
+          set(['dns', 'connect', 'tls', 'ttfb', 'transfer', 'total']))
+
+      # All the addresses of a host are tried, until one of them accepts the
+      # connection (Note: The server is not listening on 127.0.0.2)
+      getaddrinfo = socket.getaddrinfo
+
+      def resolveMultiple(host, *args, **kwargs):
+        if host == 'multiple.test':
+          return getaddrinfo('127.0.0.2', *args, **kwargs) + \
+                 getaddrinfo('127.0.0.1', *args, **kwargs)
+        return getaddrinfo(host, *args, **kwargs)
+
+      with mock.patch('socket.getaddrinfo', resolveMultiple):
+        url = 'http://multiple.test:{}/'.format(server.port)
+        self.assertEqual(requests.get(url).text, "Hello")
+        response = session.get(url)
+        self.assertEqual(response.text, "Hello")
+        self.assertGreater(response.timings.connect, 0)
+
+    finally:
+      session.close()
+      server.stop()